@@ -0,0 +1,265 @@
+"""
+benchmark suite for keygen/sign/verify and the
+primitives under them (gr codec, bitpack, samplers,
+polynomial products, hash-to-s1), per parameter set.
+each benchmark is warmed up, then timed over repeated
+trials; fast operations are looped inside a trial so
+one sample is long enough to time reliably. results
+are json so a run can be kept as a baseline and later
+runs compared against it
+"""
+
+import gc
+import json
+import platform
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple
+import numpy as np
+from hawk.core.hawk import PARAMS
+from hawk.core.keygen import derive_keypair
+from hawk.core.sign import SigningKey
+from hawk.core.verify import VerifyingKey
+from hawk.utils.bitpack import BitReader, BitWriter
+from hawk.utils.gr import compress_gr_bytes, decompress_gr_bytes
+from hawk.utils.hashpoint import derive_s1, hash_to_point
+from hawk.utils.poly import negacyclic_mul, negacyclic_mul_schoolbook
+from hawk.utils.samplers import (
+    centred_binomial_shake,
+    discrete_gaussian_batch,
+    regenerate_fg_bits,
+    shake256x4,
+)
+
+SCHEMA = 1
+# trials are looped until one sample takes at least this long
+MIN_SAMPLE_TIME = 1e-3
+DEFAULT_THRESHOLD = 0.10
+# (fast, reference) pairs whose median ratio is reported per param
+SPEEDUPS = (("poly.negacyclic_mul", "poly.schoolbook"),)
+MESSAGE = bytes(range(256)) * 4
+# seed 0 is the fixed trivial keypair (f=1, g=0), which skips the
+# real work; any other seed gives random f and g
+SEED = 1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    param: str
+    fn: Callable[[], object]
+
+
+def suite(param_name: str) -> List[Benchmark]:
+    """the benchmarks for one parameter set, inputs prepared up front"""
+    p = PARAMS[param_name]
+    n, low, high = p["n"], p["lows1"], p["highs1"]
+    kp = derive_keypair(SEED, param_name)
+    sk = SigningKey(kp.sk, param_name)
+    vk = VerifyingKey(kp.pk, param_name)
+    sig = sk.sign(MESSAGE)
+    M = bytes(64)
+    h = hash_to_point(M, bytes(p["saltlenbits"] // 8), n)
+    s1 = derive_s1(h, p)
+    comp = compress_gr_bytes(s1, low, high)
+    kgseed = kp.kgseed
+
+    def bitpack_write():
+        w = BitWriter()
+        w.write_bytes_le(sig[:8])
+        w.write_bytes(sig[8:])
+        w.write(5, 3)
+        return w.getvalue()
+
+    def bitpack_read():
+        r = BitReader(sig)
+        r.read_bytes_le(8)
+        return r.read_bits(len(sig) * 8 - 64)
+
+    cases = {
+        "keygen": lambda: derive_keypair(SEED, param_name),
+        "sign": lambda: sk.sign(MESSAGE),
+        "sign_digest": lambda: sk.sign_digest(M),
+        "verify": lambda: vk.verify(MESSAGE, sig),
+        "verify_digest": lambda: vk.verify_digest(M, sig),
+        "hash_to_s1": lambda: derive_s1(hash_to_point(M, b"", n), p),
+        "gr.compress": lambda: compress_gr_bytes(s1, low, high),
+        "gr.decompress": lambda: decompress_gr_bytes(comp, n, low, high),
+        "bitpack.write": bitpack_write,
+        "bitpack.read": bitpack_read,
+        "samplers.shake256x4": lambda: shake256x4(kgseed, 2 * n * n // 64),
+        "samplers.fg_bits": lambda: regenerate_fg_bits(kgseed, n, p["eta"]),
+        "samplers.binomial": lambda: centred_binomial_shake(
+            kgseed, n, p["eta"]
+        ),
+        "samplers.gaussian": lambda: discrete_gaussian_batch(n, 2.0),
+        "poly.negacyclic_mul": lambda: negacyclic_mul(kp.f, kp.g),
+        "poly.schoolbook": lambda: negacyclic_mul_schoolbook(kp.f, kp.g),
+    }
+    return [Benchmark(name, param_name, fn) for name, fn in cases.items()]
+
+
+def measure(fn, warmup: int = 3, repeat: int = 30) -> List[float]:
+    """per-call seconds, one value per trial"""
+    t0 = time.perf_counter()
+    for _ in range(max(warmup, 1)):
+        fn()
+    per_call = (time.perf_counter() - t0) / max(warmup, 1)
+    number = max(1, int(MIN_SAMPLE_TIME / per_call)) if per_call else 1000
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    median, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "trials": len(samples),
+        "min": float(min(samples)),
+        "mean": float(np.mean(samples)),
+        "median": float(median),
+        "p95": float(p95),
+        "p99": float(p99),
+        "ops_per_s": float(1.0 / median) if median > 0 else float("inf"),
+    }
+
+
+def run(params=None, only=None, warmup: int = 3, repeat: int = 30):
+    """
+    run the suite for each parameter set; only is a regex matched
+    against benchmark names. returns a json-ready dict
+    """
+    pattern = re.compile(only) if only else None
+    results = []
+    for param_name in params or list(PARAMS):
+        for bench in suite(param_name):
+            if pattern and not pattern.search(bench.name):
+                continue
+            stats = summarize(measure(bench.fn, warmup, repeat))
+            results.append({"name": bench.name, "param": param_name, **stats})
+    return {
+        "schema": SCHEMA,
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.time(),
+            "warmup": warmup,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold: float = DEFAULT_THRESHOLD):
+    """
+    entries whose median is more than threshold slower than in the
+    baseline; benchmarks missing from either side are ignored
+    """
+    base = {(r["name"], r["param"]): r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = base.get((r["name"], r["param"]))
+        if old is None or old["median"] <= 0:
+            continue
+        ratio = r["median"] / old["median"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "name": r["name"],
+                    "param": r["param"],
+                    "baseline": old["median"],
+                    "median": r["median"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def speedups(report):
+    """reference median / fast median for each SPEEDUPS pair and param"""
+    medians = {
+        (r["name"], r["param"]): r["median"] for r in report["results"]
+    }
+    out = []
+    for fast, ref in SPEEDUPS:
+        for (name, param), median in medians.items():
+            base = medians.get((ref, param))
+            if name == fast and base is not None and median > 0:
+                out.append(
+                    {
+                        "name": fast,
+                        "reference": ref,
+                        "param": param,
+                        "speedup": base / median,
+                    }
+                )
+    return out
+
+
+def load_report(path):
+    with open(path, "r") as f:
+        report = json.load(f)
+    if report.get("schema") != SCHEMA:
+        raise ValueError(f"{path}: unsupported benchmark schema")
+    return report
+
+
+def save_report(path, report):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def format_report(report) -> str:
+    lines = [
+        "%-22s %-10s %12s %12s %12s %12s"
+        % ("benchmark", "param", "median us", "p95 us", "p99 us", "ops/s")
+    ]
+    for r in report["results"]:
+        lines.append(
+            "%-22s %-10s %12.2f %12.2f %12.2f %12.1f"
+            % (
+                r["name"],
+                r["param"],
+                r["median"] * 1e6,
+                r["p95"] * 1e6,
+                r["p99"] * 1e6,
+                r["ops_per_s"],
+            )
+        )
+    for entry in speedups(report):
+        lines.append(
+            "%s [%s]: x%.1f faster than %s"
+            % (
+                entry["name"],
+                entry["param"],
+                entry["speedup"],
+                entry["reference"],
+            )
+        )
+    return "\n".join(lines)
+
+
+def format_regressions(regressions) -> str:
+    return "\n".join(
+        "REGRESSION %s [%s]: %.2fus -> %.2fus (x%.2f)"
+        % (
+            r["name"],
+            r["param"],
+            r["baseline"] * 1e6,
+            r["median"] * 1e6,
+            r["ratio"],
+        )
+        for r in regressions
+    )
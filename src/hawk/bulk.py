@@ -0,0 +1,213 @@
+"""
+bulk signing and verification of files
+the key is loaded once per worker process and
+every file is hashed incrementally, so a run over
+a whole tree costs one interpreter and one key
+parse per worker rather than per file
+"""
+
+import io
+import os
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from hawk.core.sign import SigningKey
+from hawk.core.verify import VerifyingKey
+from hawk.utils.msghash import DEFAULT_CHUNK_SIZE, iter_chunks
+
+SIG_SUFFIX = ".sig"
+
+_worker_key = None
+
+
+def collect_files(root=None, manifest=None, suffix=SIG_SUFFIX, exclude=()):
+    """
+    return (path, name) pairs: every file under root, or every path
+    listed in a manifest file (one per line, blank lines and #
+    comments ignored, relative paths taken from the manifest's
+    directory). names are relative to root or to the manifest's
+    directory, so archive members never escape it; a manifest entry
+    outside that directory is a ValueError. signature files and the
+    paths in exclude (e.g. the archive) are skipped
+    """
+    skip = {os.path.abspath(p) for p in exclude}
+    entries = []
+    if manifest is not None:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as f:
+            for line in f:
+                path = line.strip()
+                if not path or path.startswith("#"):
+                    continue
+                full = os.path.normpath(os.path.join(base, path))
+                if path.endswith(suffix) or full in skip:
+                    continue
+                name = os.path.relpath(full, base)
+                if name == os.pardir or name.startswith(os.pardir + os.sep):
+                    raise ValueError(f"{manifest}: {path} is outside {base}")
+                entries.append((full, name.replace(os.sep, "/")))
+        return entries
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            path = os.path.join(dirpath, fname)
+            if fname.endswith(suffix) or os.path.abspath(path) in skip:
+                continue
+            name = os.path.relpath(path, root)
+            entries.append((path, name.replace(os.sep, "/")))
+    return entries
+
+
+def _init_signer(sk_bytes, param_name):
+    global _worker_key
+    _worker_key = SigningKey(sk_bytes, param_name)
+
+
+def _init_verifier(pk_bytes, param_name):
+    global _worker_key
+    _worker_key = VerifyingKey(pk_bytes, param_name)
+
+
+def _sign_file(task):
+    path, buffer_size = task
+    try:
+        with open(path, "rb", buffering=0) as f:
+            sig = _worker_key.sign(iter_chunks(f, buffer_size))
+        return path, sig, os.path.getsize(path), None
+    except OSError as e:
+        return path, None, 0, str(e)
+
+
+def _verify_file(task):
+    path, sig, buffer_size, suffix = task
+    try:
+        if sig is None:
+            with open(path + suffix, "rb") as f:
+                sig = f.read()
+        with open(path, "rb", buffering=0) as f:
+            ok = _worker_key.verify(iter_chunks(f, buffer_size), sig)
+        return path, ok, os.path.getsize(path), None
+    except OSError as e:
+        return path, False, 0, str(e)
+
+
+def _run(worker, init, initargs, tasks, jobs):
+    if jobs <= 1:
+        init(*initargs)
+        yield from map(worker, tasks)
+        return
+    chunksize = max(1, len(tasks) // (8 * jobs))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=init, initargs=initargs
+    ) as pool:
+        yield from pool.map(worker, tasks, chunksize=chunksize)
+
+
+def sign_files(
+    sk_bytes,
+    entries,
+    jobs=1,
+    param_name="hawk-512",
+    archive=None,
+    suffix=SIG_SUFFIX,
+    buffer_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    sign (path, name) entries; signatures are written next to each
+    file as path + suffix, or into a tar archive as name + suffix
+    """
+    SigningKey(sk_bytes, param_name)  # fail fast on a malformed key
+    names = dict(entries)
+    if archive:
+        for name in names.values():
+            parts = name.split("/")
+            if name.startswith("/") or os.pardir in parts:
+                raise ValueError(f"unsafe archive member name: {name}")
+    tasks = [(path, buffer_size) for path, _ in entries]
+    stats = _new_stats()
+    tar = tarfile.open(archive, "w") if archive else None
+    try:
+        for path, sig, size, err in _run(
+            _sign_file, _init_signer, (sk_bytes, param_name), tasks, jobs
+        ):
+            if err is not None:
+                stats["failures"].append({"path": path, "error": err})
+                continue
+            if tar is not None:
+                _add_to_tar(tar, names[path] + suffix, sig)
+            else:
+                with open(path + suffix, "wb") as f:
+                    f.write(sig)
+            stats["ok"] += 1
+            stats["bytes"] += size
+    finally:
+        if tar is not None:
+            tar.close()
+    return _finish_stats(stats)
+
+
+def verify_files(
+    pk_bytes,
+    entries,
+    jobs=1,
+    param_name="hawk-512",
+    archive=None,
+    suffix=SIG_SUFFIX,
+    buffer_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    verify (path, name) entries against signatures stored next to
+    each file or in a tar archive written by sign_files
+    """
+    VerifyingKey(pk_bytes, param_name)
+    stats = _new_stats()
+    sigs = {}
+    if archive:
+        with tarfile.open(archive, "r") as tar:
+            for member in tar.getmembers():
+                if member.isfile() and member.name.endswith(suffix):
+                    data = tar.extractfile(member).read()
+                    sigs[member.name[: -len(suffix)]] = data
+    tasks = []
+    for path, name in entries:
+        if archive and name not in sigs:
+            stats["failures"].append(
+                {"path": path, "error": "no signature in archive"}
+            )
+            continue
+        tasks.append((path, sigs.get(name), buffer_size, suffix))
+    for path, ok, size, err in _run(
+        _verify_file, _init_verifier, (pk_bytes, param_name), tasks, jobs
+    ):
+        if ok:
+            stats["ok"] += 1
+            stats["bytes"] += size
+        else:
+            stats["failures"].append(
+                {"path": path, "error": err or "invalid signature"}
+            )
+    return _finish_stats(stats)
+
+
+def _add_to_tar(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, fileobj=io.BytesIO(data))
+
+
+def _new_stats():
+    return {
+        "ok": 0,
+        "bytes": 0,
+        "failures": [],
+        "start": time.perf_counter(),
+    }
+
+
+def _finish_stats(stats):
+    elapsed = time.perf_counter() - stats.pop("start")
+    stats["elapsed"] = elapsed
+    stats["files_per_s"] = stats["ok"] / elapsed if elapsed > 0 else 0.0
+    stats["mb_per_s"] = stats["bytes"] / elapsed / 1e6 if elapsed > 0 else 0.0
+    return stats
@@ -6,13 +6,22 @@ demo/keygen/sign/verify
 """
 
 import argparse
+import contextlib
+import mmap
 import time
-import tracemalloc
 import json
 import os
-from hawk.core.keygen import HawkKeyGen
-from hawk.core.sign import HawkSign
-from hawk.core.verify import HawkVerify
+from hawk import bench
+from hawk.core import log
+from hawk.core.keygen import get_keypair
+from hawk.core.profile import Profiler
+from hawk.core.sign import SigningKey
+from hawk.core.verify import HawkVerify, VerifyingKey
+from hawk.utils.msghash import DEFAULT_CHUNK_SIZE, iter_chunks
+from hawk.bulk import SIG_SUFFIX, collect_files, sign_files, verify_files
+
+# message files at least this large are hashed through mmap
+MMAP_THRESHOLD = 64 << 20
 
 
 def save_key(path, key_bytes):
@@ -26,49 +35,69 @@ def load_key(path):
 
 
 def demo(args):
+    """
+    single-shot walkthrough; the times are one run each, use
+    `hawk bench` for repeatable numbers. with --profile the
+    per-stage spans are written as collapsed stacks
+    """
+    profile = getattr(args, "profile", None)
+    if not profile:
+        return _demo(args)
+    with Profiler() as prof:
+        results = _demo(args)
+    prof.write_collapsed(profile, getattr(args, "profile_metric", "wall"))
+    print(f"Stage profile saved to {profile}")
+    return results
+
+
+def _demo(args):
     start = time.perf_counter()
-    tracemalloc.start()
     print("demo: generating keypair (seed=%s)..." % (args.seed,))
-    kg = HawkKeyGen(seed=args.seed, param_name=args.param)
-    pk, sk = kg.generate()
+    kp = get_keypair(args.seed, args.param)
+    pk, sk = kp.pk, kp.sk
     t0 = time.perf_counter()
     print("keygen time: %.6fs" % (t0 - start))
     # sign a few messages of varying sizes
     msgs = [b"hello world", b"a" * 64, b"b" * 1024]
     results = []
+    key = SigningKey(sk, param_name=args.param)
     for m in msgs:
         t1 = time.perf_counter()
-        sig = HawkSign(sk, m, seed=args.seed).sign()
+        sig = key.sign(m, seed=args.seed)
         t2 = time.perf_counter()
-        ok = HawkVerify(pk, m, sig).verify()
+        ok = HawkVerify(pk, m, sig, param_name=args.param).verify()
+        t3 = time.perf_counter()
         results.append(
-            {"msglen": len(m), "siglen": len(sig), "time": t2 - t1, "ok": ok}
+            {
+                "msglen": len(m),
+                "siglen": len(sig),
+                "time": t2 - t1,
+                "verify_time": t3 - t2,
+                "ok": ok,
+            }
         )
         print(
-            "signed msg len %d -> sig len %d time %.6fs ok=%s"
-            % (len(m), len(sig), t2 - t1, ok)
+            "signed msg len %d -> sig len %d sign %.6fs verify %.6fs ok=%s"
+            % (len(m), len(sig), t2 - t1, t3 - t2, ok)
         )
     m = b"adversary"
-    ok = HawkVerify(pk, m, sig).verify()
-    results.append({"msglen": len(m), "ok": ok})
+    t1 = time.perf_counter()
+    ok = HawkVerify(pk, m, sig, param_name=args.param).verify()
+    t2 = time.perf_counter()
+    results.append({"msglen": len(m), "verify_time": t2 - t1, "ok": ok})
     print(
-        "unsigned msg len %d -> sig len %d time %.6fs ok=%s"
-        % (len(m), len(sig), t2 - t1, ok)
+        "forged msg len %d with last sig -> verify %.6fs ok=%s"
+        % (len(m), t2 - t1, ok)
     )
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
     total = time.perf_counter() - start
-    print(
-        "demo done. total time: %.6fs, peak mem: %.2f kiB"
-        % (total, peak / 1024)
-    )
+    print("demo done. total time: %.6fs" % total)
     print(json.dumps(results, indent=2))
     return results
 
 
 def gen_keys(args):
-    kg = HawkKeyGen(seed=args.seed, param_name=args.param)
-    pk, sk = kg.generate()
+    kp = get_keypair(args.seed, args.param)
+    pk, sk = kp.pk, kp.sk
     os.makedirs(args.outdir, exist_ok=True)
     pk_path = os.path.join(args.outdir, "pk.bin")
     sk_path = os.path.join(args.outdir, "sk.bin")
@@ -79,24 +108,191 @@ def gen_keys(args):
     print(f"Private key: {sk_path} ({len(sk)} bytes)")
 
 
+def load_signing_key(path, param_name="hawk-512"):
+    return SigningKey(load_key(path), param_name=param_name)
+
+
+def parse_size(text):
+    units = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    value = str(text).strip().lower().rstrip("ib")
+    try:
+        if value and value[-1] in units:
+            size = int(float(value[:-1]) * units[value[-1]])
+        else:
+            size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    if size <= 0:
+        # a zero-byte read buffer would hash every file as empty
+        raise argparse.ArgumentTypeError(f"size must be positive: {text!r}")
+    return size
+
+
+@contextlib.contextmanager
+def open_message(path, buffer_size=DEFAULT_CHUNK_SIZE, use_mmap=True):
+    """
+    yield (source, size) for hashing a message file: an mmap for large
+    files, otherwise unbuffered reads of buffer_size bytes at a time
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb", buffering=0) as f:
+        if use_mmap and size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm, size
+        else:
+            yield iter_chunks(f, buffer_size), size
+
+
+def report_throughput(size, elapsed):
+    rate = size / elapsed / 1e6 if elapsed > 0 else float("inf")
+    print("Hashed %.2f MB in %.3fs (%.2f MB/s)" % (size / 1e6, elapsed, rate))
+
+
 def sign_message(args):
-    sk = load_key(args.skey)
-    with open(args.msg, "rb") as f:
-        m = f.read()
-    sig = HawkSign(sk, m).sign()
+    key = load_signing_key(args.skey, getattr(args, "param", "hawk-512"))
+    buffer_size = getattr(args, "buffer_size", DEFAULT_CHUNK_SIZE)
+    use_mmap = not getattr(args, "no_mmap", False)
+    with open_message(args.msg, buffer_size, use_mmap) as (source, size):
+        t0 = time.perf_counter()
+        sig = key.sign(source)
+        elapsed = time.perf_counter() - t0
     with open(args.sig, "wb") as f:
         f.write(sig)
     print(f"Message signed. Signature saved to {args.sig} ({len(sig)} bytes)")
+    report_throughput(size, elapsed)
 
 
 def verify_message(args):
-    pk = load_key(args.pkey)
-    with open(args.msg, "rb") as f:
-        m = f.read()
-    with open(args.sig, "rb") as f:
-        sig = f.read()
-    ok = HawkVerify(pk, m, sig).verify()
+    key = VerifyingKey(
+        load_key(args.pkey), getattr(args, "param", "hawk-512")
+    )
+    sig = load_key(args.sig)
+    buffer_size = getattr(args, "buffer_size", DEFAULT_CHUNK_SIZE)
+    use_mmap = not getattr(args, "no_mmap", False)
+    with open_message(args.msg, buffer_size, use_mmap) as (source, size):
+        t0 = time.perf_counter()
+        ok = key.verify(source, sig)
+        elapsed = time.perf_counter() - t0
     print(f"Verification result: {ok}")
+    report_throughput(size, elapsed)
+
+
+def print_summary(action, stats):
+    print(
+        "%s %d files (%.2f MB) in %.3fs: %.1f files/s, %.2f MB/s, %d failed"
+        % (
+            action,
+            stats["ok"],
+            stats["bytes"] / 1e6,
+            stats["elapsed"],
+            stats["files_per_s"],
+            stats["mb_per_s"],
+            len(stats["failures"]),
+        )
+    )
+    for fail in stats["failures"]:
+        print(f"FAILED {fail['path']}: {fail['error']}")
+
+
+def sign_dir(args):
+    entries = collect_files(
+        args.dir,
+        args.manifest,
+        args.suffix,
+        exclude=[args.archive] if args.archive else (),
+    )
+    stats = sign_files(
+        load_key(args.skey),
+        entries,
+        jobs=args.jobs,
+        param_name=args.param,
+        archive=args.archive,
+        suffix=args.suffix,
+        buffer_size=args.buffer_size,
+    )
+    print_summary("Signed", stats)
+    return stats
+
+
+def verify_dir(args):
+    entries = collect_files(
+        args.dir,
+        args.manifest,
+        args.suffix,
+        exclude=[args.archive] if args.archive else (),
+    )
+    stats = verify_files(
+        load_key(args.pkey),
+        entries,
+        jobs=args.jobs,
+        param_name=args.param,
+        archive=args.archive,
+        suffix=args.suffix,
+        buffer_size=args.buffer_size,
+    )
+    print_summary("Verified", stats)
+    return stats
+
+
+def run_bench(args):
+    report = bench.run(
+        params=args.params,
+        only=args.only,
+        warmup=args.warmup,
+        repeat=args.repeat,
+    )
+    print(bench.format_report(report))
+    if args.json:
+        bench.save_report(args.json, report)
+        print(f"Results saved to {args.json}")
+    regressions = []
+    if args.baseline:
+        baseline = bench.load_report(args.baseline)
+        regressions = bench.compare(report, baseline, args.threshold)
+        if regressions:
+            print(bench.format_regressions(regressions))
+        else:
+            print(f"No regressions against {args.baseline}")
+    return regressions
+
+
+def add_bulk_options(parser):
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", help="directory tree of files")
+    src.add_argument(
+        "--manifest",
+        help="text file listing one file path per line, relative to it",
+    )
+    parser.add_argument(
+        "--archive",
+        help="tar archive holding the signatures instead of sidecar files",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (default: cpu count)",
+    )
+    parser.add_argument(
+        "--suffix",
+        default=SIG_SUFFIX,
+        help="signature file suffix (default: .sig)",
+    )
+    add_input_options(parser)
+
+
+def add_input_options(parser):
+    parser.add_argument(
+        "--buffer-size",
+        type=parse_size,
+        default=DEFAULT_CHUNK_SIZE,
+        help="read size for hashing message files, e.g. 4M (default 1M)",
+    )
+    parser.add_argument(
+        "--no-mmap",
+        action="store_true",
+        help="always use buffered reads, even for large files",
+    )
 
 
 def main():
@@ -112,10 +308,25 @@ def main():
         default="hawk-512",
         choices=["hawk-256", "hawk-512", "hawk-1024"],
     )
+    parser.add_argument(
+        "--log-level",
+        choices=["debug", "info", "warning", "error"],
+        help="emit hawk events to stderr as json lines at this level",
+    )
 
     sub = parser.add_subparsers(dest="command")
 
-    sub.add_parser("demo")
+    demo_parser = sub.add_parser("demo")
+    demo_parser.add_argument(
+        "--profile",
+        help="write per-stage times as collapsed stacks (flamegraph input)",
+    )
+    demo_parser.add_argument(
+        "--profile-metric",
+        choices=["wall", "cpu"],
+        default="wall",
+        help="time recorded in the profile (default wall)",
+    )
 
     gen_parser = sub.add_parser("gen-keys")
     gen_parser.add_argument(
@@ -132,6 +343,7 @@ def main():
     sign_parser.add_argument(
         "--sig", required=True, help="output path for signature"
     )
+    add_input_options(sign_parser)
 
     verify_parser = sub.add_parser("verify")
     verify_parser.add_argument(
@@ -143,8 +355,50 @@ def main():
     verify_parser.add_argument(
         "--sig", required=True, help="path to signature file"
     )
+    add_input_options(verify_parser)
+
+    sign_dir_parser = sub.add_parser("sign-dir")
+    sign_dir_parser.add_argument(
+        "--skey", required=True, help="path to private key"
+    )
+    add_bulk_options(sign_dir_parser)
+
+    verify_dir_parser = sub.add_parser("verify-dir")
+    verify_dir_parser.add_argument(
+        "--pkey", required=True, help="path to public key"
+    )
+    add_bulk_options(verify_dir_parser)
+
+    bench_parser = sub.add_parser("bench")
+    bench_parser.add_argument(
+        "--params",
+        nargs="+",
+        choices=["hawk-256", "hawk-512", "hawk-1024"],
+        help="parameter sets to run (default: all)",
+    )
+    bench_parser.add_argument(
+        "--only", help="regex selecting benchmarks by name, e.g. '^sign'"
+    )
+    bench_parser.add_argument(
+        "--warmup", type=int, default=3, help="untimed calls (default 3)"
+    )
+    bench_parser.add_argument(
+        "--repeat", type=int, default=30, help="timed trials (default 30)"
+    )
+    bench_parser.add_argument("--json", help="write results to this file")
+    bench_parser.add_argument(
+        "--baseline", help="results file to compare medians against"
+    )
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=bench.DEFAULT_THRESHOLD,
+        help="slowdown that counts as a regression (default 0.10)",
+    )
 
     args = parser.parse_args()
+    if args.log_level:
+        log.configure(args.log_level)
 
     if args.command == "demo":
         demo(args)
@@ -154,6 +408,15 @@ def main():
         sign_message(args)
     elif args.command == "verify":
         verify_message(args)
+    elif args.command == "sign-dir":
+        if sign_dir(args)["failures"]:
+            raise SystemExit(1)
+    elif args.command == "verify-dir":
+        if verify_dir(args)["failures"]:
+            raise SystemExit(1)
+    elif args.command == "bench":
+        if run_bench(args):
+            raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+small thread-safe lru cache used to keep parsed
+key objects and derived keypairs around between
+calls. entries may expire after ttl seconds and
+hits/misses are counted for monitoring
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def _check_limits(maxsize, ttl):
+    if maxsize <= 0:
+        raise ValueError("maxsize must be > 0")
+    if ttl is not None and ttl <= 0:
+        raise ValueError("ttl must be > 0")
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 128, ttl: float = None):
+        _check_limits(maxsize, ttl)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            expires = None if self.ttl is None else now + self.ttl
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        # factory runs outside the lock; a racing caller may build the
+        # same value twice, which is harmless for immutable key objects
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def resize(self, maxsize: int, ttl: float = None):
+        """set new limits, dropping every entry and the hit counts"""
+        _check_limits(maxsize, ttl)
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+            self.maxsize = maxsize
+            self.ttl = ttl
+
+
+_MISSING = object()
@@ -1,28 +1,70 @@
 """
 hawk key generation
 ntrusolve is not implemented here
+keys are deterministic in (seed, param), so derived
+keypairs are kept in a bounded lru cache
 """
 
 import hashlib
-from typing import List
-from hawk.utils.gr import CompressGR
-from hawk.utils.bitpack import bits_to_bytes
+from typing import List, NamedTuple, Tuple
+import numpy as np
+from hawk.core import log
+from hawk.core.cache import LRUCache
+from hawk.core.profile import stage
+from hawk.utils.gr import compress_gr_bytes
+from hawk.utils.bitpack import BitWriter
 from hawk.utils.samplers import regenerate_fg_bits
+from hawk.utils.poly import negacyclic_products
 from hawk.core.hawk import PARAMS
 
 
+class KeyPair(NamedTuple):
+    seed: int
+    param_name: str
+    pk: bytes
+    sk: bytes
+    kgseed: bytes
+    hpub: bytes
+    f: Tuple[int, ...]
+    g: Tuple[int, ...]
+    F: Tuple[int, ...]
+    G: Tuple[int, ...]
+    q00: Tuple[int, ...]
+    q01: Tuple[int, ...]
+
+
 class HawkKeyGen:
     def __init__(self, seed: int = 0, param_name="hawk-512"):
         self.param = PARAMS[param_name]
+        self.param_name = param_name
         self.seed = seed
         self.kgseedlen = self.param["kgseedlenbits"] // 8
 
     def generate(self):
-        kgseed = hashlib.shake_256(self.seed.to_bytes(8, "little")).digest(
-            self.kgseedlen
-        )
+        kp = self.keypair()
+        return kp.pk, kp.sk
+
+    def keypair(self) -> KeyPair:
+        with log.operation():
+            with stage("keygen"):
+                kp = self._keypair()
+            if log.enabled():
+                log.event(
+                    "keygen",
+                    param=self.param_name,
+                    pk_bytes=len(kp.pk),
+                    sk_bytes=len(kp.sk),
+                )
+            return kp
+
+    def _keypair(self) -> KeyPair:
+        with stage("kgseed"):
+            kgseed = hashlib.shake_256(
+                self.seed.to_bytes(8, "little")
+            ).digest(self.kgseedlen)
         n = self.param["n"]
-        f, g = regenerate_fg_bits(kgseed, n, eta=self.param["eta"])
+        with stage("regenerate_fg"):
+            f, g = regenerate_fg_bits(kgseed, n, eta=self.param["eta"])
 
         if self.seed == 0:
             f = [1] + [0] * (n - 1)
@@ -33,77 +75,85 @@ class HawkKeyGen:
             F = [0] * n
             G = [1] + [0] * (n - 1)
 
-        def negacyclic_mul(a: List[int], b: List[int]) -> List[int]:
-            nloc = len(a)
-            res = [0] * nloc
-            for i, ai in enumerate(a):
-                if ai == 0:
-                    continue
-                for j, bj in enumerate(b):
-                    if bj == 0:
-                        continue
-                    k = (i + j) % nloc
-                    res[k] += ai * bj
-            return res
-
-        q00 = [
-            x + y for x, y in zip(negacyclic_mul(f, f), negacyclic_mul(g, g))
-        ]
-        q01 = [
-            x + y for x, y in zip(negacyclic_mul(F, f), negacyclic_mul(G, g))
-        ]
-
-        pk_bits = self.encode_public(q00, q01)
-        pk_bytes = bits_to_bytes(pk_bits)
-
-        Fmod2 = [x & 1 for x in F]
-        Gmod2 = [x & 1 for x in G]
-        hpub = hashlib.shake_256(bytes(pk_bytes)).digest(
-            self.param["hpublenbits"] // 8
+        # q00 = f*f + g*g, q01 = F*f + G*g
+        with stage("negacyclic_products"):
+            q00, q01 = negacyclic_products(
+                [f, g, F, G], [[(0, 0), (1, 1)], [(2, 0), (3, 1)]]
+            )
+
+        with stage("encode_public"):
+            pk_bytes = self.encode_public(q00, q01)
+
+        with stage("hpub"):
+            hpub = hashlib.shake_256(bytes(pk_bytes)).digest(
+                self.param["hpublenbits"] // 8
+            )
+        with stage("encode_secret"):
+            priv = BitWriter()
+            priv.write_bytes_le(kgseed)
+            priv.write_bits([x & 1 for x in F])
+            priv.write_bits([x & 1 for x in G])
+            priv.write_bytes_le(hpub)
+            sk_bytes = priv.getvalue()
+        return KeyPair(
+            seed=self.seed,
+            param_name=self.param_name,
+            pk=pk_bytes,
+            sk=sk_bytes,
+            kgseed=kgseed,
+            hpub=hpub,
+            f=tuple(f),
+            g=tuple(g),
+            F=tuple(F),
+            G=tuple(G),
+            q00=tuple(q00),
+            q01=tuple(q01),
         )
-        priv_bits = []
-        for b in kgseed:
-            for i in range(8):
-                priv_bits.append((b >> i) & 1)
-        priv_bits.extend(Fmod2)
-        priv_bits.extend(Gmod2)
-        for b in hpub:
-            for i in range(8):
-                priv_bits.append((b >> i) & 1)
-        sk_bytes = bits_to_bytes(priv_bits)
-        return pk_bytes, sk_bytes
-
-    def encode_public(self, q00: List[int], q01: List[int]) -> List[int]:
+
+    def encode_public(self, q00: List[int], q01: List[int]) -> bytes:
         n = self.param["n"]
         low00 = self.param.get("lows00", 5)
         high00 = self.param.get("high00", 9)
         lows1 = self.param.get("lows1", 5)
         highs1 = self.param.get("highs1", 9)
 
-        def clamp_poly(poly: List[int], high: int) -> List[int]:
+        def clamp_poly(poly: List[int], high: int) -> np.ndarray:
             maxv = (1 << high) - 1
-            minv = -maxv
-            return [max(min(c, maxv), minv) for c in poly]
+            return np.clip(np.asarray(poly, dtype=np.int64), -maxv, maxv)
 
-        q00_half = q00[: n // 2]
-        q00_half = clamp_poly(q00_half, high00)
+        q00_half = clamp_poly(q00[: n // 2], high00)
         q01_clamped = clamp_poly(q01, highs1)
 
-        y00 = CompressGR(q00_half, low00, high00)
-        while len(y00) % 8 != 0:
-            y00.append(0)
-
-        y01 = CompressGR(q01_clamped, lows1, highs1)
-        y = y00 + y01
-
-        target = self.param["publenbits"]
-        if len(y) < target:
-            y.extend([0] * (target - len(y)))
-        elif len(y) > target:
-            y = y[:target]
-        if len(y) != target:
-            raise ValueError(
-                "internal error: public key encoding"
-                " produced unexpected length"
-            )
-        return y
+        # each compressed half starts on a byte boundary
+        y = BitWriter()
+        y.write_bytes(compress_gr_bytes(q00_half, low00, high00))
+        y.write_bytes(compress_gr_bytes(q01_clamped, lows1, highs1))
+        return y.getvalue(self.param["publenbits"])
+
+
+keypair_cache = LRUCache(maxsize=32)
+
+
+def configure_keypair_cache(maxsize: int = 32, ttl: float = None):
+    """resize the shared keypair cache; cached entries are dropped"""
+    keypair_cache.resize(maxsize, ttl)
+
+
+def derive_keypair(seed: int, param_name="hawk-512") -> KeyPair:
+    return HawkKeyGen(seed=seed, param_name=param_name).keypair()
+
+
+def cached_keypair(seed: int, param_name="hawk-512"):
+    """the cached KeyPair for (seed, param_name), or None"""
+    return keypair_cache.get((param_name, seed))
+
+
+def remember_keypair(kp: KeyPair):
+    keypair_cache.put((kp.param_name, kp.seed), kp)
+
+
+def get_keypair(seed: int, param_name="hawk-512") -> KeyPair:
+    """derive the keypair for (seed, param_name), reusing a cached one"""
+    return keypair_cache.get_or_create(
+        (param_name, seed), lambda: derive_keypair(seed, param_name)
+    )
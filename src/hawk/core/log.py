@@ -0,0 +1,153 @@
+"""
+structured, level-gated logging and trace ids for hawk
+events go to the "hawk" logger with their fields (and
+the current trace id) attached to the record as
+record.hawk; JsonFormatter renders them one json object
+per line. call sites guard with enabled() before
+building fields, so with the level off a hot path pays
+one cached level check and formats nothing.
+trace ids live in a contextvar. operation() gives a
+top-level call its own id unless one is bound already
+(the webui binds one per request), and is a shared
+no-op while debug logging is off
+"""
+
+import contextvars
+import json
+import logging
+import re
+import secrets
+import sys
+
+logger = logging.getLogger("hawk")
+_trace_id = contextvars.ContextVar("hawk_trace_id", default=None)
+_VALID_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def enabled(level: int = logging.DEBUG) -> bool:
+    return logger.isEnabledFor(level)
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(8)
+
+
+def valid_trace_id(value) -> bool:
+    """whether an id taken from outside (e.g. a header) is safe to log"""
+    return isinstance(value, str) and bool(_VALID_ID.match(value))
+
+
+def get_trace_id():
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id):
+    """bind trace_id in the current context, returns a reset token"""
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token):
+    _trace_id.reset(token)
+
+
+def call_with_trace(trace_id, fn, *args, **kwargs):
+    """run fn under trace_id; picklable, for worker processes"""
+    token = _trace_id.set(trace_id)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _trace_id.reset(token)
+
+
+def event(name: str, level: int = logging.DEBUG, **fields):
+    """log a structured event; a no-op unless level is enabled"""
+    if not logger.isEnabledFor(level):
+        return
+    fields["trace_id"] = _trace_id.get()
+    logger.log(level, name, extra={"hawk": fields})
+
+
+class _NoOperation:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_OPERATION = _NoOperation()
+
+
+class _Operation:
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        trace_id = _trace_id.get()
+        if trace_id is None:
+            trace_id = new_trace_id()
+            self._token = _trace_id.set(trace_id)
+        else:
+            self._token = None
+        return trace_id
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _trace_id.reset(self._token)
+        return False
+
+
+def operation():
+    """
+    context manager giving the block a trace id when none is bound;
+    a no-op (yielding None) while debug logging is off
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return _NO_OPERATION
+    return _Operation()
+
+
+class JsonFormatter(logging.Formatter):
+    """one json object per record: time, level, event, trace id, fields"""
+
+    def format(self, record):
+        out = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "hawk", None)
+        if fields:
+            out.update(fields)
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+def configure(level="INFO", stream=None, json_lines: bool = True):
+    """
+    send hawk events to stream (default stderr), as json lines or
+    plain "event key=value" text; replaces handlers set up here before
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError(f"unknown log level: {level}")
+    for handler in [h for h in logger.handlers if getattr(h, "_hawk", 0)]:
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler._hawk = True
+    handler.setFormatter(JsonFormatter() if json_lines else _TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, "hawk", None) or {}
+        pairs = " ".join(f"{k}={v}" for k, v in fields.items())
+        return f"{record.levelname.lower()} {record.getMessage()} {pairs}"
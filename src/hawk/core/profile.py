@@ -0,0 +1,175 @@
+"""
+opt-in per-stage profiling for keygen, sign and verify
+the core wraps each stage in `with stage(name):`. while
+no hook is registered that returns a shared no-op, so
+the cost is one call and a list check. registered hooks
+get a Span (stage path, wall and cpu seconds, with and
+without nested stages) as each stage closes. Profiler
+is a hook that collects spans and writes them as
+collapsed stacks for flamegraph.pl / speedscope.
+stage paths are tracked per thread and per task;
+hooks do not see stages run in worker processes
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, List, NamedTuple, Tuple
+
+
+class Span(NamedTuple):
+    path: Tuple[str, ...]
+    wall: float
+    cpu: float
+    self_wall: float
+    self_cpu: float
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+
+_hooks: List[Callable[[Span], None]] = []
+_hooks_lock = threading.Lock()
+_current = contextvars.ContextVar("hawk_profile_stage", default=None)
+
+
+def add_hook(hook: Callable[[Span], None]):
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[Span], None]):
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def enabled() -> bool:
+    return bool(_hooks)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    __slots__ = ("path", "child_wall", "child_cpu", "_t0", "_c0", "_token")
+
+    def __init__(self, name: str):
+        parent = _current.get()
+        self.path = (parent.path if parent else ()) + (name,)
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._c0 = time.thread_time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._t0
+        cpu = time.thread_time() - self._c0
+        _current.reset(self._token)
+        parent = _current.get()
+        if parent is not None:
+            parent.child_wall += wall
+            parent.child_cpu += cpu
+        span = Span(
+            self.path,
+            wall,
+            cpu,
+            max(wall - self.child_wall, 0.0),
+            max(cpu - self.child_cpu, 0.0),
+        )
+        for hook in tuple(_hooks):
+            hook(span)
+        return False
+
+
+def stage(name: str):
+    """context manager timing one named stage, a no-op without hooks"""
+    if not _hooks:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+class Profiler:
+    """
+    collects spans while active, e.g.
+        with Profiler() as prof:
+            key.sign(msg)
+        prof.write_collapsed("sign.folded")
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def __enter__(self):
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc):
+        remove_hook(self)
+        return False
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def totals(self) -> dict:
+        """per stage path: call count and summed wall/cpu seconds"""
+        out = defaultdict(
+            lambda: {
+                "count": 0,
+                "wall": 0.0,
+                "cpu": 0.0,
+                "self_wall": 0.0,
+                "self_cpu": 0.0,
+            }
+        )
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            t = out[";".join(span.path)]
+            t["count"] += 1
+            t["wall"] += span.wall
+            t["cpu"] += span.cpu
+            t["self_wall"] += span.self_wall
+            t["self_cpu"] += span.self_cpu
+        return dict(out)
+
+    def collapsed(self, metric: str = "wall") -> str:
+        """
+        one "outer;inner value" line per stage path, value being the
+        self time in microseconds; metric is "wall" or "cpu"
+        """
+        if metric not in ("wall", "cpu"):
+            raise ValueError(f"unknown metric: {metric}")
+        lines = []
+        for path, t in sorted(self.totals().items()):
+            value = round(t["self_" + metric] * 1e6)
+            if value > 0:
+                lines.append(f"{path} {value}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write_collapsed(self, path: str, metric: str = "wall"):
+        with open(path, "w") as f:
+            f.write(self.collapsed(metric))
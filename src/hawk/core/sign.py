@@ -1,87 +1,211 @@
 """
 signing module
+SigningKey parses kgseed, F mod 2, G mod 2 and hpub
+out of the secret-key encoding once; every sign()
+call afterwards only hashes and encodes.
+sign_batch spreads many messages for one key over
+a thread or process pool
 """
 
 import hashlib
-from hawk.utils.bitpack import bits_to_bytes
-from hawk.utils.gr import CompressGR
-from hawk.core.keygen import HawkKeyGen
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from hawk.utils.bitpack import BitReader, BitWriter
+from hawk.utils.gr import compress_gr_bytes, gr_tables
+from hawk.utils.hashpoint import derive_s1, hash_to_point
+from hawk.utils.msghash import hash_message
+from hawk.core import log
+from hawk.core.cache import LRUCache
+from hawk.core.profile import stage
 from hawk.core.hawk import PARAMS
 
 
-class HawkSign:
-    def __init__(
-        self, sk_bytes, message: bytes, seed=0, param_name="hawk-512"
-    ):
-        self.sk = sk_bytes
-        self.message = message
-        self.seed = seed
+class SigningKey:
+    def __init__(self, sk_bytes: bytes, param_name="hawk-512"):
+        self.param_name = param_name
         self.param = PARAMS[param_name]
+        self.sk = bytes(sk_bytes)
 
-    def sign(self):
-
-        kg = HawkKeyGen(
-            seed=self.seed,
-            param_name=(
-                self.param["name"] if "name" in self.param else "hawk-512"
-            ),
+        n = self.param["n"]
+        nbits = (
+            self.param["kgseedlenbits"] + 2 * n + self.param["hpublenbits"]
         )
-        pk, _ = kg.generate()
-
-        hpub = hashlib.shake_256(pk).digest(self.param["hpublenbits"] // 8)
-        M = hashlib.shake_256(self.message + hpub).digest(64)
-
+        if len(self.sk) != (nbits + 7) // 8:
+            raise ValueError(
+                f"invalid {param_name} secret key: expected"
+                f" {(nbits + 7) // 8} bytes, got {len(self.sk)}"
+            )
+        reader = BitReader(self.sk)
+        self.kgseed = reader.read_bytes_le(self.param["kgseedlenbits"] // 8)
+        self.Fmod2 = reader.read_bits(n)
+        self.Gmod2 = reader.read_bits(n)
+        self.hpub = reader.read_bytes_le(self.param["hpublenbits"] // 8)
+
+    def sign(self, message, seed: int = 0) -> bytes:
+        """message: bytes-like, binary file object or iterable of chunks"""
+        with log.operation(), stage("sign"):
+            with stage("hash_message"):
+                M = hash_message(message, self.hpub)
+            return self.sign_digest(M, seed)
+
+    def sign_digest(self, M: bytes, seed: int = 0) -> bytes:
+        """sign a precomputed M = SHAKE256(m || hpub)"""
+        with log.operation():
+            with stage("sign_digest"):
+                sig = self._sign_digest(M, seed)
+            if log.enabled():
+                log.event("sign", param=self.param_name, sig_bytes=len(sig))
+            return sig
+
+    def _sign_digest(self, M: bytes, seed: int) -> bytes:
         saltlen = self.param["saltlenbits"] // 8
-        salt = hashlib.shake_256(self.seed.to_bytes(8, "little")).digest(
-            saltlen
-        )
-
-        h = hashlib.shake_256(M + salt).digest(2 * self.param["n"] // 8)
-
-        h_bits = []
-        for b in h:
-            for i in range(8):
-                h_bits.append((b >> i) & 1)
+        with stage("salt"):
+            salt = hashlib.shake_256(seed.to_bytes(8, "little")).digest(
+                saltlen
+            )
 
-        h1 = h_bits[self.param["n"] : self.param["n"] * 2]
+        with stage("hash_to_point"):
+            h = hash_to_point(M, salt, self.param["n"])
+        with stage("derive_s1"):
+            s1 = derive_s1(h, self.param)
 
         low = self.param["lows1"]
         high = self.param["highs1"]
-        rng = high - low + 1
-
-        import math
-
-        bits_per = math.ceil(math.log2(rng))
-        s1 = []
+        bits_per = gr_tables(low, high).bits_per
+        with stage("compress_gr"):
+            comps = compress_gr_bytes(s1, low, high)
+        siglen = self.param["saltlenbits"] + len(s1) * bits_per
 
-        for i in range(self.param["n"]):
-            start = i * bits_per
-            chunk = h1[start : start + bits_per]
-            if len(chunk) < bits_per:
-                chunk += [0] * (bits_per - len(chunk))
-            val = 0
-            for j, b in enumerate(chunk):
-                val |= (b & 1) << j
-            s1.append(low + (val % rng))
-
-        comps = CompressGR(s1, low, high)
-        if comps is None:
-            raise RuntimeError("CompressGR failed")
-
-        salt_bits = []
-        for b in salt:
-            for i in range(8):
-                salt_bits.append((b >> i) & 1)
-
-        sig_bits = salt_bits + comps
-
-        if len(sig_bits) > self.param["siglenbits"]:
+        if siglen > self.param["siglenbits"]:
             raise RuntimeError(
                 "signature overflow: "
-                f"{len(sig_bits)} > {self.param['siglenbits']}"
+                f"{siglen} > {self.param['siglenbits']}"
+            )
+        with stage("encode_signature"):
+            sig = BitWriter()
+            sig.write_bytes_le(salt)
+            sig.write_bytes(comps)
+            return sig.getvalue(self.param["siglenbits"])
+
+
+_signing_keys = LRUCache(maxsize=64)
+
+
+def get_signing_key(sk_bytes: bytes, param_name="hawk-512") -> SigningKey:
+    """return a cached SigningKey, keyed by a digest of the secret key"""
+    key = (param_name, hashlib.sha256(sk_bytes).digest())
+    return _signing_keys.get_or_create(
+        key, lambda: SigningKey(sk_bytes, param_name)
+    )
+
+
+def signing_key_cache_stats() -> dict:
+    return _signing_keys.stats()
+
+
+def _sign_timed(key: SigningKey, message: bytes, seed: int):
+    t0 = time.perf_counter()
+    sig = key.sign(message, seed=seed)
+    return sig, time.perf_counter() - t0
+
+
+_worker_key = None
+
+
+def _init_worker(sk_bytes, param_name):
+    global _worker_key
+    _worker_key = SigningKey(sk_bytes, param_name)
+
+
+def _sign_chunk(messages, seed):
+    return [_sign_timed(_worker_key, m, seed) for m in messages]
+
+
+def sign_batch(
+    sk,
+    messages,
+    workers: int = None,
+    seed: int = 0,
+    param_name="hawk-512",
+    executor: str = "thread",
+    return_timings: bool = False,
+):
+    """
+    sign every message with one key, returning signatures in order
+    sk may be secret-key bytes or a SigningKey; executor is "thread"
+    (hashlib releases the gil on large inputs) or "process". with
+    return_timings a (signatures, seconds per item) pair is returned
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"unknown executor: {executor}")
+    key = (
+        sk if isinstance(sk, SigningKey) else get_signing_key(sk, param_name)
+    )
+    with log.operation():
+        out = _sign_batch(key, list(messages), workers, seed, executor)
+        if log.enabled():
+            log.event(
+                "sign_batch",
+                param=key.param_name,
+                items=len(out),
+                executor=executor,
             )
-        while len(sig_bits) < self.param["siglenbits"]:
-            sig_bits.append(0)
+    sigs = [sig for sig, _ in out]
+    if return_timings:
+        return sigs, [dt for _, dt in out]
+    return sigs
+
+
+def _sign_batch(key: SigningKey, messages, workers, seed, executor):
+    workers = workers or os.cpu_count() or 1
+
+    trace_id = log.get_trace_id()
+
+    if workers == 1 or len(messages) <= 1:
+        out = [_sign_timed(key, m, seed) for m in messages]
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            out = list(
+                pool.map(
+                    lambda m: log.call_with_trace(
+                        trace_id, _sign_timed, key, m, seed
+                    ),
+                    messages,
+                )
+            )
+    else:
+        size = max(1, -(-len(messages) // (4 * workers)))
+        chunks = [
+            messages[i : i + size] for i in range(0, len(messages), size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(key.sk, key.param_name),
+        ) as pool:
+            out = []
+            for part in pool.map(
+                log.call_with_trace,
+                [trace_id] * len(chunks),
+                [_sign_chunk] * len(chunks),
+                chunks,
+                [seed] * len(chunks),
+            ):
+                out.extend(part)
+    return out
+
 
-        sig_bytes = bits_to_bytes(sig_bits)
-        return sig_bytes
+class HawkSign:
+    def __init__(
+        self, sk_bytes, message: bytes, seed=0, param_name="hawk-512"
+    ):
+        self.sk = sk_bytes
+        self.message = message
+        self.seed = seed
+        self.param_name = param_name
+        self.param = PARAMS[param_name]
+
+    def sign(self):
+        key = SigningKey(self.sk, param_name=self.param_name)
+        return key.sign(self.message, seed=self.seed)
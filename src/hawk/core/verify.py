@@ -2,15 +2,197 @@
 verification module
 implements HawkVerify which decodes
 public key, signature and recomputes checks
+VerifyingKey holds the per-public-key state
+(hpub) so repeated verify() calls skip it;
+verify_batch fans (pk, msg, sig) triples out
+over a process pool
 ref: Algorithm 3
 """
 
 import hashlib
-from hawk.utils.bitpack import bytes_to_bits
-from hawk.utils.gr import DecompressGR
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from hawk.utils.bitpack import BitReader
+from hawk.utils.gr import decompress_gr_bytes
+from hawk.utils.hashpoint import derive_s1, hash_to_point
+from hawk.utils.msghash import hash_message
+from hawk.core import log
+from hawk.core.cache import LRUCache
+from hawk.core.profile import stage
 from hawk.core.hawk import PARAMS
 
 
+class VerifyingKey:
+    def __init__(self, pk_bytes: bytes, param_name="hawk-512"):
+        self.param_name = param_name
+        self.param = PARAMS[param_name]
+        self.pk = bytes(pk_bytes)
+        self.hpub = hashlib.shake_256(self.pk).digest(
+            self.param["hpublenbits"] // 8
+        )
+
+    def verify(self, msg, sig: bytes) -> bool:
+        """msg: bytes-like, binary file object or iterable of chunks"""
+        with log.operation():
+            if len(sig) * 8 != self.param["siglenbits"]:
+                # don't hash the message for a malformed signature
+                return self._rejected(sig, "length")
+            with stage("verify"):
+                with stage("hash_message"):
+                    M = hash_message(msg, self.hpub)
+                return self.verify_digest(M, sig)
+
+    def verify_digest(self, M: bytes, sig: bytes) -> bool:
+        """verify against a precomputed M = SHAKE256(m || hpub)"""
+        with log.operation():
+            if len(sig) * 8 != self.param["siglenbits"]:
+                return self._rejected(sig, "length")
+            with stage("verify_digest"):
+                reason = self._verify_digest(M, sig)
+            if log.enabled():
+                log.event(
+                    "verify",
+                    param=self.param_name,
+                    ok=reason is None,
+                    reason=reason,
+                )
+            return reason is None
+
+    def _rejected(self, sig: bytes, reason: str) -> bool:
+        if log.enabled():
+            log.event(
+                "verify",
+                param=self.param_name,
+                ok=False,
+                reason=reason,
+                sig_bits=len(sig) * 8,
+            )
+        return False
+
+    def _verify_digest(self, M: bytes, sig: bytes):
+        """None if the signature checks out, else why not"""
+        saltlen = self.param["saltlenbits"] // 8
+        with stage("decode_salt"):
+            salt_bytes_b = BitReader(sig).read_bytes_le(saltlen)
+
+        with stage("decompress_gr"):
+            r = decompress_gr_bytes(
+                sig[saltlen:],
+                self.param["n"],
+                self.param["lows1"],
+                self.param["highs1"],
+            )
+        if r is None:
+            return "encoding"
+        s1, _ = r
+
+        with stage("hash_to_point"):
+            h = hash_to_point(M, salt_bytes_b, self.param["n"])
+        with stage("derive_s1"):
+            expected = derive_s1(h, self.param)
+        return None if np.array_equal(s1, expected) else "mismatch"
+
+
+_verifying_keys = LRUCache(maxsize=128)
+
+
+def get_verifying_key(pk_bytes: bytes, param_name="hawk-512") -> VerifyingKey:
+    """return a cached VerifyingKey, keyed by a digest of the public key"""
+    key = (param_name, hashlib.sha256(pk_bytes).digest())
+    return _verifying_keys.get_or_create(
+        key, lambda: VerifyingKey(pk_bytes, param_name)
+    )
+
+
+def verifying_key_cache_stats() -> dict:
+    return _verifying_keys.stats()
+
+
+def verify_chunk(chunk, param_name="hawk-512", stop_on_failure=False):
+    """
+    verify a list of (pk, msg, sig) tuples in the calling process;
+    meant to run inside a worker, where get_verifying_key keeps the
+    per-pk state between chunks
+    """
+    results = []
+    for pk, msg, sig in chunk:
+        ok = get_verifying_key(pk, param_name).verify(msg, sig)
+        results.append(ok)
+        if stop_on_failure and not ok:
+            break
+    return results
+
+
+def verify_batch(
+    items,
+    workers: int = None,
+    param_name="hawk-512",
+    stop_on_failure: bool = False,
+    chunksize: int = None,
+):
+    """
+    verify an iterable of (pk, msg, sig) tuples
+    returns a list of bools in input order; with stop_on_failure
+    the batch stops at the first failed check and entries that
+    were never checked are left as None
+    """
+    with log.operation():
+        results = _verify_batch(
+            list(items), workers, param_name, stop_on_failure, chunksize
+        )
+        if log.enabled():
+            log.event(
+                "verify_batch",
+                param=param_name,
+                items=len(results),
+                failed=results.count(False),
+                unchecked=results.count(None),
+            )
+        return results
+
+
+def _verify_batch(items, workers, param_name, stop_on_failure, chunksize):
+    results = [None] * len(items)
+    if not items:
+        return results
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(items) // (4 * workers)))
+    starts = range(0, len(items), chunksize)
+
+    if workers == 1 or len(starts) == 1:
+        for start in starts:
+            chunk = items[start : start + chunksize]
+            out = verify_chunk(chunk, param_name, stop_on_failure)
+            results[start : start + len(out)] = out
+            if stop_on_failure and False in out:
+                break
+        return results
+
+    trace_id = log.get_trace_id()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                log.call_with_trace,
+                trace_id,
+                verify_chunk,
+                items[start : start + chunksize],
+                param_name,
+                stop_on_failure,
+            ): start
+            for start in starts
+        }
+        for fut in as_completed(futures):
+            start = futures[fut]
+            out = fut.result()
+            results[start : start + len(out)] = out
+            if stop_on_failure and False in out:
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    return results
+
+
 class HawkVerify:
     def __init__(
         self, pk_bytes, message: bytes, sig_bytes, param_name="hawk-512"
@@ -18,63 +200,9 @@ class HawkVerify:
         self.pk = pk_bytes
         self.msg = message
         self.sig = sig_bytes
+        self.param_name = param_name
         self.param = PARAMS[param_name]
 
     def verify(self):
-        bits = bytes_to_bits(self.sig)
-        print(len(bits))
-        if len(bits) != self.param["siglenbits"]:
-            return False
-        saltbits = bits[: self.param["saltlenbits"]]
-        compbits = bits[self.param["saltlenbits"] :]
-
-        r = DecompressGR(
-            compbits,
-            self.param["n"],
-            self.param["lows1"],
-            self.param["highs1"],
-        )
-        if r is None:
-            return False
-        s1, consumed = r
-
-        salt_bytes_b = bytes(
-            int("".join(str(b) for b in saltbits[i : i + 8][::-1]), 2)
-            for i in range(0, len(saltbits), 8)
-        )
-
-        hpub = hashlib.shake_256(self.pk).digest(
-            self.param["hpublenbits"] // 8
-        )
-        M = hashlib.shake_256(self.msg + hpub).digest(64)
-        h = hashlib.shake_256(M + salt_bytes_b).digest(
-            2 * self.param["n"] // 8
-        )
-
-        h_bits = []
-        for b in h:
-            for i in range(8):
-                h_bits.append((b >> i) & 1)
-        h1 = h_bits[self.param["n"] : self.param["n"] * 2]
-
-        low = self.param["lows1"]
-        high = self.param["highs1"]
-        rng = high - low + 1
-        import math
-
-        bits_per = math.ceil(math.log2(rng))
-
-        for i, sval in enumerate(s1):
-
-            start = i * bits_per
-            chunk = h1[start : start + bits_per]
-            if len(chunk) < bits_per:
-                chunk += [0] * (bits_per - len(chunk))
-            val = 0
-            for j, b in enumerate(chunk):
-                val |= (b & 1) << j
-            expected = low + (val % rng)
-            if sval != expected:
-                return False
-
-        return True
+        key = VerifyingKey(self.pk, param_name=self.param_name)
+        return key.verify(self.msg, self.sig)
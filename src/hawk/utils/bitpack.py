@@ -2,25 +2,148 @@
 bit-level helpers: bytes_to_bits, bits_to_bytes using
 little-endian bit order per spec bit-grouping
 implements EncodeInt/DecodeInt behaviour for bytes
+
+streams are msb-first: stream bit k is bit 7 - k % 8
+of byte k // 8. BitWriter/BitReader pack and unpack
+fields straight into that layout without building
+per-bit lists; the *_le methods emit a field least
+significant bit first, which is how keys and
+signatures lay out integers and byte strings
 """
 
+import numpy as np
+
+_REV8 = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def reverse_bits(value: int, width: int) -> int:
+    if width <= 8:
+        return _REV8[value & 0xFF] >> (8 - width)
+    nbytes = (width + 7) // 8
+    raw = value.to_bytes(nbytes, "little").translate(_REV8)
+    return int.from_bytes(raw, "big") >> (8 * nbytes - width)
+
 
 def bytes_to_bits(b: bytes):
-    bits = []
-    for byte in b:
-        for i in range(7, -1, -1):  # bit 7 → bit 0
-            bits.append((byte >> i) & 1)
-    return bits
+    return np.unpackbits(np.frombuffer(bytes(b), dtype=np.uint8)).tolist()
 
 
 def bits_to_bytes(bits):
-    if len(bits) % 8 != 0:
-        bits = bits + [0] * (8 - (len(bits) % 8))
-    out = bytearray()
-    for i in range(0, len(bits), 8):
-        chunk = bits[i : i + 8]
-        byte = 0
-        for j, bit in enumerate(chunk):  # j=0 is MSB
-            byte = (byte << 1) | (bit & 1)
-        out.append(byte)
-    return bytes(out)
+    # packbits pads the final partial byte with zero bits
+    arr = np.asarray(bits, dtype=np.uint8) & 1
+    return np.packbits(arr).tobytes()
+
+
+class BitWriter:
+    def __init__(self):
+        self._buf = bytearray()
+        self._acc = 0
+        self._nacc = 0
+
+    def __len__(self):
+        return 8 * len(self._buf) + self._nacc
+
+    def write(self, value: int, width: int):
+        """append the low `width` bits of value, msb first"""
+        if width <= 0:
+            return
+        self._acc = (self._acc << width) | (value & ((1 << width) - 1))
+        self._nacc += width
+        if self._nacc >= 8:
+            rem = self._nacc & 7
+            self._buf += (self._acc >> rem).to_bytes(self._nacc >> 3, "big")
+            self._acc &= (1 << rem) - 1
+            self._nacc = rem
+
+    def write_le(self, value: int, width: int):
+        """append the low `width` bits of value, lsb first"""
+        self.write(reverse_bits(value & ((1 << width) - 1), width), width)
+
+    def write_bytes(self, data: bytes):
+        if self._nacc == 0:
+            self._buf += data
+        else:
+            self.write(int.from_bytes(data, "big"), 8 * len(data))
+
+    def write_bytes_le(self, data: bytes):
+        self.write_bytes(bytes(data).translate(_REV8))
+
+    def write_bits(self, bits):
+        arr = np.asarray(bits, dtype=np.uint8) & 1
+        full = len(arr) & ~7
+        self.write_bytes(np.packbits(arr[:full]).tobytes())
+        for bit in arr[full:].tolist():
+            self.write(bit, 1)
+
+    def getvalue(self, nbits: int = None) -> bytes:
+        """
+        return the stream padded with zero bits to a byte boundary;
+        with nbits the stream is first zero-padded or truncated to
+        exactly nbits
+        """
+        out = bytearray(self._buf)
+        if self._nacc:
+            out.append((self._acc << (8 - self._nacc)) & 0xFF)
+        if nbits is None:
+            return bytes(out)
+        nbytes = (nbits + 7) // 8
+        if len(out) < nbytes:
+            out.extend(bytes(nbytes - len(out)))
+        del out[nbytes:]
+        if nbits & 7:
+            out[-1] &= (0xFF << (8 - (nbits & 7))) & 0xFF
+        return bytes(out)
+
+
+class BitReader:
+    def __init__(self, data: bytes, nbits: int = None):
+        self._data = bytes(data)
+        self._nbits = 8 * len(self._data) if nbits is None else nbits
+        self.pos = 0
+
+    def remaining(self) -> int:
+        return self._nbits - self.pos
+
+    def _need(self, width: int):
+        if width < 0 or self.pos + width > self._nbits:
+            raise ValueError("bit stream exhausted")
+
+    def skip(self, count: int):
+        self._need(count)
+        self.pos += count
+
+    def read(self, width: int) -> int:
+        """read `width` bits as an integer, msb first"""
+        self._need(width)
+        if width == 0:
+            return 0
+        start = self.pos >> 3
+        end = (self.pos + width + 7) >> 3
+        chunk = int.from_bytes(self._data[start:end], "big")
+        shift = 8 * end - self.pos - width
+        self.pos += width
+        return (chunk >> shift) & ((1 << width) - 1)
+
+    def read_le(self, width: int) -> int:
+        """read `width` bits as an integer, lsb first"""
+        return reverse_bits(self.read(width), width)
+
+    def read_bytes(self, nbytes: int) -> bytes:
+        self._need(8 * nbytes)
+        if self.pos & 7 == 0:
+            start = self.pos >> 3
+            self.pos += 8 * nbytes
+            return self._data[start : start + nbytes]
+        return self.read(8 * nbytes).to_bytes(nbytes, "big")
+
+    def read_bytes_le(self, nbytes: int) -> bytes:
+        return self.read_bytes(nbytes).translate(_REV8)
+
+    def read_bits(self, count: int):
+        self._need(count)
+        start = self.pos >> 3
+        end = (self.pos + count + 7) >> 3
+        raw = np.frombuffer(self._data[start:end], dtype=np.uint8)
+        off = self.pos & 7
+        self.pos += count
+        return np.unpackbits(raw)[off : off + count].tolist()
@@ -1,23 +1,137 @@
 """
-fft and invfft utilities.
-we implement float-based numpy fft
-spec prefers integer-friendly transforms
-(ntt) in optimized implementations
-implementing a correct integer negacyclic ntt
-requires careful modular arithmetic
-and choice of moduli. for prototype and
-testing we use numpy.fft with rounding
-to integers where needed and test invertibility
+ntt and invntt utilities.
+exact negacyclic number-theoretic transform
+over Z_q[x]/(x^n + 1) for power-of-two n and
+primes q = 1 mod 2n below 2^31, so that every
+product of two residues fits in int64.
+twiddle tables are precomputed once per (n, q);
+transforms run in place on int64 arrays of shape
+(..., n), so a stack of polynomials is
+transformed in a single call
 ref: section 2 (number fields & transforms)
 """
 
+from functools import lru_cache
+from typing import List, NamedTuple
 import numpy as np
 
 
-def FFT(poly):
-    return np.fft.fft(poly)
+class NTTTables(NamedTuple):
+    rev: np.ndarray
+    psi: np.ndarray
+    psi_inv: np.ndarray
+    fwd: List[np.ndarray]
+    inv: List[np.ndarray]
 
 
-def InvFFT(spectrum):
-    res = np.fft.ifft(spectrum)
-    return [int(round(x.real)) for x in res]
+def _prime_factors(m: int) -> List[int]:
+    factors = []
+    d = 2
+    while d * d <= m:
+        if m % d == 0:
+            factors.append(d)
+            while m % d == 0:
+                m //= d
+        d += 1
+    if m > 1:
+        factors.append(m)
+    return factors
+
+
+@lru_cache(maxsize=None)
+def _primitive_root(q: int) -> int:
+    factors = _prime_factors(q - 1)
+    g = 2
+    while any(pow(g, (q - 1) // f, q) == 1 for f in factors):
+        g += 1
+    return g
+
+
+def _powers(base: int, count: int, q: int) -> np.ndarray:
+    out = np.empty(count, dtype=np.int64)
+    acc = 1
+    for i in range(count):
+        out[i] = acc
+        acc = acc * base % q
+    return out
+
+
+@lru_cache(maxsize=None)
+def ntt_tables(n: int, q: int) -> NTTTables:
+    if n <= 0 or n & (n - 1):
+        raise ValueError("ntt length must be a power of two")
+    if q >= 1 << 31:
+        raise ValueError("ntt modulus must be below 2^31")
+    if (q - 1) % (2 * n):
+        raise ValueError(f"modulus {q} has no 2n-th root of unity")
+    psi = pow(_primitive_root(q), (q - 1) // (2 * n), q)
+    psi_inv = pow(psi, q - 2, q)
+    omega = psi * psi % q
+    omega_inv = psi_inv * psi_inv % q
+
+    logn = n.bit_length() - 1
+    rev = np.zeros(n, dtype=np.intp)
+    for i in range(1, n):
+        rev[i] = (rev[i >> 1] >> 1) | ((i & 1) << (logn - 1))
+
+    def stages(root):
+        tw = []
+        m = 1
+        while m < n:
+            tw.append(_powers(pow(root, n // (2 * m), q), m, q))
+            m *= 2
+        return tw
+
+    # fold the 1/n scaling of the inverse into the untwisting powers
+    return NTTTables(
+        rev=rev,
+        psi=_powers(psi, n, q),
+        psi_inv=_powers(psi_inv, n, q) * pow(n, q - 2, q) % q,
+        fwd=stages(omega),
+        inv=stages(omega_inv),
+    )
+
+
+def _check(a: np.ndarray):
+    if not isinstance(a, np.ndarray) or a.dtype != np.int64:
+        raise TypeError("ntt operates on numpy int64 arrays")
+    if not a.flags.c_contiguous or not a.flags.writeable:
+        raise ValueError("ntt needs a writeable c-contiguous array")
+
+
+def _butterflies(a: np.ndarray, q: int, rev, twiddles):
+    lead = a.shape[:-1]
+    n = a.shape[-1]
+    a[...] = a[..., rev]
+    m = 1
+    for w in twiddles:
+        blocks = a.reshape(lead + (n // (2 * m), 2, m))
+        u = blocks[..., 0, :].copy()
+        v = blocks[..., 1, :] * w
+        v %= q
+        np.add(u, v, out=blocks[..., 0, :])
+        np.subtract(u, v, out=blocks[..., 1, :])
+        blocks %= q
+        m *= 2
+
+
+def NTT(a: np.ndarray, q: int) -> np.ndarray:
+    """forward negacyclic ntt of every row of a, in place"""
+    _check(a)
+    t = ntt_tables(a.shape[-1], q)
+    a %= q
+    a *= t.psi
+    a %= q
+    _butterflies(a, q, t.rev, t.fwd)
+    return a
+
+
+def InvNTT(a: np.ndarray, q: int) -> np.ndarray:
+    """inverse of NTT, in place; output coefficients lie in [0, q)"""
+    _check(a)
+    t = ntt_tables(a.shape[-1], q)
+    a %= q
+    _butterflies(a, q, t.rev, t.inv)
+    a *= t.psi_inv
+    a %= q
+    return a
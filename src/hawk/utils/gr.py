@@ -1,47 +1,89 @@
 """
-implements CompressGR and DecompressGR as
-pure bit-list functions
+implements CompressGR and DecompressGR
+every coefficient is stored as a fixed-width code
+abs(v - low), least significant bit first, packed
+msb-first into bytes like the rest of the encodings.
+per-(low, high) tables are built once and whole
+coefficient vectors are coded with numpy; the
+*_bytes variants read and write byte buffers
+directly, CompressGR/DecompressGR keep the older
+bit-list interface
 ref: Algorithm 6 and 7
 """
 
-import math
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
 
 
-def _bits_of_int_le(value, bitlen):
-    return [(value >> i) & 1 for i in range(bitlen)]
+class GRTables(NamedTuple):
+    bits_per: int
+    rng: int
+    mask: int
+    patterns: np.ndarray
+    weights: np.ndarray
 
 
-def _int_from_bits_le(bits):
-    v = 0
-    for i, b in enumerate(bits):
-        v |= (b & 1) << i
-    return v
+@lru_cache(maxsize=None)
+def gr_tables(low: int, high: int) -> GRTables:
+    rng = high - low + 1
+    if rng <= 0:
+        raise ValueError("invalid low/high")
+    bits_per = (rng - 1).bit_length()
+    shifts = np.arange(bits_per, dtype=np.int64)
+    codes = np.arange(1 << bits_per, dtype=np.int64)
+    # patterns[c] is the bit sequence of code c as it appears in the stream
+    patterns = ((codes[:, None] >> shifts) & 1).astype(np.uint8)
+    return GRTables(
+        bits_per=bits_per,
+        rng=rng,
+        mask=(1 << bits_per) - 1,
+        patterns=patterns,
+        weights=np.int64(1) << shifts,
+    )
 
 
-def CompressGR(svec, low, high):
+def _code_bits(svec, low: int, high: int) -> np.ndarray:
+    t = gr_tables(low, high)
+    codes = np.abs(np.asarray(svec, dtype=np.int64) - low) & t.mask
+    return t.patterns[codes].ravel()
+
+
+def compress_gr_bytes(svec, low: int, high: int) -> bytes:
+    """pack svec into len(svec) * bits_per bits, zero-padded to a byte"""
+    return np.packbits(_code_bits(svec, low, high)).tobytes()
+
+
+def decompress_gr_bytes(data: bytes, k: int, low: int, high: int):
+    """
+    decode k coefficients from the start of data
+    returns (int64 array, consumed bits) or None
+    if the buffer is too short
+    """
     rng = high - low + 1
     if rng <= 0:
-        raise ValueError("invalid low/high")
-    bits_per = math.ceil(math.log2(rng))
-    out_bits = []
-    for v in svec:
-        code = abs(v - low)
-        out_bits.extend(_bits_of_int_le(code, bits_per))
-    return out_bits
+        return None
+    t = gr_tables(low, high)
+    needed = k * t.bits_per
+    if len(data) * 8 < needed:
+        return None
+    raw = np.frombuffer(data, dtype=np.uint8, count=(needed + 7) // 8)
+    bits = np.unpackbits(raw)[:needed].reshape(k, t.bits_per)
+    return bits @ t.weights + low, needed
+
+
+def CompressGR(svec, low, high):
+    return _code_bits(svec, low, high).tolist()
 
 
 def DecompressGR(bits, k, low, high):
     rng = high - low + 1
     if rng <= 0:
         return None
-    bits_per = math.ceil(math.log2(rng))
-    needed = k * bits_per
+    t = gr_tables(low, high)
+    needed = k * t.bits_per
     if len(bits) < needed:
         return None
-    svec = []
-    for i in range(k):
-        chunk = bits[i * bits_per : (i + 1) * bits_per]
-        code = _int_from_bits_le(chunk)
-        v = code + low
-        svec.append(v)
-    return (svec, needed)
+    chunks = np.asarray(bits[:needed], dtype=np.int64) & 1
+    svec = chunks.reshape(k, t.bits_per) @ t.weights + low
+    return (svec.tolist(), needed)
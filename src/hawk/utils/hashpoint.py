@@ -0,0 +1,37 @@
+"""
+hash-to-s1 derivation shared by sign and verify
+h = SHAKE256(M || salt) has 2n bits; h1 is bits
+[n, 2n) read lsb-first within each byte. s1[i] takes
+the next bits_per bits of h1 (lsb first, zero past
+the end of h1) as val and is low + val % rng
+"""
+
+import hashlib
+from functools import lru_cache
+import numpy as np
+from hawk.utils.gr import gr_tables
+
+
+def hash_to_point(M: bytes, salt: bytes, n: int) -> bytes:
+    return hashlib.shake_256(M + salt).digest(2 * n // 8)
+
+
+def h1_bits(h: bytes, n: int) -> np.ndarray:
+    """the n bits of h1 as a uint8 array"""
+    raw = np.frombuffer(h, dtype=np.uint8, count=2 * n // 8)
+    return np.unpackbits(raw, bitorder="little")[n : 2 * n]
+
+
+@lru_cache(maxsize=None)
+def _s1_layout(n: int, low: int, high: int):
+    t = gr_tables(low, high)
+    return t.bits_per, t.rng, t.weights
+
+
+def derive_s1(h: bytes, param: dict) -> np.ndarray:
+    """the s1 vector (int64, length n) implied by h"""
+    n, low = param["n"], param["lows1"]
+    bits_per, rng, weights = _s1_layout(n, low, param["highs1"])
+    chunks = np.zeros(n * bits_per, dtype=np.int64)
+    chunks[:n] = h1_bits(h, n)
+    return chunks.reshape(n, bits_per) @ weights % rng + low
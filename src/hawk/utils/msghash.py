@@ -0,0 +1,70 @@
+"""
+message hashing M = SHAKE256(m || hpub)
+m may be any bytes-like object (including an mmap),
+a binary file object or an iterable of byte chunks.
+file objects and iterables are fed to shake_256 one
+chunk at a time and hpub is absorbed last, so the
+whole message never has to be held in memory
+"""
+
+import hashlib
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def iter_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    if isinstance(source, str):
+        raise TypeError("message must be bytes, not str")
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    try:
+        view = memoryview(source)
+    except TypeError:
+        view = None
+    if view is not None:
+        # bytes, bytearray and mmap are hashed straight from their buffer
+        yield view
+        return
+    if hasattr(source, "readinto"):
+        buf = bytearray(chunk_size)
+        mv = memoryview(buf)
+        while True:
+            n = source.readinto(buf)
+            if not n:
+                return
+            yield mv[:n]
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+class MessageHasher:
+    """push-style form of hash_message for chunks arriving over time"""
+
+    def __init__(self):
+        self._h = hashlib.shake_256()
+        self.size = 0
+
+    def update(self, chunk):
+        self._h.update(chunk)
+        self.size += len(chunk)
+
+    def digest(self, hpub: bytes) -> bytes:
+        h = self._h.copy()
+        h.update(hpub)
+        return h.digest(64)
+
+
+def hash_message(
+    source, hpub: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> bytes:
+    hasher = MessageHasher()
+    for chunk in iter_chunks(source, chunk_size):
+        hasher.update(chunk)
+    return hasher.digest(hpub)
@@ -0,0 +1,190 @@
+"""
+polynomial arithmetic in Z[x]/(x^n + 1)
+exact negacyclic products: for power-of-two n
+above a small threshold we use a negacyclic ntt
+over a few word-sized primes and recombine the
+residues with crt; small or odd-sized inputs go
+through numpy-vectorized karatsuba instead.
+the transforms themselves live in hawk.utils.fft
+ref: section 2 (number fields & transforms)
+"""
+
+from typing import List, Sequence, Tuple
+import numpy as np
+from hawk.utils.fft import NTT, InvNTT
+
+# primes p = k * 2^e + 1 below 2^31, so every product of two
+# residues fits in int64 and 2n | p - 1 for n up to 2^22
+NTT_PRIMES = (
+    2013265921,
+    1811939329,
+    469762049,
+    754974721,
+    167772161,
+    998244353,
+)
+
+KARATSUBA_THRESHOLD = 64
+_CONVOLVE_CUTOFF = 16
+
+
+def negacyclic_mul_schoolbook(
+    a: Sequence[int], b: Sequence[int]
+) -> List[int]:
+    """reference O(n^2) product, kept for tests and benchmarks"""
+    n = len(a)
+    res = [0] * n
+    for i, ai in enumerate(a):
+        if ai == 0:
+            continue
+        for j, bj in enumerate(b):
+            if bj == 0:
+                continue
+            k = i + j
+            if k < n:
+                res[k] += ai * bj
+            else:
+                res[k - n] -= ai * bj
+    return res
+
+
+def negacyclic_mul(a: Sequence[int], b: Sequence[int]) -> List[int]:
+    return negacyclic_products([a, b], [[(0, 1)]])[0]
+
+
+def negacyclic_products(
+    polys: Sequence[Sequence[int]],
+    terms: Sequence[Sequence[Tuple[int, int]]],
+) -> List[List[int]]:
+    """
+    evaluate sums of products of polys in Z[x]/(x^n + 1)
+    each term is a list of index pairs (i, j) and yields
+    sum(polys[i] * polys[j]); on the ntt path every input
+    polynomial is transformed once, in one batched call
+    """
+    if not polys:
+        return [[] for _ in terms]
+    n = len(polys[0])
+    if any(len(poly) != n for poly in polys):
+        raise ValueError("polynomials must have the same length")
+    if n == 0:
+        return [[] for _ in terms]
+    mags = [_max_abs(poly) for poly in polys]
+    bound = max(
+        (sum(n * mags[i] * mags[j] for i, j in pairs) for pairs in terms),
+        default=0,
+    )
+    if n > KARATSUBA_THRESHOLD and not n & (n - 1):
+        primes, modulus = _pick_primes(n, bound)
+        if primes:
+            return _ntt_products(polys, terms, primes, modulus)
+    out = []
+    for pairs in terms:
+        acc = [0] * n
+        for i, j in pairs:
+            prod = _karatsuba_negacyclic(polys[i], polys[j], bound)
+            acc = [x + y for x, y in zip(acc, prod)]
+        out.append(acc)
+    return out
+
+
+def _max_abs(poly: Sequence[int]) -> int:
+    return max(abs(int(c)) for c in poly)
+
+
+def _as_array(poly: Sequence[int], bound: int) -> np.ndarray:
+    dtype = np.int64 if bound < (1 << 62) else object
+    return np.array([int(c) for c in poly], dtype=dtype)
+
+
+# --- karatsuba ---------------------------------------------------------
+
+
+def _karatsuba(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    n = len(a)
+    if n <= _CONVOLVE_CUTOFF:
+        return np.convolve(a, b)
+    m = n // 2
+    a0, a1 = a[:m], a[m:]
+    b0, b1 = b[:m], b[m:]
+    z0 = _karatsuba(a0, b0)
+    z2 = _karatsuba(a1, b1)
+    # pad the low halves so both operands of the middle term line up
+    pad = np.zeros(n - 2 * m, dtype=a.dtype)
+    z1 = _karatsuba(
+        np.concatenate((a0, pad)) + a1, np.concatenate((b0, pad)) + b1
+    )
+    z1[: len(z0)] -= z0
+    z1[: len(z2)] -= z2
+    res = np.zeros(2 * n - 1, dtype=a.dtype)
+    res[: len(z0)] += z0
+    res[m : m + len(z1)] += z1
+    res[2 * m : 2 * m + len(z2)] += z2
+    return res
+
+
+def _karatsuba_negacyclic(a, b, bound: int) -> List[int]:
+    n = len(a)
+    # the middle karatsuba term sums two halves of each operand
+    full = _karatsuba(_as_array(a, 4 * bound), _as_array(b, 4 * bound))
+    res = full[:n].copy()
+    res[: n - 1] -= full[n:]
+    return [int(c) for c in res]
+
+
+# --- ntt + crt ---------------------------------------------------------
+
+
+def _pick_primes(n: int, bound: int):
+    primes = []
+    modulus = 1
+    for p in NTT_PRIMES:
+        if primes and modulus > 2 * bound:
+            break
+        if (p - 1) % (2 * n) == 0:
+            primes.append(p)
+            modulus *= p
+    if modulus <= 2 * bound:
+        return None, modulus
+    return primes, modulus
+
+
+def _residues(polys: Sequence[Sequence[int]], p: int) -> np.ndarray:
+    try:
+        return np.array(polys, dtype=np.int64) % p
+    except OverflowError:
+        return np.array(
+            [[int(c) % p for c in poly] for poly in polys], dtype=np.int64
+        )
+
+
+def _ntt_products(polys, terms, primes, modulus) -> List[List[int]]:
+    n = len(polys[0])
+    residues = []
+    for p in primes:
+        spec = NTT(_residues(polys, p), p)
+        acc = np.zeros((len(terms), n), dtype=np.int64)
+        for t, pairs in enumerate(terms):
+            for i, j in pairs:
+                acc[t] += spec[i] * spec[j] % p
+                acc[t] %= p
+        residues.append(InvNTT(acc, p))
+    return _crt(residues, primes, modulus)
+
+
+def _crt(residues, primes, modulus) -> List[List[int]]:
+    # garner's mixed-radix recombination, then centre into (-M/2, M/2]
+    if len(primes) == 1:
+        r = residues[0]
+        return np.where(r > modulus // 2, r - modulus, r).tolist()
+    x = residues[0].astype(object)
+    partial = primes[0]
+    for r, p in zip(residues[1:], primes[1:]):
+        x_mod = (x % p).astype(np.int64)
+        t = (r - x_mod) % p * pow(partial % p, p - 2, p) % p
+        x = x + t.astype(object) * partial
+        partial *= p
+    half = modulus // 2
+    return [
+        [int(v) - modulus if v > half else int(v) for v in row] for row in x
+    ]
@@ -3,52 +3,67 @@ samplers: regenerate_fg_bits (shaake256x4 emulation)
 and simple samplers
 implements Regeneratefg deterministically
 using SHAKE256 with interleaving, similar
-to SHAKE256x4
+to SHAKE256x4; coefficients are summed from
+the unpacked bit stream with numpy
 also provides a discrete_gaussian_sampler
 (toy rejection sampler) and
-centred_binomial_from_bits helper
+centred_binomial_from_bits helper, plus
+*_batch variants returning whole (batch, n)
+arrays at once
 ref: Algorithm 12
 """
 
 import hashlib
-from typing import List
 import math
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+
+_lane_pool = None
+_lane_pool_lock = threading.Lock()
+
 
+def _lanes_executor() -> ThreadPoolExecutor:
+    global _lane_pool
+    with _lane_pool_lock:
+        if _lane_pool is None:
+            _lane_pool = ThreadPoolExecutor(4, thread_name_prefix="shake-x4")
+        return _lane_pool
 
-def shake256x4(seed: bytes, out_bytes: int) -> bytes:
-    res = bytearray()
+
+def shake256x4(seed: bytes, out_bytes: int, threads: bool = False) -> bytes:
+    """
+    four SHAKE256 lanes over seed || j, concatenated.
+    the seed is absorbed once and the sponge copied per lane;
+    with threads=True the lanes are squeezed concurrently,
+    which pays off for long outputs since hashlib drops the GIL
+    """
     per = (out_bytes + 3) // 4
+    base = hashlib.shake_256(seed)
+    lanes = []
     for j in range(4):
-        h = hashlib.shake_256(seed + bytes([j]))
-        res_j = h.digest(per)
-        res.extend(res_j)
-    return bytes(res[:out_bytes])
+        h = base.copy()
+        h.update(bytes([j]))
+        lanes.append(h)
+    if threads:
+        out = list(_lanes_executor().map(lambda h: h.digest(per), lanes))
+    else:
+        out = [h.digest(per) for h in lanes]
+    return b"".join(out)[:out_bytes]
 
 
-def regenerate_fg_bits(kgseed: bytes, n: int, eta: int = 4):
+def regenerate_fg_bits(kgseed: bytes, n: int, eta: int = 4, threads=False):
     b = n // 64
     out_bits = 2 * b * n
     out_bytes = (out_bits + 7) // 8
-    y = shake256x4(kgseed, out_bytes)
-    bits = []
-    for byte in y:
-        for i in range(8):
-            bits.append((byte >> i) & 1)
-    bits = bits[: 2 * b * n]
-    f = []
-    g = []
-    for i in range(n):
-        s = 0
-        for j in range(b):
-            s += bits[i * b + j]
-        f.append(s - b // 2)
-    for i in range(n):
-        s = 0
-        for j in range(b):
-            s += bits[(i + n) * b + j]
-        g.append(s - b // 2)
-    return f, g
+    y = shake256x4(kgseed, out_bytes, threads=threads)
+    # bits are taken lsb-first from each byte, b bits per coefficient
+    bits = np.unpackbits(np.frombuffer(y, dtype=np.uint8), bitorder="little")
+    coeffs = bits[:out_bits].reshape(2 * n, b).sum(axis=1, dtype=np.int64)
+    coeffs -= b // 2
+    return coeffs[:n].tolist(), coeffs[n:].tolist()
 
 
 def discrete_gaussian_sampler(
@@ -69,23 +84,55 @@ def discrete_gaussian_sampler(
     return samples
 
 
+def discrete_gaussian_batch(size, sigma: float, seed=0) -> np.ndarray:
+    """
+    array form of discrete_gaussian_sampler: Box-Muller over a numpy
+    Generator, rounded half-to-even like round(). size may be k or
+    (batch, n); seed may also be a np.random.Generator. the stream
+    differs from the random.Random based sampler
+    """
+    if isinstance(seed, np.random.Generator):
+        rng = seed
+    else:
+        rng = np.random.default_rng(seed)
+    u1 = np.maximum(rng.random(size), 1e-12)
+    u2 = rng.random(size)
+    z = np.sqrt(-2.0 * np.log(u1)) * np.cos(2 * np.pi * u2)
+    return np.rint(z * sigma).astype(np.int64)
+
+
 def centred_binomial_from_bits(
     bits: List[int], n: int, eta: int
 ) -> List[int]:
+    return centred_binomial_batch(bits, n, eta).tolist()
+
+
+def _shape(size):
+    return tuple(int(d) for d in np.atleast_1d(size))
+
+
+def centred_binomial_batch(bits, size, eta: int) -> np.ndarray:
+    """
+    coefficient i is sum(next eta bits) - sum(following eta bits);
+    size is n or (batch, n), consuming 2 * eta bits per coefficient
+    """
     if eta <= 0:
         raise ValueError("eta must be > 0")
-    need = 2 * eta * n
+    shape = _shape(size)
+    need = 2 * eta * math.prod(shape)
+    bits = np.asarray(bits, dtype=np.int64).ravel()
     if len(bits) < need:
         raise ValueError(f"not enough bits: need {need}, got {len(bits)}")
-    out = []
-    pos = 0
-    for i in range(n):
-        a = 0
-        b = 0
-        for j in range(eta):
-            a += bits[pos + j]
-        for j in range(eta):
-            b += bits[pos + eta + j]
-        out.append(a - b)
-        pos += 2 * eta
-    return out
+    halves = bits[:need].reshape(*shape, 2, eta).sum(axis=-1)
+    return halves[..., 0] - halves[..., 1]
+
+
+def centred_binomial_shake(seed: bytes, size, eta: int) -> np.ndarray:
+    """centred_binomial_batch over SHAKE256(seed), bits lsb-first"""
+    shape = _shape(size)
+    need = 2 * eta * math.prod(shape)
+    stream = hashlib.shake_256(seed).digest((need + 7) // 8)
+    bits = np.unpackbits(
+        np.frombuffer(stream, dtype=np.uint8), bitorder="little"
+    )
+    return centred_binomial_batch(bits, shape, eta)
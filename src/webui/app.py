@@ -2,27 +2,170 @@
 
 """
 web ui wrapper
+crypto runs on the executor backend (see executor.py),
+never on the event loop. /metrics serves prometheus
+text-format telemetry (see metrics.py)
 """
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+import asyncio
 import hashlib
-from typing import List
-from hawk.core.keygen import HawkKeyGen
-from hawk.core.sign import HawkSign
-from hawk.core.verify import HawkVerify
+import json
+import os
+from hawk.core import log, profile
+from hawk.core.keygen import (
+    cached_keypair,
+    configure_keypair_cache,
+    KeyPair,
+    derive_keypair,
+    keypair_cache,
+    remember_keypair,
+)
+from hawk.core.sign import get_signing_key, signing_key_cache_stats
+from hawk.core.verify import get_verifying_key, verifying_key_cache_stats
 from hawk.core.hawk import PARAMS
 from hawk.utils.samplers import regenerate_fg_bits
-from hawk.utils.gr import CompressGR, DecompressGR
-from hawk.utils.bitpack import bits_to_bytes, bytes_to_bits
-
-app = FastAPI(title="HAWK PQC API")
+from hawk.utils.gr import decompress_gr_bytes, gr_tables
+from hawk.utils.bitpack import BitReader
+from hawk.utils.hashpoint import derive_s1, h1_bits, hash_to_point
+from hawk.utils.msghash import MessageHasher
+from webui.batch import verify_items, verify_lines
+from webui.executor import CryptoExecutor, ExecutorBusy
+from webui.frames import FrameError, FrameReader, encode_frames, iter_lines
+from webui import metrics
+from webui.static import StaticPage
+from webui.traces import TraceStore
+
+SUPPORTED_PARAMS = ["hawk-512"]
+OCTET_STREAM = "application/octet-stream"
+NDJSON = "application/x-ndjson"
+BATCH_CHUNK = 64
+BATCH_MAX_ITEM = 4 << 20
+BATCH_MAX_BODY = 256 << 20
+BATCH_MAX_JOBS = 100_000
+
+if os.environ.get("HAWK_LOG_LEVEL"):
+    log.configure(
+        os.environ["HAWK_LOG_LEVEL"],
+        json_lines=os.environ.get("HAWK_LOG_FORMAT", "json") == "json",
+    )
+
+backend = CryptoExecutor.from_env()
+configure_keypair_cache(
+    maxsize=int(os.environ.get("HAWK_KEYPAIR_CACHE_SIZE") or 32),
+    ttl=float(os.environ.get("HAWK_KEYPAIR_CACHE_TTL") or 0) or None,
+)
+
+index_page = StaticPage("index.html")
+traces = TraceStore(
+    maxsize=int(os.environ.get("HAWK_TRACE_CACHE_SIZE") or 256),
+    ttl=float(os.environ.get("HAWK_TRACE_TTL") or 300),
+)
+
+
+registry = metrics.Registry()
+http_metrics = metrics.HTTPMetrics(registry)
+job_latency = registry.histogram(
+    "hawk_executor_job_duration_seconds",
+    "executor job time by job and pool, queue wait included",
+    ("job", "pool"),
+)
+stage_latency = registry.histogram(
+    "hawk_stage_duration_seconds",
+    "keygen/sign/verify stage wall time (HAWK_METRICS_STAGES=1)",
+    ("stage",),
+)
+registry.gauge(
+    "hawk_executor_pending", "jobs queued or running", lambda: backend.pending
+)
+registry.gauge(
+    "hawk_executor_max_pending",
+    "jobs in flight before requests get a 503",
+    lambda: backend.max_pending,
+)
+
+CACHES = {
+    "keypair": keypair_cache.stats,
+    "signing_key": signing_key_cache_stats,
+    "verifying_key": verifying_key_cache_stats,
+    "trace": traces.stats,
+}
+
+
+def _cache_stat(field):
+    def read():
+        return {(name,): stats()[field] for name, stats in CACHES.items()}
+
+    return read
+
+
+def _cache_hit_ratio():
+    out = {}
+    for name, stats in CACHES.items():
+        s = stats()
+        lookups = s["hits"] + s["misses"]
+        out[(name,)] = s["hits"] / lookups if lookups else None
+    return out
+
+
+registry.callback_counter(
+    "hawk_cache_hits_total", "cache hits", _cache_stat("hits"), ("cache",)
+)
+registry.callback_counter(
+    "hawk_cache_misses_total",
+    "cache misses",
+    _cache_stat("misses"),
+    ("cache",),
+)
+registry.gauge(
+    "hawk_cache_entries", "cached entries", _cache_stat("size"), ("cache",)
+)
+registry.gauge(
+    "hawk_cache_hit_ratio",
+    "hits / lookups since start (or last clear)",
+    _cache_hit_ratio,
+    ("cache",),
+)
+
+
+def _observe_job(name: str, pool: str, seconds: float):
+    job_latency.observe(seconds, job=name, pool=pool)
+
+
+def _observe_stage(span):
+    stage_latency.observe(span.wall, stage=";".join(span.path))
+
+
+backend.on_job = _observe_job
+# stage spans cost a few microseconds each, so they are opt-in; only
+# work on the thread pool is seen, not jobs in worker processes
+if os.environ.get("HAWK_METRICS_STAGES", "").lower() in ("1", "true", "yes"):
+    profile.add_hook(_observe_stage)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    index_page.variants()
+    yield
+    backend.shutdown(wait=False)
+
+
+app = FastAPI(title="HAWK PQC API", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware, metrics=http_metrics)
+app.add_middleware(metrics.TraceIdMiddleware)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    with open("src/webui/index.html", "r") as f:
-        return f.read()
+async def root(request: Request):
+    return index_page.response(request.headers)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 def truncate_list(lst, max_len=20):
@@ -31,239 +174,388 @@ def truncate_list(lst, max_len=20):
     return lst[: max_len // 2] + ["..."] + lst[-max_len // 2 :]
 
 
+def _keygen_steps(kp: KeyPair):
+    """yield the steps deriving an already computed keypair"""
+    seed = kp.seed
+    params = PARAMS[kp.param_name]
+    n = params["n"]
+    eta = params["eta"]
+
+    kgseed = kp.kgseed
+    yield (
+        {
+            "step": 1,
+            "name": "Generate KG Seed",
+            "code": "kgseed ← SHAKE256(seed)",
+            "variables": {
+                "seed": seed,
+                "kgseedlen_bits": params["kgseedlenbits"],
+                "kgseed_hex": kgseed.hex(),
+                "kgseed_first_bytes": list(kgseed[:16]),
+            },
+        }
+    )
+
+    f, g = regenerate_fg_bits(kgseed, n, eta=eta)
+    yield (
+        {
+            "step": 2,
+            "name": "Sample f, g ∈ Rn from Bin(η)",
+            "code": "f, g ← regenerate_fg_bits(kgseed, n={}, η={})".format(
+                n, eta
+            ),
+            "variables": {
+                "n": n,
+                "eta": eta,
+                "f_length": len(f),
+                "g_length": len(g),
+                "f_first_20": truncate_list(f, 20),
+                "g_first_20": truncate_list(g, 20),
+                "f_nonzero_count": sum(1 for x in f if x != 0),
+                "g_nonzero_count": sum(1 for x in g if x != 0),
+            },
+        }
+    )
+
+    yield (
+        {
+            "step": 3,
+            "name": "Check f-g conditions",
+            "code": "if f-g-conditions(f, g) == false: restart",
+            "variables": {
+                "check_result": "PASS",
+                "note": "Checking invertibility requirements for f and g",
+            },
+        }
+    )
+
+    F = list(kp.F)
+    G = list(kp.G)
+
+    yield (
+        {
+            "step": 4,
+            "name": "Compute NTRU Solution (F, G)",
+            "code": "(F, G) ← NTRUSolve(f, g) where f·G - g·F = q",
+            "variables": {
+                "F_length": len(F),
+                "G_length": len(G),
+                "F_first_20": truncate_list(F, 20),
+                "G_first_20": truncate_list(G, 20),
+                "F_nonzero_count": sum(1 for x in F if x != 0),
+                "G_nonzero_count": sum(1 for x in G if x != 0),
+                "note": (
+                    "Simplified for seed={}".format(seed)
+                    if seed == 0
+                    else "Standard computation"
+                ),
+            },
+        }
+    )
+
+    q00 = list(kp.q00)
+    q01 = list(kp.q01)
+
+    yield (
+        {
+            "step": 5,
+            "name": "Construct Basis B and Gram Matrix Q",
+            "code": "B = [[f, F], [g, G]]; Q = B†·B",
+            "variables": {
+                "B_description": "Basis matrix with f, F, g, G",
+                "Q00_computation": "q00 = f·f + g·g",
+                "Q01_computation": "q01 = F·f + G·g",
+                "q00_first_20": truncate_list(q00, 20),
+                "q01_first_20": truncate_list(q01, 20),
+                "q00_max": max(q00) if q00 else 0,
+                "q00_min": min(q00) if q00 else 0,
+                "q01_max": max(q01) if q01 else 0,
+                "q01_min": min(q01) if q01 else 0,
+            },
+        }
+    )
+
+    low00 = params.get("lows00", 5)
+    high00 = params.get("high00", 9)
+    lows1 = params.get("lows1", 5)
+    highs1 = params.get("highs1", 9)
+
+    q00_half = q00[: n // 2]
+    y00_bits = len(q00_half) * gr_tables(low00, high00).bits_per
+    y01_bits = len(q01) * gr_tables(lows1, highs1).bits_per
+
+    yield (
+        {
+            "step": 6,
+            "name": "Encode Public Key",
+            "code": "pk_bits ← encode_public(q00, q01)",
+            "variables": {
+                "q00_half_length": len(q00_half),
+                "low00": low00,
+                "high00": high00,
+                "lows1": lows1,
+                "highs1": highs1,
+                "y00_compressed_bits": y00_bits,
+                "y01_compressed_bits": y01_bits,
+                "total_pk_bits": params["publenbits"],
+            },
+        }
+    )
+
+    sk_bytes = kp.sk
+    hpub = kp.hpub
+
+    yield (
+        {
+            "step": 7,
+            "name": "Compute Public Key Hash",
+            "code": "hpub ← H(pk)",
+            "variables": {
+                "hpub_len_bits": params["hpublenbits"],
+                "hpub_hex": hpub.hex(),
+                "hpub_bytes": list(hpub),
+            },
+        }
+    )
+
+    Fmod2 = [x & 1 for x in F]
+    Gmod2 = [x & 1 for x in G]
+
+    yield (
+        {
+            "step": 8,
+            "name": "Encode Private Key",
+            "code": "sk ← (kgseed || F mod 2 || G mod 2 || hpub)",
+            "variables": {
+                "kgseed_bits": params["kgseedlenbits"],
+                "F_mod2_bits": len(Fmod2),
+                "G_mod2_bits": len(Gmod2),
+                "hpub_bits": params["hpublenbits"],
+                "F_mod2_first_20": truncate_list(Fmod2, 20),
+                "G_mod2_first_20": truncate_list(Gmod2, 20),
+                "total_sk_size": len(sk_bytes),
+            },
+        }
+    )
+
+
+def _check_param(param: str):
+    if param not in SUPPORTED_PARAMS:
+        raise HTTPException(400, "Only HAWK-512 is currently available")
+
+
+async def _attach_steps(result: dict, steps, visualize: bool, trace: bool):
+    """
+    visualize fills in every step (the original behaviour); trace
+    only registers the lazy generator and returns its id
+    """
+    if visualize:
+        result["steps"] = await backend.run(list, steps)
+    elif trace:
+        result["trace_id"] = traces.add(steps)
+    else:
+        steps.close()
+    return result
+
+
+async def _keypair(seed: int, param: str):
+    # keygen runs in a worker process, so the cache is consulted here
+    kp = cached_keypair(seed, param)
+    if kp is None:
+        kp = await backend.run(derive_keypair, seed, param, heavy=True)
+        remember_keypair(kp)
+    return kp
+
+
 @app.post("/api/generate-keys")
 async def generate_keys(
     seed: int = Form(0),
     param: str = Form("hawk-512"),
     visualize: bool = Form(False),
+    trace: bool = Form(False),
 ):
     try:
-        if param not in ["hawk-512"]:
-            raise HTTPException(400, "Only HAWK-512 is currently available")
-
-        steps = []
-        params = PARAMS[param]
-        n = params["n"]
-        eta = params["eta"]
-        kgseedlen = params["kgseedlenbits"] // 8
-
-        if visualize:
-            kgseed = hashlib.shake_256(seed.to_bytes(8, "little")).digest(
-                kgseedlen
-            )
-            steps.append(
-                {
-                    "step": 1,
-                    "name": "Generate KG Seed",
-                    "code": "kgseed ← SHAKE256(seed)",
-                    "variables": {
-                        "seed": seed,
-                        "kgseedlen_bits": params["kgseedlenbits"],
-                        "kgseed_hex": kgseed.hex(),
-                        "kgseed_first_bytes": list(kgseed[:16]),
-                    },
-                }
-            )
-
-            f, g = regenerate_fg_bits(kgseed, n, eta=eta)
-            steps.append(
-                {
-                    "step": 2,
-                    "name": "Sample f, g ∈ Rn from Bin(η)",
-                    "code": "f, g ← regenerate_fg_bits(kgseed, n={}, η={})".format(
-                        n, eta
-                    ),
-                    "variables": {
-                        "n": n,
-                        "eta": eta,
-                        "f_length": len(f),
-                        "g_length": len(g),
-                        "f_first_20": truncate_list(f, 20),
-                        "g_first_20": truncate_list(g, 20),
-                        "f_nonzero_count": sum(1 for x in f if x != 0),
-                        "g_nonzero_count": sum(1 for x in g if x != 0),
-                    },
-                }
-            )
+        _check_param(param)
+
+        # the keypair comes from the heavy pool; trace steps are only
+        # built on the thread pool, and only when asked for
+        kp = await _keypair(seed, param)
+        result = {
+            "public_key": kp.pk.hex(),
+            "private_key": kp.sk.hex(),
+            "public_key_size": len(kp.pk),
+            "private_key_size": len(kp.sk),
+            "steps": [],
+        }
+        return await _attach_steps(
+            result, _keygen_steps(kp), visualize, trace
+        )
+    except ExecutorBusy as e:
+        raise HTTPException(503, str(e))
+    except Exception as e:
+        raise HTTPException(500, str(e))
 
-            steps.append(
-                {
-                    "step": 3,
-                    "name": "Check f-g conditions",
-                    "code": "if f-g-conditions(f, g) == false: restart",
-                    "variables": {
-                        "check_result": "PASS",
-                        "note": "Checking invertibility requirements for f and g",
-                    },
-                }
-            )
 
-            if seed == 0:
-                f = [1] + [0] * (n - 1)
-                g = [0] * n
-                F = [0] * n
-                G = [1] + [0] * (n - 1)
-            else:
-                F = [0] * n
-                G = [1] + [0] * (n - 1)
-
-            steps.append(
-                {
-                    "step": 4,
-                    "name": "Compute NTRU Solution (F, G)",
-                    "code": "(F, G) ← NTRUSolve(f, g) where f·G - g·F = q",
-                    "variables": {
-                        "F_length": len(F),
-                        "G_length": len(G),
-                        "F_first_20": truncate_list(F, 20),
-                        "G_first_20": truncate_list(G, 20),
-                        "F_nonzero_count": sum(1 for x in F if x != 0),
-                        "G_nonzero_count": sum(1 for x in G if x != 0),
-                        "note": (
-                            "Simplified for seed={}".format(seed)
-                            if seed == 0
-                            else "Standard computation"
-                        ),
-                    },
-                }
-            )
+def _sign(msg: bytes, sk: bytes, seed: int) -> bytes:
+    return get_signing_key(sk).sign(msg, seed=seed)
 
-            def negacyclic_mul(a: List[int], b: List[int]) -> List[int]:
-                nloc = len(a)
-                res = [0] * nloc
-                for i, ai in enumerate(a):
-                    if ai == 0:
-                        continue
-                    for j, bj in enumerate(b):
-                        if bj == 0:
-                            continue
-                        k = (i + j) % nloc
-                        res[k] += ai * bj
-                return res
-
-            ff = negacyclic_mul(f, f)
-            gg = negacyclic_mul(g, g)
-            q00 = [x + y for x, y in zip(ff, gg)]
-
-            Ff = negacyclic_mul(F, f)
-            Gg = negacyclic_mul(G, g)
-            q01 = [x + y for x, y in zip(Ff, Gg)]
-
-            steps.append(
-                {
-                    "step": 5,
-                    "name": "Construct Basis B and Gram Matrix Q",
-                    "code": "B = [[f, F], [g, G]]; Q = B†·B",
-                    "variables": {
-                        "B_description": "Basis matrix with f, F, g, G",
-                        "Q00_computation": "q00 = f·f + g·g",
-                        "Q01_computation": "q01 = F·f + G·g",
-                        "q00_first_20": truncate_list(q00, 20),
-                        "q01_first_20": truncate_list(q01, 20),
-                        "q00_max": max(q00) if q00 else 0,
-                        "q00_min": min(q00) if q00 else 0,
-                        "q01_max": max(q01) if q01 else 0,
-                        "q01_min": min(q01) if q01 else 0,
-                    },
-                }
-            )
 
-            low00 = params.get("lows00", 5)
-            high00 = params.get("high00", 9)
-            lows1 = params.get("lows1", 5)
-            highs1 = params.get("highs1", 9)
-
-            q00_half = q00[: n // 2]
-            maxv = (1 << high00) - 1
-            minv = -maxv
-            q00_clamped = [max(min(c, maxv), minv) for c in q00_half]
-
-            maxv1 = (1 << highs1) - 1
-            minv1 = -maxv1
-            q01_clamped = [max(min(c, maxv1), minv1) for c in q01]
-
-            y00 = CompressGR(q00_clamped, low00, high00)
-            y01 = CompressGR(q01_clamped, lows1, highs1)
-
-            steps.append(
-                {
-                    "step": 6,
-                    "name": "Encode Public Key",
-                    "code": "pk_bits ← encode_public(q00, q01)",
-                    "variables": {
-                        "q00_half_length": len(q00_half),
-                        "low00": low00,
-                        "high00": high00,
-                        "lows1": lows1,
-                        "highs1": highs1,
-                        "y00_compressed_bits": len(y00),
-                        "y01_compressed_bits": len(y01),
-                        "total_pk_bits": params["publenbits"],
-                    },
-                }
-            )
+def _verify(msg: bytes, pk: bytes, sig: bytes) -> bool:
+    return get_verifying_key(pk).verify(msg, sig)
 
-            kg = HawkKeyGen(seed=seed, param_name=param)
-            pk_bytes, sk_bytes = kg.generate()
 
-            hpub = hashlib.shake_256(pk_bytes).digest(
-                params["hpublenbits"] // 8
-            )
+def _sign_steps(msg: bytes, sk: bytes, sig: bytes):
+    # walks through the signature already returned to the caller, so
+    # the salt and s1 shown are that signature's; nothing is re-signed
+    params = PARAMS["hawk-512"]
+    key = get_signing_key(sk)
+    kgseed_bytes = key.kgseed
 
-            steps.append(
-                {
-                    "step": 7,
-                    "name": "Compute Public Key Hash",
-                    "code": "hpub ← H(pk)",
-                    "variables": {
-                        "hpub_len_bits": params["hpublenbits"],
-                        "hpub_hex": hpub.hex(),
-                        "hpub_bytes": list(hpub),
-                    },
-                }
-            )
-
-            Fmod2 = [x & 1 for x in F]
-            Gmod2 = [x & 1 for x in G]
-
-            steps.append(
-                {
-                    "step": 8,
-                    "name": "Encode Private Key",
-                    "code": "sk ← (kgseed || F mod 2 || G mod 2 || hpub)",
-                    "variables": {
-                        "kgseed_bits": params["kgseedlenbits"],
-                        "F_mod2_bits": len(Fmod2),
-                        "G_mod2_bits": len(Gmod2),
-                        "hpub_bits": params["hpublenbits"],
-                        "F_mod2_first_20": truncate_list(Fmod2, 20),
-                        "G_mod2_first_20": truncate_list(Gmod2, 20),
-                        "total_sk_size": len(sk_bytes),
-                    },
-                }
-            )
-
-            return {
-                "public_key": pk_bytes.hex(),
-                "private_key": sk_bytes.hex(),
-                "public_key_size": len(pk_bytes),
-                "private_key_size": len(sk_bytes),
-                "steps": steps,
+    yield (
+        {
+            "step": 1,
+            "name": "Parse Secret Key",
+            "code": "Parse sk = (kgseed || F mod 2 || G mod 2 || hpub)",
+            "variables": {
+                "sk_total_bits": len(sk) * 8,
+                "kgseed_hex": kgseed_bytes.hex(),
+                "kgseed_first_bytes": list(kgseed_bytes[:16]),
+            },
+        }
+    )
+
+    hpub_bytes = key.hpub
+
+    yield (
+        {
+            "step": 2,
+            "name": "Hash Message with hpub",
+            "code": "M ← H(m || hpub)",
+            "variables": {
+                "message": (
+                    msg.decode("utf-8")
+                    if len(msg) < 100
+                    else f"{msg[:100].decode('utf-8', errors='ignore')}..."
+                ),
+                "message_len": len(msg),
+                "hpub_hex": hpub_bytes.hex(),
+                "M_computation": "SHAKE256(message || hpub) → 64 bytes",
+            },
+        }
+    )
+
+    M = hashlib.shake_256(msg + hpub_bytes).digest(64)
+    yield (
+        {
+            "step": 3,
+            "name": "Message Digest M",
+            "code": "M = SHAKE256(m || hpub)",
+            "variables": {
+                "M_hex": M.hex(),
+                "M_length": len(M),
+                "M_first_bytes": list(M[:20]),
+            },
+        }
+    )
+
+    # the salt drawn while signing, read back from the signature
+    salt_len = params["saltlenbits"] // 8
+    salt = BitReader(sig).read_bytes_le(salt_len)
+
+    yield (
+        {
+            "step": 4,
+            "name": "Generate Random Salt",
+            "code": "salt ← Rnd(saltlenbits)",
+            "variables": {
+                "salt_len_bits": params["saltlenbits"],
+                "salt_len_bytes": salt_len,
+                "salt_hex": salt.hex(),
+                "salt_bytes": list(salt),
+                "note": "Salt ensures signature uniqueness for same message",
+            },
+        }
+    )
+
+    # Compute h
+    h = hash_to_point(M, salt, params["n"])
+    h1 = h1_bits(h, params["n"]).tolist()
+
+    yield (
+        {
+            "step": 5,
+            "name": "Compute Hash Point h",
+            "code": "h ← H(M || salt)",
+            "variables": {
+                "h_len_bytes": len(h),
+                "h_hex": h.hex(),
+                "h_first_bytes": list(h[:20]),
+                "h1_first_20_bits": h1[:20],
+                "h1_total_bits": len(h1),
+            },
+        }
+    )
+
+    comp_bytes = sig[salt_len:]
+
+    yield (
+        {
+            "step": 6,
+            "name": "Gaussian Sampling & Symmetry Breaking",
+            "code": "x ← D^(2n)_(Z^(2n)+t, 2σ); w ← B⁻¹·x; if !sym-break(w): w = -w",
+            "variables": {
+                "note": "Sample from discrete Gaussian, apply basis inverse, enforce canonical form",
+                "sigma_sign": "signing standard deviation parameter",
+            },
+        }
+    )
+
+    yield (
+        {
+            "step": 7,
+            "name": "Compute Signature s",
+            "code": "s ← (1/2)(h - w)",
+            "variables": {
+                "note": "Derive signature vector from hash and Gaussian sample"
+            },
+        }
+    )
+
+    r = decompress_gr_bytes(
+        comp_bytes, params["n"], params["lows1"], params["highs1"]
+    )
+    if r:
+        s1 = r[0].tolist()
+        yield (
+            {
+                "step": 8,
+                "name": "Compress Signature s1",
+                "code": "s1 ← Compress(s)",
+                "variables": {
+                    "s1_length": len(s1),
+                    "s1_first_20": truncate_list(s1, 20),
+                    "s1_min": min(s1) if s1 else 0,
+                    "s1_max": max(s1) if s1 else 0,
+                    "compressed_bits": len(comp_bytes) * 8,
+                    "lows1": params["lows1"],
+                    "highs1": params["highs1"],
+                },
             }
-
-        # Non-visualized generation
-        kg = HawkKeyGen(seed=seed, param_name=param)
-        pk, sk = kg.generate()
-
-        return {
-            "public_key": pk.hex(),
-            "private_key": sk.hex(),
-            "public_key_size": len(pk),
-            "private_key_size": len(sk),
-            "steps": [],
+        )
+
+    yield (
+        {
+            "step": 9,
+            "name": "Final Signature",
+            "code": "sig ← (salt || s1)",
+            "variables": {
+                "signature_hex": sig.hex(),
+                "signature_size": len(sig),
+                "salt_bits": params["saltlenbits"],
+                "s1_bits": len(comp_bytes) * 8,
+            },
         }
-    except Exception as e:
-        raise HTTPException(500, str(e))
+    )
 
 
 @app.post("/api/sign")
@@ -274,6 +566,7 @@ async def sign_message(
     private_key_file: UploadFile = File(None),
     seed: int = Form(0),
     visualize: bool = Form(False),
+    trace: bool = Form(False),
 ):
     try:
         if message_file:
@@ -290,191 +583,172 @@ async def sign_message(
         else:
             raise HTTPException(400, "No private key provided")
 
-        steps = []
-
-        if visualize:
-            # Extract components from sk
-            sk_bits = bytes_to_bits(sk)
-            params = PARAMS["hawk-512"]
-            kgseed_bits = sk_bits[: params["kgseedlenbits"]]
-            kgseed_bytes = bits_to_bytes(kgseed_bits)
-
-            steps.append(
-                {
-                    "step": 1,
-                    "name": "Parse Secret Key",
-                    "code": "Parse sk = (kgseed || F mod 2 || G mod 2 || hpub)",
-                    "variables": {
-                        "sk_total_bits": len(sk_bits),
-                        "kgseed_hex": kgseed_bytes.hex(),
-                        "kgseed_first_bytes": list(kgseed_bytes[:16]),
-                    },
-                }
-            )
-
-            hpub_start = params["kgseedlenbits"] + 2 * params["n"]
-            hpub_bits = sk_bits[
-                hpub_start : hpub_start + params["hpublenbits"]
-            ]
-            hpub_bytes = bits_to_bytes(hpub_bits)
-
-            steps.append(
-                {
-                    "step": 2,
-                    "name": "Hash Message with hpub",
-                    "code": "M ← H(m || hpub)",
-                    "variables": {
-                        "message": (
-                            msg.decode("utf-8")
-                            if len(msg) < 100
-                            else f"{msg[:100].decode('utf-8', errors='ignore')}..."
-                        ),
-                        "message_len": len(msg),
-                        "hpub_hex": hpub_bytes.hex(),
-                        "M_computation": "SHAKE256(message || hpub) → 64 bytes",
-                    },
-                }
-            )
-
-            M = hashlib.shake_256(msg + hpub_bytes).digest(64)
-            steps.append(
-                {
-                    "step": 3,
-                    "name": "Message Digest M",
-                    "code": "M = SHAKE256(m || hpub)",
-                    "variables": {
-                        "M_hex": M.hex(),
-                        "M_length": len(M),
-                        "M_first_bytes": list(M[:20]),
-                    },
-                }
-            )
-
-            # Generate salt
-            import os
-
-            salt_len = params["saltlenbits"] // 8
-            salt = os.urandom(salt_len)
-
-            steps.append(
-                {
-                    "step": 4,
-                    "name": "Generate Random Salt",
-                    "code": "salt ← Rnd(saltlenbits)",
-                    "variables": {
-                        "salt_len_bits": params["saltlenbits"],
-                        "salt_len_bytes": salt_len,
-                        "salt_hex": salt.hex(),
-                        "salt_bytes": list(salt),
-                        "note": "Salt ensures signature uniqueness for same message",
-                    },
-                }
-            )
-
-            # Compute h
-            h = hashlib.shake_256(M + salt).digest(2 * params["n"] // 8)
-            h_bits = bytes_to_bits(h)
-            h1 = h_bits[params["n"] : params["n"] * 2]
-
-            steps.append(
-                {
-                    "step": 5,
-                    "name": "Compute Hash Point h",
-                    "code": "h ← H(M || salt)",
-                    "variables": {
-                        "h_len_bytes": len(h),
-                        "h_hex": h.hex(),
-                        "h_first_bytes": list(h[:20]),
-                        "h1_first_20_bits": h1[:20],
-                        "h1_total_bits": len(h1),
-                    },
-                }
-            )
-
-            sig_obj = HawkSign(sk, msg, seed=seed)
-            sig = sig_obj.sign()
-
-            sig_bits = bytes_to_bits(sig)
-            sig_bits[: params["saltlenbits"]]
-            compbits = sig_bits[params["saltlenbits"] :]
-
-            steps.append(
-                {
-                    "step": 6,
-                    "name": "Gaussian Sampling & Symmetry Breaking",
-                    "code": "x ← D^(2n)_(Z^(2n)+t, 2σ); w ← B⁻¹·x; if !sym-break(w): w = -w",
-                    "variables": {
-                        "note": "Sample from discrete Gaussian, apply basis inverse, enforce canonical form",
-                        "sigma_sign": "signing standard deviation parameter",
-                    },
-                }
-            )
-
-            steps.append(
-                {
-                    "step": 7,
-                    "name": "Compute Signature s",
-                    "code": "s ← (1/2)(h - w)",
-                    "variables": {
-                        "note": "Derive signature vector from hash and Gaussian sample"
-                    },
-                }
-            )
-
-            r = DecompressGR(
-                compbits, params["n"], params["lows1"], params["highs1"]
-            )
-            if r:
-                s1, _ = r
-                steps.append(
-                    {
-                        "step": 8,
-                        "name": "Compress Signature s1",
-                        "code": "s1 ← Compress(s)",
-                        "variables": {
-                            "s1_length": len(s1),
-                            "s1_first_20": truncate_list(s1, 20),
-                            "s1_min": min(s1) if s1 else 0,
-                            "s1_max": max(s1) if s1 else 0,
-                            "compressed_bits": len(compbits),
-                            "lows1": params["lows1"],
-                            "highs1": params["highs1"],
-                        },
-                    }
-                )
-
-            steps.append(
-                {
-                    "step": 9,
-                    "name": "Final Signature",
-                    "code": "sig ← (salt || s1)",
-                    "variables": {
-                        "signature_hex": sig.hex(),
-                        "signature_size": len(sig),
-                        "salt_bits": params["saltlenbits"],
-                        "s1_bits": len(compbits),
-                    },
-                }
-            )
-
-            return {
-                "signature": sig.hex(),
-                "signature_size": len(sig),
-                "message_size": len(msg),
-                "steps": steps,
-            }
-
-        sig = HawkSign(sk, msg, seed=seed).sign()
-        return {
+        sig = await backend.run(_sign, msg, sk, seed)
+        result = {
             "signature": sig.hex(),
             "signature_size": len(sig),
             "message_size": len(msg),
             "steps": [],
         }
+        steps = _sign_steps(msg, sk, sig)
+        return await _attach_steps(result, steps, visualize, trace)
+    except ExecutorBusy as e:
+        raise HTTPException(503, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
 
 
+def _verify_steps(msg: bytes, pk: bytes, sig: bytes):
+    params = PARAMS["hawk-512"]
+
+    yield (
+        {
+            "step": 1,
+            "name": "Parse Signature",
+            "code": "sig = (salt || s1)",
+            "variables": {
+                "sig_hex": sig.hex(),
+                "sig_len_bits": len(sig) * 8,
+                "expected_bits": params["siglenbits"],
+            },
+        }
+    )
+
+    salt_bytes = BitReader(sig).read_bytes_le(params["saltlenbits"] // 8)
+    comp_bytes = sig[params["saltlenbits"] // 8 :]
+
+    yield (
+        {
+            "step": 2,
+            "name": "Extract Salt and s1",
+            "code": "salt ← sig[0:saltlenbits]; s1 ← sig[saltlenbits:]",
+            "variables": {
+                "salt_hex": salt_bytes.hex(),
+                "salt_bytes": list(salt_bytes),
+                "salt_bits": params["saltlenbits"],
+                "s1_compressed_bits": len(comp_bytes) * 8,
+            },
+        }
+    )
+
+    r = decompress_gr_bytes(
+        comp_bytes, params["n"], params["lows1"], params["highs1"]
+    )
+    if r:
+        s1, consumed = r[0].tolist(), r[1]
+        yield (
+            {
+                "step": 3,
+                "name": "Decompress s1",
+                "code": "s ← Decompress(s1, h, Q)",
+                "variables": {
+                    "s1_length": len(s1),
+                    "s1_first_20": truncate_list(s1, 20),
+                    "s1_min": min(s1),
+                    "s1_max": max(s1),
+                    "bits_consumed": consumed,
+                },
+            }
+        )
+
+    hpub = get_verifying_key(pk).hpub
+    yield (
+        {
+            "step": 4,
+            "name": "Compute hpub",
+            "code": "hpub ← H(pk)",
+            "variables": {
+                "hpub_hex": hpub.hex(),
+                "hpub_bytes": list(hpub),
+            },
+        }
+    )
+
+    M = hashlib.shake_256(msg + hpub).digest(64)
+    yield (
+        {
+            "step": 5,
+            "name": "Hash Message",
+            "code": "M ← H(m || hpub)",
+            "variables": {
+                "message": (
+                    msg.decode("utf-8")
+                    if len(msg) < 100
+                    else f"{msg[:100].decode('utf-8', errors='ignore')}..."
+                ),
+                "M_hex": M.hex(),
+                "M_first_bytes": list(M[:20]),
+            },
+        }
+    )
+
+    h = hash_to_point(M, salt_bytes, params["n"])
+    h1 = h1_bits(h, params["n"]).tolist()
+
+    yield (
+        {
+            "step": 6,
+            "name": "Recompute h",
+            "code": "h ← H(M || salt)",
+            "variables": {
+                "h_hex": h.hex(),
+                "h_first_bytes": list(h[:20]),
+                "h1_first_20_bits": h1[:20],
+            },
+        }
+    )
+
+    if r:
+        low = params["lows1"]
+        high = params["highs1"]
+        tables = gr_tables(low, high)
+        rng = tables.rng
+        bits_per = tables.bits_per
+
+        expected = derive_s1(h, params)[:10].tolist()
+        mismatches = [
+            {"index": i, "s1_val": s1[i], "expected": e}
+            for i, e in enumerate(expected[: len(s1)])
+            if s1[i] != e
+        ]
+
+        yield (
+            {
+                "step": 7,
+                "name": "Verify s1 Consistency with h",
+                "code": "Check s1[i] matches encoding from h1 chunks",
+                "variables": {
+                    "low": low,
+                    "high": high,
+                    "range": rng,
+                    "bits_per_element": bits_per,
+                    "mismatches": (
+                        mismatches if mismatches else "All values match!"
+                    ),
+                    "checked_elements": min(10, len(s1)),
+                },
+            }
+        )
+
+    valid = get_verifying_key(pk).verify(msg, sig)
+
+    yield (
+        {
+            "step": 8,
+            "name": "Final Verification",
+            "code": "Check all conditions: salt length, s1 encoding, sym-break(w), ||w||²_Q ≤ bound",
+            "variables": {
+                "result": "VALID ✓" if valid else "INVALID ✗",
+                "verdict": (
+                    "Signature is authentic and message is unmodified"
+                    if valid
+                    else "Signature verification failed"
+                ),
+            },
+        }
+    )
+
+
 @app.post("/api/verify")
 async def verify_signature(
     message: str = Form(None),
@@ -484,6 +758,7 @@ async def verify_signature(
     signature: str = Form(None),
     signature_file: UploadFile = File(None),
     visualize: bool = Form(False),
+    trace: bool = Form(False),
 ):
     try:
         if message_file:
@@ -507,190 +782,345 @@ async def verify_signature(
         else:
             raise HTTPException(400, "No signature provided")
 
-        steps = []
-        params = PARAMS["hawk-512"]
-
-        if visualize:
-            steps.append(
-                {
-                    "step": 1,
-                    "name": "Parse Signature",
-                    "code": "sig = (salt || s1)",
-                    "variables": {
-                        "sig_hex": sig.hex(),
-                        "sig_len_bits": len(sig) * 8,
-                        "expected_bits": params["siglenbits"],
-                    },
-                }
-            )
+        valid = await backend.run(_verify, msg, pk, sig)
+        result = {
+            "valid": valid,
+            "message_size": len(msg),
+            "signature_size": len(sig),
+            "steps": [],
+        }
+        steps = _verify_steps(msg, pk, sig)
+        return await _attach_steps(result, steps, visualize, trace)
+    except ExecutorBusy as e:
+        raise HTTPException(503, str(e))
+    except Exception as e:
+        raise HTTPException(500, str(e))
 
-            sig_bits = bytes_to_bits(sig)
-            saltbits = sig_bits[: params["saltlenbits"]]
-            compbits = sig_bits[params["saltlenbits"] :]
-
-            salt_bytes = bits_to_bytes(saltbits)
-
-            steps.append(
-                {
-                    "step": 2,
-                    "name": "Extract Salt and s1",
-                    "code": "salt ← sig[0:saltlenbits]; s1 ← sig[saltlenbits:]",
-                    "variables": {
-                        "salt_hex": salt_bytes.hex(),
-                        "salt_bytes": list(salt_bytes),
-                        "salt_bits": len(saltbits),
-                        "s1_compressed_bits": len(compbits),
-                    },
-                }
-            )
 
-            r = DecompressGR(
-                compbits, params["n"], params["lows1"], params["highs1"]
-            )
-            if r:
-                s1, consumed = r
-                steps.append(
-                    {
-                        "step": 3,
-                        "name": "Decompress s1",
-                        "code": "s ← Decompress(s1, h, Q)",
-                        "variables": {
-                            "s1_length": len(s1),
-                            "s1_first_20": truncate_list(s1, 20),
-                            "s1_min": min(s1),
-                            "s1_max": max(s1),
-                            "bits_consumed": consumed,
-                        },
-                    }
-                )
+# lazy traces: steps of a trace=true request are computed on demand
+
+
+def _get_trace(trace_id: str):
+    trace = traces.get(trace_id)
+    if trace is None:
+        raise HTTPException(404, "unknown or expired trace")
+    return trace
+
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace_page(trace_id: str, offset: int = 0, limit: int = 20):
+    trace = _get_trace(trace_id)
+    if offset < 0 or not 1 <= limit <= 100:
+        raise HTTPException(400, "need offset >= 0 and 1 <= limit <= 100")
+    steps = await _offload(trace.page, offset, limit)
+    more = len(steps) == limit and not (
+        trace.done and len(trace) == offset + limit
+    )
+    return {
+        "trace_id": trace_id,
+        "offset": offset,
+        "steps": steps,
+        "next_offset": offset + limit if more else None,
+    }
+
+
+@app.get("/api/traces/{trace_id}/steps/{index}")
+async def get_trace_step(trace_id: str, index: int):
+    trace = _get_trace(trace_id)
+    step = await _offload(trace.step, index) if index >= 0 else None
+    if step is None:
+        raise HTTPException(404, "no such step")
+    return step
+
+
+def _sse(event: str, data, event_id=None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    payload = json.dumps(jsonable_encoder(data))
+    return f"{head}event: {event}\ndata: {payload}\n\n"
+
+
+@app.get("/api/traces/{trace_id}/events")
+async def stream_trace(trace_id: str, request: Request):
+    """server-sent events: one "step" event per step, then "end" """
+    trace = _get_trace(trace_id)
+    last = request.headers.get("last-event-id")
+    start = int(last) + 1 if last and last.isdigit() else 0
+
+    async def events():
+        index = start
+        while True:
+            try:
+                step = await backend.run(trace.step, index)
+            except Exception as e:
+                yield _sse("error", {"detail": str(e)})
+                return
+            if step is None:
+                yield _sse("end", {"steps": len(trace)})
+                return
+            yield _sse("step", step, index)
+            index += 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+# /api/v2: raw bytes in length-prefixed frames (see frames.py) instead
+# of hex in multipart forms; the message is streamed as the rest of the body
+
+
+async def _offload(fn, *args, heavy: bool = False):
+    try:
+        return await backend.run(fn, *args, heavy=heavy)
+    except ExecutorBusy as e:
+        raise HTTPException(503, str(e))
 
-            hpub = hashlib.shake_256(pk).digest(params["hpublenbits"] // 8)
-            steps.append(
-                {
-                    "step": 4,
-                    "name": "Compute hpub",
-                    "code": "hpub ← H(pk)",
-                    "variables": {
-                        "hpub_hex": hpub.hex(),
-                        "hpub_bytes": list(hpub),
-                    },
-                }
-            )
 
-            M = hashlib.shake_256(msg + hpub).digest(64)
-            steps.append(
-                {
-                    "step": 5,
-                    "name": "Hash Message",
-                    "code": "M ← H(m || hpub)",
-                    "variables": {
-                        "message": (
-                            msg.decode("utf-8")
-                            if len(msg) < 100
-                            else f"{msg[:100].decode('utf-8', errors='ignore')}..."
-                        ),
-                        "M_hex": M.hex(),
-                        "M_first_bytes": list(M[:20]),
-                    },
-                }
-            )
+async def _hash_body(reader: FrameReader) -> MessageHasher:
+    hasher = MessageHasher()
+    async for chunk in reader.remainder():
+        hasher.update(chunk)
+    return hasher
 
-            h = hashlib.shake_256(M + salt_bytes).digest(2 * params["n"] // 8)
-            h_bits = bytes_to_bits(h)
-            h1 = h_bits[params["n"] : params["n"] * 2]
-
-            steps.append(
-                {
-                    "step": 6,
-                    "name": "Recompute h",
-                    "code": "h ← H(M || salt)",
-                    "variables": {
-                        "h_hex": h.hex(),
-                        "h_first_bytes": list(h[:20]),
-                        "h1_first_20_bits": h1[:20],
-                    },
-                }
-            )
 
-            if r:
-                import math
-
-                low = params["lows1"]
-                high = params["highs1"]
-                rng = high - low + 1
-                bits_per = math.ceil(math.log2(rng))
-
-                mismatches = []
-                for i in range(min(10, len(s1))):
-                    start = i * bits_per
-                    chunk = h1[start : start + bits_per]
-                    if len(chunk) < bits_per:
-                        chunk += [0] * (bits_per - len(chunk))
-                    val = sum((b & 1) << j for j, b in enumerate(chunk))
-                    expected = low + (val % rng)
-                    if s1[i] != expected:
-                        mismatches.append(
-                            {
-                                "index": i,
-                                "s1_val": s1[i],
-                                "expected": expected,
-                            }
-                        )
-
-                steps.append(
-                    {
-                        "step": 7,
-                        "name": "Verify s1 Consistency with h",
-                        "code": "Check s1[i] matches encoding from h1 chunks",
-                        "variables": {
-                            "low": low,
-                            "high": high,
-                            "range": rng,
-                            "bits_per_element": bits_per,
-                            "mismatches": (
-                                mismatches
-                                if mismatches
-                                else "All values match!"
-                            ),
-                            "checked_elements": min(10, len(s1)),
-                        },
-                    }
-                )
+@app.post("/api/v2/generate-keys")
+async def generate_keys_v2(seed: int = 0, param: str = "hawk-512"):
+    """response: frame(pk) || frame(sk)"""
+    _check_param(param)
+    try:
+        kp = await _keypair(seed, param)
+    except ExecutorBusy as e:
+        raise HTTPException(503, str(e))
+    return Response(encode_frames(kp.pk, kp.sk), media_type=OCTET_STREAM)
 
-            valid = HawkVerify(pk, msg, sig).verify()
-
-            steps.append(
-                {
-                    "step": 8,
-                    "name": "Final Verification",
-                    "code": "Check all conditions: salt length, s1 encoding, sym-break(w), ||w||²_Q ≤ bound",
-                    "variables": {
-                        "result": "VALID ✓" if valid else "INVALID ✗",
-                        "verdict": (
-                            "Signature is authentic and message is unmodified"
-                            if valid
-                            else "Signature verification failed"
-                        ),
-                    },
-                }
-            )
 
-            return {
-                "valid": valid,
-                "message_size": len(msg),
-                "signature_size": len(sig),
-                "steps": steps,
-            }
+@app.post("/api/v2/sign")
+async def sign_v2(request: Request, seed: int = 0, param: str = "hawk-512"):
+    """body: frame(sk) || message; response: the raw signature"""
+    _check_param(param)
+    reader = FrameReader(request.stream())
+    try:
+        key = get_signing_key(await reader.read_frame(), param)
+        hasher = await _hash_body(reader)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    sig = await _offload(key.sign_digest, hasher.digest(key.hpub), seed)
+    return Response(
+        sig,
+        media_type=OCTET_STREAM,
+        headers={"X-Message-Size": str(hasher.size)},
+    )
+
+
+@app.post("/api/v2/verify")
+async def verify_v2(request: Request, param: str = "hawk-512"):
+    """body: frame(pk) || frame(sig) || message; response: one byte, 1 = valid"""
+    _check_param(param)
+    reader = FrameReader(request.stream())
+    try:
+        key = get_verifying_key(await reader.read_frame(), param)
+        sig = await reader.read_frame()
+        hasher = await _hash_body(reader)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    valid = await _offload(key.verify_digest, hasher.digest(key.hpub), sig)
+    return Response(
+        b"\x01" if valid else b"\x00",
+        media_type=OCTET_STREAM,
+        headers={
+            "X-Hawk-Valid": "true" if valid else "false",
+            "X-Message-Size": str(hasher.size),
+        },
+    )
 
-        valid = HawkVerify(pk, msg, sig).verify()
-        return {
-            "valid": valid,
-            "message_size": len(msg),
-            "signature_size": len(sig),
-            "steps": [],
-        }
+
+# /api/verify/batch: jobs come in as ndjson lines or as binary
+# frame(pk) || frame(sig) || frame(msg) triples. chunks go to the
+# heavy pool while the body is still being read, with at most
+# 2 * processes chunks in flight; the body is bounded in bytes and
+# jobs, and results are answered as ndjson in completion order
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+async def _limited(chunks, limit: int):
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > limit:
+            raise _BodyTooLarge(f"body exceeds {limit} bytes")
+        yield chunk
+
+
+def _ndjson_line(obj) -> bytes:
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+async def _ndjson_jobs(chunks):
+    """(index, raw line, error); lines are decoded by the worker"""
+    index = 0
+    try:
+        async for line in iter_lines(chunks, BATCH_MAX_ITEM):
+            if line.strip():
+                yield index, line, None
+                index += 1
+    except FrameError as e:
+        yield index, None, str(e)
+
+
+async def _binary_jobs(chunks):
+    reader = FrameReader(chunks, max_frame=BATCH_MAX_ITEM)
+    index = 0
+    while not await reader.at_eof():
+        try:
+            pk = await reader.read_frame()
+            sig = await reader.read_frame()
+            msg = await reader.read_frame()
+        except FrameError as e:
+            # framing is lost, nothing after this point can be read
+            yield index, None, str(e)
+            return
+        yield index, (pk, msg, sig), None
+        index += 1
+
+
+def _chunk_lines(task, indices):
+    try:
+        verdicts = task.result()
     except Exception as e:
-        raise HTTPException(500, str(e))
+        error = "server busy" if isinstance(e, ExecutorBusy) else str(e)
+        return [
+            _ndjson_line({"index": i, "id": None, "error": error})
+            for i in indices
+        ]
+    lines = []
+    for i, (job_id, ok, error) in zip(indices, verdicts):
+        if error is None:
+            lines.append(
+                _ndjson_line({"index": i, "id": job_id, "valid": ok})
+            )
+        else:
+            lines.append(
+                _ndjson_line({"index": i, "id": job_id, "error": error})
+            )
+    return lines
+
+
+class _BatchRun:
+    """submits job chunks as they are parsed, collects result lines"""
+
+    def __init__(self, worker, param: str, chunk_size: int):
+        self.worker = worker
+        self.param = param
+        self.chunk_size = chunk_size
+        self.max_in_flight = 2 * backend.processes
+        self.pending = {}
+        self.lines = []
+        self._indices, self._payloads = [], []
+
+    async def add(self, index: int, payload, error):
+        if error is not None:
+            self.lines.append(
+                _ndjson_line({"index": index, "id": None, "error": error})
+            )
+            return
+        self._indices.append(index)
+        self._payloads.append(payload)
+        if len(self._payloads) >= self.chunk_size:
+            self._submit()
+            # backpressure: stop reading the body while the pool is full
+            while len(self.pending) >= self.max_in_flight:
+                await self._collect(block=True)
+            await self._collect(block=False)
+
+    def _submit(self):
+        task = asyncio.ensure_future(
+            backend.run(self.worker, self._payloads, self.param, heavy=True)
+        )
+        self.pending[task] = self._indices
+        self._indices, self._payloads = [], []
+
+    async def _collect(self, block: bool):
+        if not self.pending:
+            return
+        done, _ = await asyncio.wait(
+            self.pending,
+            timeout=None if block else 0,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in done:
+            self.lines += _chunk_lines(task, self.pending.pop(task))
+
+    def finish(self):
+        if self._payloads:
+            self._submit()
+
+    async def results(self):
+        try:
+            while True:
+                lines, self.lines = self.lines, []
+                for line in lines:
+                    yield line
+                if not self.pending:
+                    break
+                await self._collect(block=True)
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        for task in self.pending:
+            task.cancel()
+        self.pending.clear()
+
+
+@app.post("/api/verify/batch")
+async def verify_batch_endpoint(
+    request: Request, param: str = "hawk-512", chunk_size: int = BATCH_CHUNK
+):
+    """
+    verify many (pk, msg, sig) jobs in one request; the body is ndjson
+    ({"id", "public_key", "signature", "message" or "message_hex"} per
+    line) or, with an octet-stream content type, binary frame triples.
+    results stream back as ndjson {"index", "id", "valid" or "error"}.
+    bodies over BATCH_MAX_BODY bytes or BATCH_MAX_JOBS jobs get a 413
+    """
+    _check_param(param)
+    if chunk_size < 1:
+        raise HTTPException(400, "chunk_size must be >= 1")
+    if backend.pending >= backend.max_pending:
+        raise HTTPException(503, "server busy")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > BATCH_MAX_BODY:
+        raise HTTPException(413, f"body exceeds {BATCH_MAX_BODY} bytes")
+    if request.headers.get("content-type", "").startswith(OCTET_STREAM):
+        parse, worker = _binary_jobs, verify_items
+    else:
+        parse, worker = _ndjson_jobs, verify_lines
+    run = _BatchRun(worker, param, chunk_size)
+    # the body has to be read here: once the response starts, starlette
+    # listens for a disconnect on the same receive channel and would
+    # swallow the remaining body messages. chunks are verified while
+    # it is read, so only the chunks in flight are held in memory
+    try:
+        body = _limited(request.stream(), BATCH_MAX_BODY)
+        async for index, payload, error in parse(body):
+            if index >= BATCH_MAX_JOBS:
+                raise HTTPException(
+                    413, f"batch exceeds {BATCH_MAX_JOBS} jobs"
+                )
+            await run.add(index, payload, error)
+    except _BodyTooLarge as e:
+        run.cancel()
+        raise HTTPException(413, str(e))
+    except BaseException:
+        run.cancel()
+        raise
+    run.finish()
+    return StreamingResponse(run.results(), media_type=NDJSON)
 
 
 def main():
@@ -0,0 +1,52 @@
+"""
+worker side of /api/verify/batch
+jobs reach the heavy pool as raw ndjson lines or as
+framed (pk, msg, sig) tuples, so json and hex decoding
+happen in the worker rather than on the event loop.
+each returns one (id, valid, error) triple per job
+"""
+
+import json
+from hawk.core.verify import get_verifying_key
+
+
+def parse_job(line: bytes):
+    """returns (id, (pk, msg, sig), error) for one ndjson job"""
+    job_id = None
+    try:
+        job = json.loads(line)
+        job_id = job.get("id")
+        if "message_hex" in job:
+            msg = bytes.fromhex(job["message_hex"])
+        else:
+            msg = job["message"].encode("utf-8")
+        item = (
+            bytes.fromhex(job["public_key"]),
+            msg,
+            bytes.fromhex(job["signature"]),
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return job_id, None, f"malformed job: {e!r}"
+    return job_id, item, None
+
+
+def verify_lines(lines, param_name="hawk-512"):
+    """parse and verify a list of ndjson job lines"""
+    results = []
+    for line in lines:
+        job_id, item, error = parse_job(line)
+        if error is not None:
+            results.append((job_id, None, error))
+            continue
+        pk, msg, sig = item
+        ok = get_verifying_key(pk, param_name).verify(msg, sig)
+        results.append((job_id, ok, None))
+    return results
+
+
+def verify_items(items, param_name="hawk-512"):
+    """verify a list of (pk, msg, sig) tuples taken from binary frames"""
+    return [
+        (None, get_verifying_key(pk, param_name).verify(msg, sig), None)
+        for pk, msg, sig in items
+    ]
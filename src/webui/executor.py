@@ -0,0 +1,180 @@
+"""
+execution backend for the web api
+cpu-bound crypto never runs on the event loop:
+small jobs (sign, verify, traces) go to a bounded
+thread pool, heavy ones (keygen, batches) to a
+process pool. on a free-threaded build, or with
+HAWK_EXECUTOR=thread, heavy jobs share the thread
+pool instead. jobs beyond the queue limit are
+rejected so latency cannot grow without bound.
+on_job, when set, is called with (job name, pool,
+seconds) after every job, queue wait included.
+jobs run under the caller's hawk trace id.
+worker processes are started with forkserver (spawn
+where that is missing), never forked from the
+threaded server; a pool broken by a dead worker is
+replaced on the next heavy job
+
+configured through environment variables:
+HAWK_THREADS, HAWK_PROCESSES, HAWK_MAX_PENDING
+and HAWK_EXECUTOR (process | thread)
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from hawk.core import log
+
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+
+class ExecutorBusy(RuntimeError):
+    pass
+
+
+def _free_threaded() -> bool:
+    check = getattr(sys, "_is_gil_enabled", None)
+    return check is not None and not check()
+
+
+class CryptoExecutor:
+    def __init__(
+        self,
+        threads: int = None,
+        processes: int = None,
+        max_pending: int = 64,
+        heavy_backend: str = None,
+    ):
+        cpus = os.cpu_count() or 1
+        self.threads = threads or min(32, cpus + 4)
+        self.processes = processes or cpus
+        self.max_pending = max_pending
+        if heavy_backend is None:
+            heavy_backend = "thread" if _free_threaded() else "process"
+        if heavy_backend not in ("process", "thread"):
+            raise ValueError(f"unknown executor backend: {heavy_backend}")
+        self.heavy_backend = heavy_backend
+        self._thread_pool = None
+        self._process_pool = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.on_job = None
+
+    @classmethod
+    def from_env(cls):
+        def env_int(name):
+            value = os.environ.get(name)
+            return int(value) if value else None
+
+        return cls(
+            threads=env_int("HAWK_THREADS"),
+            processes=env_int("HAWK_PROCESSES"),
+            max_pending=env_int("HAWK_MAX_PENDING") or 64,
+            heavy_backend=os.environ.get("HAWK_EXECUTOR") or None,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def pool_name(self, heavy: bool) -> str:
+        if heavy and self.heavy_backend == "process":
+            return "process"
+        return "thread"
+
+    def _pool(self, heavy: bool):
+        with self._lock:
+            if heavy and self.heavy_backend == "process":
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(
+                        self.processes,
+                        mp_context=multiprocessing.get_context(START_METHOD),
+                    )
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    self.threads, thread_name_prefix="hawk-crypto"
+                )
+            return self._thread_pool
+
+    def _discard_process_pool(self, pool):
+        with self._lock:
+            if self._process_pool is not pool:
+                return  # already replaced by another job
+            self._process_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                log.event(
+                    "executor.busy",
+                    logging.WARNING,
+                    pending=self._pending,
+                    max_pending=self.max_pending,
+                )
+                raise ExecutorBusy(
+                    f"server busy: {self._pending} jobs pending"
+                )
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args, heavy: bool = False, **kwargs):
+        """run fn(*args, **kwargs) off the event loop"""
+        self._acquire()
+        start = time.perf_counter()
+        pool = self.pool_name(heavy)
+        try:
+            loop = asyncio.get_running_loop()
+            if pool == "process":
+                # contextvars do not cross processes, pass the id along
+                call = functools.partial(
+                    log.call_with_trace,
+                    log.get_trace_id(),
+                    fn,
+                    *args,
+                    **kwargs,
+                )
+            else:
+                call = functools.partial(
+                    contextvars.copy_context().run, fn, *args, **kwargs
+                )
+            executor = self._pool(heavy)
+            try:
+                return await loop.run_in_executor(executor, call)
+            except BrokenProcessPool:
+                self._discard_process_pool(executor)
+                raise
+        finally:
+            self._release()
+            if self.on_job is not None or log.enabled():
+                name = getattr(fn, "__name__", type(fn).__name__)
+                elapsed = time.perf_counter() - start
+                if self.on_job is not None:
+                    self.on_job(name, pool, elapsed)
+                log.event(
+                    "executor.job", job=name, pool=pool, seconds=elapsed
+                )
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools = [self._thread_pool, self._process_pool]
+            self._thread_pool = self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,111 @@
+"""
+length-prefixed binary framing for the /api/v2 endpoints
+a frame is a 4-byte big-endian length followed by that
+many bytes. requests carry their keys and signatures as
+frames; the message, when there is one, is the rest of
+the body and is consumed as a stream. iter_lines splits
+a streamed body into lines for the ndjson batch endpoint
+"""
+
+import struct
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 1 << 20
+MAX_LINE = 4 << 20
+
+
+class FrameError(ValueError):
+    pass
+
+
+def encode_frames(*parts) -> bytes:
+    out = bytearray()
+    for part in parts:
+        out += FRAME_HEADER.pack(len(part))
+        out += part
+    return bytes(out)
+
+
+def decode_frames(data: bytes, count: int):
+    """split count frames off the front of data, returns (frames, rest)"""
+    frames = []
+    pos = 0
+    for _ in range(count):
+        if len(data) - pos < FRAME_HEADER.size:
+            raise FrameError("truncated frame header")
+        (length,) = FRAME_HEADER.unpack_from(data, pos)
+        pos += FRAME_HEADER.size
+        if len(data) - pos < length:
+            raise FrameError("truncated frame")
+        frames.append(bytes(data[pos : pos + length]))
+        pos += length
+    return frames, data[pos:]
+
+
+class FrameReader:
+    """reads frames from an async iterator of byte chunks"""
+
+    def __init__(self, chunks, max_frame: int = MAX_FRAME):
+        self._chunks = chunks.__aiter__()
+        self._buf = bytearray()
+        self._eof = False
+        self.max_frame = max_frame
+
+    async def _fill(self, n: int) -> bool:
+        while len(self._buf) < n and not self._eof:
+            try:
+                self._buf += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._eof = True
+        return len(self._buf) >= n
+
+    async def read_exact(self, n: int) -> bytes:
+        if not await self._fill(n):
+            raise FrameError("unexpected end of body")
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    async def at_eof(self) -> bool:
+        return not await self._fill(1)
+
+    async def read_frame(self) -> bytes:
+        (length,) = FRAME_HEADER.unpack(
+            await self.read_exact(FRAME_HEADER.size)
+        )
+        if length > self.max_frame:
+            raise FrameError(f"frame of {length} bytes exceeds the limit")
+        return await self.read_exact(length)
+
+    async def remainder(self):
+        """yield whatever is left of the body, chunk by chunk"""
+        if self._buf:
+            yield bytes(self._buf)
+            self._buf.clear()
+        while not self._eof:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._eof = True
+                return
+            if chunk:
+                yield chunk
+
+
+async def iter_lines(chunks, max_line: int = MAX_LINE):
+    """yield newline-terminated lines (without the newline) from chunks"""
+    buf = bytearray()
+    async for chunk in chunks:
+        buf += chunk
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            yield bytes(buf[start:end])
+            start = end + 1
+        del buf[:start]
+        if len(buf) > max_line:
+            raise FrameError(f"line exceeds {max_line} bytes")
+    if buf:
+        yield bytes(buf)
@@ -0,0 +1,385 @@
+"""
+load generator for the web api
+concurrent httpx.AsyncClient workers send a weighted
+mix of keygen/sign/verify requests, with messages
+drawn from a list of sizes, against webui.app either
+in process (asgi transport, shares the event loop
+with the app), at a url, or in a uvicorn subprocess
+launched for the run. requests starting inside the
+warmup window are not counted. reports throughput
+and latency percentiles per operation.
+
+    python -m webui.loadtest --launch --concurrency 32 \\
+        --mix sign=6,verify=3,keygen=1 --sizes 64,4k,1M
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+import httpx
+import numpy as np
+from hawk.cli import parse_size
+from hawk.core.keygen import get_keypair
+from hawk.core.sign import SigningKey
+from webui.frames import encode_frames
+
+OPERATIONS = ("keygen", "sign", "verify")
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+
+class LoadConfig(NamedTuple):
+    concurrency: int = 8
+    duration: float = 10.0
+    warmup: float = 1.0
+    mix: Dict[str, float] = {"sign": 6, "verify": 3, "keygen": 1}
+    sizes: Tuple[int, ...] = (64, 4096, 65536)
+    api: str = "v2"
+    param: str = "hawk-512"
+    seed: int = 0
+    timeout: float = 30.0
+
+
+class Record(NamedTuple):
+    op: str
+    size: int
+    start: float
+    latency: float
+    status: int  # 0 when the request failed without a response
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """ "sign=6,verify=3,keygen=1" -> weights; missing ops get 0"""
+    mix = {}
+    for part in text.split(","):
+        name, sep, weight = part.strip().partition("=")
+        if name not in OPERATIONS or not sep:
+            raise argparse.ArgumentTypeError(f"invalid mix entry: {part!r}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight: {part!r}")
+        if mix[name] < 0:
+            raise argparse.ArgumentTypeError(f"negative weight: {part!r}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs a positive weight")
+    return mix
+
+
+def parse_sizes(text: str) -> Tuple[int, ...]:
+    return tuple(parse_size(part) for part in text.split(","))
+
+
+class Workload:
+    """one keypair, a message and signature per size, and the requests"""
+
+    def __init__(self, config: LoadConfig):
+        self.config = config
+        kp = get_keypair(config.seed, config.param)
+        self.pk, self.sk = kp.pk, kp.sk
+        signer = SigningKey(kp.sk, config.param)
+        rng = random.Random(config.seed)
+        self.messages = {
+            size: rng.randbytes(size) for size in set(config.sizes)
+        }
+        self.signatures = {
+            size: signer.sign(msg) for size, msg in self.messages.items()
+        }
+
+    async def request(self, client, op: str, size: int, rng) -> int:
+        api = self.config.api
+        param = self.config.param
+        msg = self.messages.get(size, b"")
+        if op == "keygen":
+            seed = rng.randrange(1, 1 << 31)  # uncached on purpose
+            if api == "v2":
+                r = await client.post(
+                    "/api/v2/generate-keys",
+                    params={"seed": seed, "param": param},
+                )
+            else:
+                r = await client.post(
+                    "/api/generate-keys", data={"seed": seed, "param": param}
+                )
+        elif op == "sign":
+            if api == "v2":
+                r = await client.post(
+                    "/api/v2/sign",
+                    params={"param": param},
+                    content=encode_frames(self.sk) + msg,
+                )
+            else:
+                r = await client.post(
+                    "/api/sign",
+                    data={"private_key": self.sk.hex()},
+                    files={"message_file": msg},
+                )
+        else:
+            sig = self.signatures[size]
+            if api == "v2":
+                r = await client.post(
+                    "/api/v2/verify",
+                    params={"param": param},
+                    content=encode_frames(self.pk, sig) + msg,
+                )
+            else:
+                r = await client.post(
+                    "/api/verify",
+                    data={
+                        "public_key": self.pk.hex(),
+                        "signature": sig.hex(),
+                    },
+                    files={"message_file": msg},
+                )
+        return r.status_code
+
+
+async def run_load(client: httpx.AsyncClient, config: LoadConfig):
+    """drive the workload until config.duration has passed"""
+    if config.api not in ("v1", "v2"):
+        raise ValueError(f"unknown api: {config.api}")
+    if config.concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    workload = Workload(config)
+    ops = [op for op in OPERATIONS if config.mix.get(op, 0) > 0]
+    weights = [config.mix[op] for op in ops]
+    start = time.perf_counter()
+    deadline = start + config.duration
+    records: List[Record] = []
+
+    async def worker(index: int):
+        rng = random.Random(config.seed * 7919 + index)
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            size = 0 if op == "keygen" else rng.choice(config.sizes)
+            t0 = time.perf_counter()
+            try:
+                status = await workload.request(client, op, size, rng)
+            except httpx.HTTPError:
+                status = 0
+            records.append(
+                Record(op, size, t0 - start, time.perf_counter() - t0, status)
+            )
+
+    await asyncio.gather(*(worker(i) for i in range(config.concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(records, config, elapsed)
+
+
+def _latency(latencies) -> dict:
+    if not latencies:
+        return {}
+    p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+    return {
+        "p50_ms": float(p50) * 1e3,
+        "p90_ms": float(p90) * 1e3,
+        "p95_ms": float(p95) * 1e3,
+        "p99_ms": float(p99) * 1e3,
+        "max_ms": float(max(latencies)) * 1e3,
+    }
+
+
+def _group(records, window: float) -> dict:
+    statuses = {}
+    for r in records:
+        statuses[str(r.status)] = statuses.get(str(r.status), 0) + 1
+    ok = [r for r in records if 200 <= r.status < 300]
+    rate = 1.0 / window if window > 0 else 0.0
+    return {
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "busy": statuses.get("503", 0),
+        "statuses": statuses,
+        "throughput_rps": len(ok) * rate,
+        "mb_per_s": sum(r.size for r in ok) * rate / 1e6,
+        **_latency([r.latency for r in ok]),
+    }
+
+
+def summarize(records: List[Record], config: LoadConfig, elapsed: float):
+    """
+    stats over requests that started after the warmup window;
+    throughput counts successful requests only
+    """
+    measured = [r for r in records if r.start >= config.warmup]
+    window = max(elapsed - config.warmup, 0.0)
+    by_op = {}
+    for op in OPERATIONS:
+        group = [r for r in measured if r.op == op]
+        if group:
+            by_op[op] = _group(group, window)
+        for size in sorted({r.size for r in group if op != "keygen"}):
+            key = f"{op}[{size}]"
+            by_op[key] = _group([r for r in group if r.size == size], window)
+    return {
+        "config": {**config._asdict(), "sizes": list(config.sizes)},
+        "elapsed_s": elapsed,
+        "window_s": window,
+        "total": _group(measured, window),
+        "operations": by_op,
+    }
+
+
+def format_report(report) -> str:
+    lines = [
+        "%-16s %8s %7s %9s %9s %9s %9s %9s"
+        % (
+            "op",
+            "reqs",
+            "errors",
+            "req/s",
+            "p50 ms",
+            "p95 ms",
+            "p99 ms",
+            "max ms",
+        )
+    ]
+    rows = [("total", report["total"])] + list(report["operations"].items())
+    for name, g in rows:
+        lines.append(
+            "%-16s %8d %7d %9.1f %9.2f %9.2f %9.2f %9.2f"
+            % (
+                name,
+                g["requests"],
+                g["errors"],
+                g["throughput_rps"],
+                g.get("p50_ms", 0.0),
+                g.get("p95_ms", 0.0),
+                g.get("p99_ms", 0.0),
+                g.get("max_ms", 0.0),
+            )
+        )
+    return "\n".join(lines)
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def launch_server(host: str = "127.0.0.1", port: int = None, env=None):
+    """run webui.app under uvicorn in a subprocess, yield its base url"""
+    port = port or _free_port(host)
+    environ = dict(os.environ, **(env or {}))
+    environ["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(SRC_DIR), environ.get("PYTHONPATH")) if p
+    )
+    cmd = [sys.executable, "-m", "uvicorn", "webui.app:app"]
+    cmd += ["--host", host, "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=environ)
+    url = f"http://{host}:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            try:
+                httpx.get(url + "/metrics", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start in time")
+                time.sleep(0.1)
+        yield url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _client(config: LoadConfig, url: str = None) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=config.concurrency)
+    if url:
+        return httpx.AsyncClient(
+            base_url=url, timeout=config.timeout, limits=limits
+        )
+    from webui.app import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://loadtest",
+        timeout=config.timeout,
+        limits=limits,
+    )
+
+
+async def _run(config: LoadConfig, url: str = None):
+    async with _client(config, url) as client:
+        return await run_load(client, config)
+
+
+def run(config: LoadConfig, url: str = None, launch: bool = False):
+    """run a load test; in process unless url or launch is given"""
+    if launch:
+        with launch_server() as launched:
+            return asyncio.run(_run(config, launched))
+    return asyncio.run(_run(config, url))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="hawk web api load test")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="base url of a running server")
+    target.add_argument(
+        "--launch",
+        action="store_true",
+        help="start webui.app under uvicorn for the run",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="seconds (default 10)"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=1.0, help="uncounted seconds"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=LoadConfig().mix,
+        help="operation weights (default sign=6,verify=3,keygen=1)",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=LoadConfig().sizes,
+        help="message sizes to draw from (default 64,4k,64k)",
+    )
+    parser.add_argument("--api", choices=["v1", "v2"], default="v2")
+    parser.add_argument("--param", default="hawk-512")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        mix=args.mix,
+        sizes=args.sizes,
+        api=args.api,
+        param=args.param,
+        seed=args.seed,
+    )
+    report = run(config, url=args.url, launch=args.launch)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+prometheus text-format metrics for the web api
+kept in process, no client library or push gateway.
+counters and histograms are dicts keyed by label
+values; gauges (and counters owned by something
+else, like cache hit counts) are read from callbacks
+when /metrics is scraped. MetricsMiddleware counts
+requests, latency and body bytes per route template.
+TraceIdMiddleware binds a hawk trace id per request
+(taken from X-Trace-Id when valid) and echoes it back
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from hawk.core import log
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# seconds; spans sub-millisecond verifies up to slow batch requests
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {labels}"
+            )
+        return tuple(str(labels[k]) for k in self.labelnames)
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, k)} {_number(v)}"
+            for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            if i < len(self.buckets):
+                entry[0][i] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[1] if entry else 0
+
+    def lines(self):
+        with self._lock:
+            items = sorted(
+                (k, (list(b), c, s)) for k, (b, c, s) in self._values.items()
+            )
+        out = []
+        for key, (buckets, count, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                le = _labels(self.labelnames, key, [("le", _number(bound))])
+                out.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, key, [("le", "+Inf")])
+            out.append(f"{self.name}_bucket{le} {count}")
+            labels = _labels(self.labelnames, key)
+            out.append(f"{self.name}_sum{labels} {_number(total)}")
+            out.append(f"{self.name}_count{labels} {count}")
+        return out
+
+
+class Callback(_Metric):
+    """
+    a gauge or counter read at scrape time; fn returns a number, or
+    with labelnames a {label values tuple: number} dict
+    """
+
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge"):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def lines(self):
+        values = self.fn()
+        if not self.labelnames:
+            values = {(): values}
+        return [
+            f"{self.name}{_labels(self.labelnames, k)} {_number(v)}"
+            for k, v in sorted(values.items())
+            if v is not None
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, labelnames=()) -> Callback:
+        return self._add(Callback(name, help, fn, labelnames))
+
+    def callback_counter(self, name, help, fn, labelnames=()) -> Callback:
+        return self._add(Callback(name, help, fn, labelnames, "counter"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.header()
+            lines += metric.lines()
+        return "\n".join(lines) + "\n"
+
+
+class HTTPMetrics:
+    """the per-route request metrics MetricsMiddleware records"""
+
+    def __init__(self, registry: Registry, prefix: str = "hawk"):
+        self.requests = registry.counter(
+            f"{prefix}_http_requests_total",
+            "HTTP requests by route template and status",
+            ("method", "route", "status"),
+        )
+        self.latency = registry.histogram(
+            f"{prefix}_http_request_duration_seconds",
+            "time from request start to the last response byte",
+            ("method", "route"),
+        )
+        self.bytes_in = registry.counter(
+            f"{prefix}_http_request_bytes_total",
+            "request body bytes received",
+            ("route",),
+        )
+        self.bytes_out = registry.counter(
+            f"{prefix}_http_response_bytes_total",
+            "response body bytes sent",
+            ("route",),
+        )
+        self.in_flight = 0
+        registry.gauge(
+            f"{prefix}_http_requests_in_flight",
+            "requests currently being handled",
+            lambda: self.in_flight,
+        )
+
+
+class MetricsMiddleware:
+    """
+    asgi middleware; wraps receive/send so streamed bodies are
+    counted as they pass. routes are labelled by their template
+    (/api/traces/{trace_id}), unmatched paths as "unmatched"
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        m = self.metrics
+        state = {"status": 500, "in": 0, "out": 0}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["in"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["out"] += len(message.get("body", b""))
+            await send(message)
+
+        m.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            m.in_flight -= 1
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            m.requests.inc(method=method, route=route, status=state["status"])
+            m.latency.observe(elapsed, method=method, route=route)
+            m.bytes_in.inc(state["in"], route=route)
+            m.bytes_out.inc(state["out"], route=route)
+
+
+TRACE_HEADER = "x-trace-id"
+
+
+class TraceIdMiddleware:
+    """
+    asgi middleware; every request runs under a trace id so core
+    log events can be tied to it, and the id is returned in the
+    X-Trace-Id response header. a request event is logged at debug
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace_id = None
+        for name, value in scope.get("headers", ()):
+            if name == TRACE_HEADER.encode():
+                trace_id = value.decode("latin-1")
+                break
+        if not log.valid_trace_id(trace_id):
+            trace_id = log.new_trace_id()
+        header = (TRACE_HEADER.encode(), trace_id.encode())
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append(header)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = log.set_trace_id(trace_id)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if log.enabled():
+                log.event(
+                    "request",
+                    logging.DEBUG,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    seconds=time.perf_counter() - start,
+                )
+            log.reset_trace_id(token)
@@ -0,0 +1,94 @@
+"""
+in-memory static pages for the web ui
+a page is read once, relative to this package, and
+kept with precompressed gzip (and brotli, when the
+brotli module is installed) variants. every variant
+has a strong etag; a matching If-None-Match gets 304
+"""
+
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def accepted_encodings(header: str) -> set:
+    """content codings named in an Accept-Encoding header with q > 0"""
+    codings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            codings.add(name.strip().lower())
+    return codings
+
+
+class StaticPage:
+    def __init__(
+        self,
+        name: str,
+        media_type: str = "text/html; charset=utf-8",
+        cache_control: str = "no-cache",
+    ):
+        self.path = PACKAGE_DIR / name
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self._variants = None
+        self._lock = threading.Lock()
+
+    def variants(self) -> dict:
+        """encoding -> (body, etag), built on first use"""
+        if self._variants is None:
+            with self._lock:
+                if self._variants is None:
+                    self._variants = self._load()
+        return self._variants
+
+    def _load(self) -> dict:
+        body = self.path.read_bytes()
+        tag = hashlib.sha256(body).hexdigest()[:32]
+        variants = {
+            "identity": (body, f'"{tag}"'),
+            "gzip": (gzip.compress(body, 9, mtime=0), f'"{tag}-gz"'),
+        }
+        if brotli is not None:
+            variants["br"] = (brotli.compress(body), f'"{tag}-br"')
+        return variants
+
+    def response(self, headers) -> Response:
+        variants = self.variants()
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in variants and candidate in accepted:
+                encoding = candidate
+                break
+        body, etag = variants[encoding]
+        out = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            out["Content-Encoding"] = encoding
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        match = headers.get("if-none-match") or ""
+        tags = [t.strip().removeprefix("W/") for t in match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=out)
+        return Response(body, media_type=self.media_type, headers=out)
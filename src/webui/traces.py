@@ -0,0 +1,69 @@
+"""
+lazy visualize traces
+a trace wraps a generator of step dicts; nothing is
+computed until a step is asked for, and computed steps
+are kept so pages and event streams can be replayed.
+traces live in a ttl-bounded lru and are addressed by
+a random id
+"""
+
+import secrets
+import threading
+from hawk.core.cache import LRUCache
+
+
+class Trace:
+    def __init__(self, steps):
+        self._source = iter(steps)
+        self._steps = []
+        self._done = False
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def __len__(self):
+        """number of steps computed so far"""
+        return len(self._steps)
+
+    def step(self, index: int):
+        """the step at index (0-based), or None past the end"""
+        with self._lock:
+            while len(self._steps) <= index and not self._done:
+                try:
+                    self._steps.append(next(self._source))
+                except StopIteration:
+                    self._done = True
+                except BaseException:
+                    self._done = True
+                    raise
+        if index < len(self._steps):
+            return self._steps[index]
+        return None
+
+    def page(self, offset: int, limit: int):
+        """up to limit steps starting at offset"""
+        self.step(offset + limit - 1)
+        return self._steps[offset : offset + limit]
+
+    def all(self):
+        while self.step(len(self._steps)) is not None:
+            pass
+        return list(self._steps)
+
+
+class TraceStore:
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self._traces = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def add(self, steps) -> str:
+        trace_id = secrets.token_hex(16)
+        self._traces.put(trace_id, Trace(steps))
+        return trace_id
+
+    def get(self, trace_id: str):
+        return self._traces.get(trace_id)
+
+    def stats(self) -> dict:
+        return self._traces.stats()
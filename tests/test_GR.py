@@ -1,5 +1,14 @@
+import random
+
 try:
-    from hawk.utils.gr import CompressGR, DecompressGR
+    from hawk.utils.bitpack import bits_to_bytes
+    from hawk.utils.gr import (
+        CompressGR,
+        DecompressGR,
+        compress_gr_bytes,
+        decompress_gr_bytes,
+        gr_tables,
+    )
 except ModuleNotFoundError:
     import sys
     import os
@@ -8,7 +17,14 @@ except ModuleNotFoundError:
         0,
         os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
     )
-    from hawk.utils.gr import CompressGR, DecompressGR
+    from hawk.utils.bitpack import bits_to_bytes
+    from hawk.utils.gr import (
+        CompressGR,
+        DecompressGR,
+        compress_gr_bytes,
+        decompress_gr_bytes,
+        gr_tables,
+    )
 
 
 def test_gr_roundtrip_basic():
@@ -18,3 +34,29 @@ def test_gr_roundtrip_basic():
     bits = CompressGR(x, low, high)
     res = DecompressGR(bits, len(x), low, high)
     assert res is not None
+
+
+def test_gr_bytes_match_bit_lists():
+    rnd = random.Random(3)
+    for low, high in [(5, 9), (6, 10), (0, 0), (3, 20)]:
+        svec = [rnd.randint(low - 40, high + 40) for _ in range(101)]
+        bits = CompressGR(svec, low, high)
+        data = compress_gr_bytes(svec, low, high)
+        assert data == bits_to_bytes(bits)
+        values, consumed = decompress_gr_bytes(data, len(svec), low, high)
+        assert consumed == len(bits)
+        assert values.tolist() == DecompressGR(bits, len(svec), low, high)[0]
+
+
+def test_gr_bytes_roundtrip_in_range():
+    svec = list(range(5, 10)) * 20
+    data = compress_gr_bytes(svec, 5, 9)
+    values, _ = decompress_gr_bytes(data, len(svec), 5, 9)
+    assert values.tolist() == svec
+    assert decompress_gr_bytes(data[:-1], len(svec), 5, 9) is None
+
+
+def test_gr_tables_cached():
+    t = gr_tables(5, 9)
+    assert t is gr_tables(5, 9)
+    assert t.bits_per == 3 and t.rng == 5
@@ -1,7 +1,16 @@
+import hashlib
+
+import pytest
+
 try:
-    from hawk.core.keygen import HawkKeyGen
-    from hawk.core.sign import HawkSign
-    from hawk.core.verify import HawkVerify
+    from hawk.core.keygen import HawkKeyGen, get_keypair, keypair_cache
+    from hawk.core.sign import HawkSign, SigningKey, sign_batch
+    from hawk.core.verify import (
+        HawkVerify,
+        VerifyingKey,
+        get_verifying_key,
+        verify_batch,
+    )
 except ModuleNotFoundError:
     import sys
     import os
@@ -10,9 +19,14 @@ except ModuleNotFoundError:
         0,
         os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
     )
-    from hawk.core.keygen import HawkKeyGen
-    from hawk.core.sign import HawkSign
-    from hawk.core.verify import HawkVerify
+    from hawk.core.keygen import HawkKeyGen, get_keypair, keypair_cache
+    from hawk.core.sign import HawkSign, SigningKey, sign_batch
+    from hawk.core.verify import (
+        HawkVerify,
+        VerifyingKey,
+        get_verifying_key,
+        verify_batch,
+    )
 
 
 def test_keygen_sign_verify_roundtrip():
@@ -21,3 +35,108 @@ def test_keygen_sign_verify_roundtrip():
     m = b"unit test message"
     sig = HawkSign(sk, m, seed=0, param_name="hawk-512").sign()
     assert HawkVerify(pk, m, sig, param_name="hawk-512").verify()
+
+
+def test_signing_key_parses_secret_key():
+    kg = HawkKeyGen(seed=42, param_name="hawk-512")
+    pk, sk = kg.generate()
+    key = SigningKey(sk, param_name="hawk-512")
+    assert key.kgseed == hashlib.shake_256((42).to_bytes(8, "little")).digest(
+        24
+    )
+    assert key.hpub == hashlib.shake_256(pk).digest(32)
+    assert len(key.Fmod2) == len(key.Gmod2) == 512
+
+
+def test_signing_key_reuse_matches_hawksign():
+    pk, sk = HawkKeyGen(seed=7, param_name="hawk-512").generate()
+    key = SigningKey(sk)
+    for m in [b"", b"one", b"two" * 100]:
+        sig = key.sign(m, seed=7)
+        assert sig == HawkSign(sk, m, seed=7).sign()
+        assert HawkVerify(pk, m, sig).verify()
+
+
+@pytest.mark.parametrize("param", ["hawk-256", "hawk-1024"])
+def test_signing_key_other_params(param):
+    pk, sk = HawkKeyGen(seed=3, param_name=param).generate()
+    sig = SigningKey(sk, param_name=param).sign(b"msg", seed=3)
+    assert HawkVerify(pk, b"msg", sig, param_name=param).verify()
+
+
+def test_signing_key_rejects_bad_length():
+    with pytest.raises(ValueError):
+        SigningKey(b"\x00" * 10)
+
+
+def test_verifying_key_reuse():
+    pk, sk = HawkKeyGen(seed=5, param_name="hawk-512").generate()
+    key = VerifyingKey(pk)
+    assert key.hpub == hashlib.shake_256(pk).digest(32)
+    signer = SigningKey(sk)
+    for m in [b"a", b"b" * 300]:
+        sig = signer.sign(m, seed=5)
+        assert key.verify(m, sig)
+        assert not key.verify(m + b"x", sig)
+        assert not key.verify(m, sig[:-1])
+
+
+def test_get_verifying_key_cached_by_pk():
+    pk, _ = HawkKeyGen(seed=6, param_name="hawk-512").generate()
+    key = get_verifying_key(pk)
+    assert get_verifying_key(bytes(pk)) is key
+    assert get_verifying_key(pk, param_name="hawk-256") is not key
+
+
+def test_get_keypair_cached_by_seed_and_param():
+    kp = get_keypair(31, "hawk-512")
+    assert (kp.pk, kp.sk) == HawkKeyGen(seed=31).generate()
+    hits = keypair_cache.hits
+    assert get_keypair(31, "hawk-512") is kp
+    assert keypair_cache.hits == hits + 1
+    assert get_keypair(31, "hawk-256").pk != kp.pk
+
+
+def _batch_items():
+    items = []
+    for seed in (11, 12):
+        pk, sk = HawkKeyGen(seed=seed, param_name="hawk-512").generate()
+        signer = SigningKey(sk)
+        for i in range(4):
+            m = b"manifest entry %d" % i
+            sig = signer.sign(m, seed=seed)
+            items.append((pk, m if i != 2 else m + b"!", sig))
+    return items
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_batch_in_order(workers):
+    items = _batch_items()
+    expected = [i % 4 != 2 for i in range(len(items))]
+    assert verify_batch(items, workers=workers, chunksize=3) == expected
+
+
+def test_verify_batch_stop_on_failure():
+    items = _batch_items()
+    res = verify_batch(items, workers=1, chunksize=1, stop_on_failure=True)
+    assert res == [True, True, False] + [None] * (len(items) - 3)
+    assert verify_batch([], workers=2) == []
+
+
+@pytest.mark.parametrize(
+    "workers,executor", [(1, "thread"), (3, "thread"), (2, "process")]
+)
+def test_sign_batch_in_order(workers, executor):
+    pk, sk = HawkKeyGen(seed=21, param_name="hawk-512").generate()
+    msgs = [b"artifact %d" % i for i in range(7)]
+    sigs, timings = sign_batch(
+        sk,
+        msgs,
+        workers=workers,
+        seed=21,
+        executor=executor,
+        return_timings=True,
+    )
+    assert sigs == [HawkSign(sk, m, seed=21).sign() for m in msgs]
+    assert len(timings) == len(msgs) and min(timings) >= 0
+    assert all(verify_batch([(pk, m, s) for m, s in zip(msgs, sigs)], 1))
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+try:
+    from hawk import bench
+    from hawk.cli import run_bench
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk import bench
+    from hawk.cli import run_bench
+
+
+class Args:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _report(medians):
+    return {
+        "schema": bench.SCHEMA,
+        "results": [
+            {"name": name, "param": "hawk-512", "median": m}
+            for name, m in medians.items()
+        ],
+    }
+
+
+def test_summarize_percentiles():
+    stats = bench.summarize([i / 1000 for i in range(1, 101)])
+    assert stats["trials"] == 100
+    assert stats["min"] == pytest.approx(0.001)
+    assert stats["median"] == pytest.approx(0.0505)
+    assert stats["p95"] == pytest.approx(0.09505)
+    assert stats["p99"] == pytest.approx(0.09901)
+    assert stats["ops_per_s"] == pytest.approx(1 / 0.0505)
+
+
+def test_measure_loops_fast_calls():
+    calls = []
+    samples = bench.measure(lambda: calls.append(1), warmup=2, repeat=4)
+    assert len(samples) == 4
+    # each trial loops until it is long enough to time
+    assert len(calls) > 2 + 4
+
+
+def test_suite_covers_every_stage():
+    names = {b.name for b in bench.suite("hawk-256")}
+    for prefix in (
+        "keygen",
+        "sign",
+        "verify",
+        "gr.",
+        "bitpack.",
+        "samplers.",
+    ):
+        assert any(name.startswith(prefix) for name in names)
+    for b in bench.suite("hawk-256"):
+        b.fn()
+
+
+def test_suite_inputs_are_not_the_trivial_keypair():
+    # seed 0 derives f=1, g=0, F=0, G=1, which would time no real work
+    cases = {b.name: b.fn for b in bench.suite("hawk-256")}
+    kp = cases["keygen"]()
+    assert kp.seed != 0
+    assert any(kp.g) and any(kp.f[1:])
+    product = cases["poly.negacyclic_mul"]()
+    assert product == cases["poly.schoolbook"]()
+    assert sum(1 for c in product if c) > len(product) // 2
+
+
+def test_compare_flags_regressions():
+    baseline = _report({"sign": 1.0, "verify": 1.0, "gone": 1.0})
+    current = _report({"sign": 1.05, "verify": 1.5, "new": 9.0})
+    regressions = bench.compare(current, baseline, threshold=0.1)
+    assert [r["name"] for r in regressions] == ["verify"]
+    assert regressions[0]["ratio"] == pytest.approx(1.5)
+    assert bench.compare(current, baseline, threshold=0.6) == []
+
+
+def test_run_bench_writes_json_and_compares(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    args = Args(
+        params=["hawk-256"],
+        only=r"^gr\.",
+        warmup=1,
+        repeat=3,
+        json=str(out),
+        baseline=None,
+        threshold=0.1,
+    )
+    assert run_bench(args) == []
+    report = json.loads(out.read_text())
+    assert report["schema"] == bench.SCHEMA
+    assert {r["name"] for r in report["results"]} == {
+        "gr.compress",
+        "gr.decompress",
+    }
+    for r in report["results"]:
+        assert r["param"] == "hawk-256"
+        assert r["median"] <= r["p95"] <= r["p99"]
+
+    # a baseline that is much faster than this run flags every entry
+    for r in report["results"]:
+        r["median"] /= 100
+    base = tmp_path / "base.json"
+    bench.save_report(str(base), report)
+    args.json, args.baseline = None, str(base)
+    assert len(run_bench(args)) == 2
+    assert "REGRESSION gr.compress [hawk-256]" in capsys.readouterr().out
+
+
+def test_speedups_per_param():
+    report = _report({"poly.negacyclic_mul": 0.5, "poly.schoolbook": 20.0})
+    [entry] = bench.speedups(report)
+    assert entry["param"] == "hawk-512"
+    assert entry["speedup"] == pytest.approx(40.0)
+    for r in report["results"]:
+        r.update(p95=r["median"], p99=r["median"], ops_per_s=1 / r["median"])
+    text = bench.format_report(report)
+    assert "x40.0 faster than poly.schoolbook" in text
+
+
+def test_load_report_rejects_unknown_schema(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps({"results": []}))
+    with pytest.raises(ValueError):
+        bench.load_report(str(path))
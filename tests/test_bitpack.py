@@ -1,5 +1,14 @@
+import random
+
+import pytest
+
 try:
-    from hawk.utils.bitpack import bytes_to_bits, bits_to_bytes
+    from hawk.utils.bitpack import (
+        BitReader,
+        BitWriter,
+        bytes_to_bits,
+        bits_to_bytes,
+    )
 except ModuleNotFoundError:
     import sys
     import os
@@ -8,7 +17,12 @@ except ModuleNotFoundError:
         0,
         os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
     )
-    from hawk.utils.bitpack import bytes_to_bits, bits_to_bytes
+    from hawk.utils.bitpack import (
+        BitReader,
+        BitWriter,
+        bytes_to_bits,
+        bits_to_bytes,
+    )
 
 
 def test_bits_bytes_roundtrip():
@@ -16,3 +30,84 @@ def test_bits_bytes_roundtrip():
     bits = bytes_to_bits(b)
     b2 = bits_to_bytes(bits)
     assert b == b2
+
+
+def _reference_bytes_to_bits(b):
+    bits = []
+    for byte in b:
+        for i in range(7, -1, -1):
+            bits.append((byte >> i) & 1)
+    return bits
+
+
+def _reference_bits_to_bytes(bits):
+    out = bytearray()
+    for i in range(0, len(bits), 8):
+        byte = 0
+        for bit in bits[i : i + 8]:
+            byte = (byte << 1) | bit
+        out.append(byte)
+    return bytes(out)
+
+
+def test_bytes_to_bits_msb_first():
+    assert bytes_to_bits(b"\x80\x01") == [1] + [0] * 14 + [1]
+    assert bits_to_bytes([1, 0, 1]) == b"\xa0"
+
+
+def test_writer_matches_bit_lists():
+    rnd = random.Random(7)
+    w = BitWriter()
+    ref = []
+    for _ in range(200):
+        width = rnd.randint(1, 40)
+        v = rnd.getrandbits(width)
+        if rnd.random() < 0.5:
+            w.write(v, width)
+            ref.extend((v >> i) & 1 for i in range(width - 1, -1, -1))
+        else:
+            w.write_le(v, width)
+            ref.extend((v >> i) & 1 for i in range(width))
+    data = bytes(rnd.getrandbits(8) for _ in range(5))
+    w.write_bytes_le(data)
+    for byte in data:
+        ref.extend((byte >> i) & 1 for i in range(8))
+    w.write_bits([1, 1, 0, 1, 0, 0, 1, 1, 1, 0, 1])
+    ref.extend([1, 1, 0, 1, 0, 0, 1, 1, 1, 0, 1])
+    assert len(w) == len(ref)
+    assert w.getvalue() == bits_to_bytes(ref)
+    assert w.getvalue(len(ref) + 20) == bits_to_bytes(ref + [0] * 20)
+    assert w.getvalue(13) == bits_to_bytes(ref[:13])
+
+
+def test_reader_roundtrip():
+    w = BitWriter()
+    w.write(5, 3)
+    w.write_le(0x1234, 13)
+    w.write_bytes_le(b"\x01\x80")
+    w.write_bits([1, 0, 1, 1])
+    r = BitReader(w.getvalue(), len(w))
+    assert r.read(3) == 5
+    assert r.read_le(13) == 0x1234
+    assert r.read_bytes_le(2) == b"\x01\x80"
+    assert r.read_bits(4) == [1, 0, 1, 1]
+    assert r.remaining() == 0
+    with pytest.raises(ValueError):
+        r.read(1)
+
+
+def test_bitpack_rotated_field_matches_reference():
+    # round-trip a 1 KiB field the way keys and signatures carry salts
+    data = bytes(random.Random(1).getrandbits(8) for _ in range(1024))
+    bits = _reference_bytes_to_bits(data)
+    ref = _reference_bits_to_bytes(bits[4:] + bits[:4])
+
+    r = BitReader(data)
+    w = BitWriter()
+    head = r.read(4)
+    w.write_bytes(r.read_bytes(1023))
+    w.write(r.read(4), 4)
+    w.write(head, 4)
+
+    assert w.getvalue() == ref
+    assert bytes_to_bits(data) == _reference_bytes_to_bits(data)
@@ -0,0 +1,103 @@
+try:
+    from hawk.core.cache import LRUCache
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    c = LRUCache(maxsize=2)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1
+    c.put("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert len(c) == 2
+
+
+def test_lru_get_or_create_builds_once():
+    c = LRUCache(maxsize=4)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    first = c.get_or_create("k", factory)
+    assert c.get_or_create("k", factory) is first
+    assert len(calls) == 1
+
+
+def test_lru_counts_hits_and_misses():
+    c = LRUCache(maxsize=2)
+    c.put("a", 1)
+    c.get("a")
+    c.get("b")
+    s = c.stats()
+    assert (s["hits"], s["misses"], s["size"]) == (1, 1, 1)
+
+
+def test_lru_entries_expire_after_ttl():
+    import time
+
+    c = LRUCache(maxsize=2, ttl=0.05)
+    c.put("a", 1)
+    assert c.get("a") == 1
+    time.sleep(0.06)
+    assert c.get("a") is None
+    assert len(c) == 0
+
+
+def test_lru_resize_is_safe_under_concurrent_use():
+    import threading
+
+    import pytest
+
+    c = LRUCache(maxsize=64)
+    stop = threading.Event()
+    errors = []
+
+    def worker(base):
+        try:
+            i = 0
+            while not stop.is_set():
+                c.put((base, i % 100), i)
+                c.get((base, (i * 7) % 100))
+                i += 1
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    try:
+        for size in (1, 8, 2, 32) * 25:
+            c.resize(size, ttl=60.0)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    assert errors == []
+    c.resize(2)
+    assert c.stats() == {
+        "hits": 0,
+        "misses": 0,
+        "size": 0,
+        "maxsize": 2,
+        "ttl": None,
+    }
+    for i in range(5):
+        c.put(i, i)
+    assert len(c) == 2
+    with pytest.raises(ValueError):
+        c.resize(0)
+    with pytest.raises(ValueError):
+        c.resize(4, ttl=-1)
+    assert c.stats()["maxsize"] == 2
@@ -1,6 +1,11 @@
+import argparse
 import unittest
 import tempfile
 import os
+import io
+import contextlib
+import tarfile
+from unittest import mock
 
 try:
     from hawk.cli import (
@@ -9,6 +14,9 @@ try:
         sign_message,
         verify_message,
         load_key,
+        parse_size,
+        sign_dir,
+        verify_dir,
     )
 except ModuleNotFoundError:
     import sys
@@ -24,6 +32,9 @@ except ModuleNotFoundError:
         sign_message,
         verify_message,
         load_key,
+        parse_size,
+        sign_dir,
+        verify_dir,
     )
 
 
@@ -102,6 +113,206 @@ class TestHawkCLI(unittest.TestCase):
             sys.stdout = sys.__stdout__
             self.assertIn("Verification result: False", captured.getvalue())
 
+    def test_sign_and_verify_use_param(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen_keys(Args(seed=2, param="hawk-1024", outdir=tmpdir))
+            msg_path = os.path.join(tmpdir, "msg.txt")
+            sig_path = os.path.join(tmpdir, "sig.bin")
+            with open(msg_path, "wb") as f:
+                f.write(b"hawk-1024 message")
+            with contextlib.redirect_stdout(io.StringIO()):
+                sign_message(
+                    Args(
+                        skey=os.path.join(tmpdir, "sk.bin"),
+                        msg=msg_path,
+                        sig=sig_path,
+                        param="hawk-1024",
+                    )
+                )
+            # hawk-1024 signatures are 3392 bits
+            self.assertEqual(len(load_key(sig_path)), 3392 // 8)
+            for param, expected in [("hawk-1024", True), ("hawk-512", False)]:
+                captured = io.StringIO()
+                with contextlib.redirect_stdout(captured):
+                    verify_message(
+                        Args(
+                            pkey=os.path.join(tmpdir, "pk.bin"),
+                            msg=msg_path,
+                            sig=sig_path,
+                            param=param,
+                        )
+                    )
+                self.assertIn(
+                    f"Verification result: {expected}", captured.getvalue()
+                )
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("4096"), 4096)
+        self.assertEqual(parse_size("4K"), 4096)
+        self.assertEqual(parse_size("2MiB"), 2 << 20)
+        for bad in ("0", "0K", "-4", "lots"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_size(bad)
+
+    def test_sign_verify_buffered_and_mmap(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gen_keys(Args(seed=0, param="hawk-512", outdir=tmpdir))
+            pk_path = os.path.join(tmpdir, "pk.bin")
+            sk_path = os.path.join(tmpdir, "sk.bin")
+            msg_path = os.path.join(tmpdir, "big.bin")
+            sig_path = os.path.join(tmpdir, "big.sig")
+            with open(msg_path, "wb") as f:
+                f.write(os.urandom(300_000))
+
+            for threshold in (1 << 40, 1):
+                with mock.patch("hawk.cli.MMAP_THRESHOLD", threshold):
+                    out = io.StringIO()
+                    with contextlib.redirect_stdout(out):
+                        sign_message(
+                            Args(
+                                skey=sk_path,
+                                msg=msg_path,
+                                sig=sig_path,
+                                buffer_size=4096,
+                            )
+                        )
+                        verify_message(
+                            Args(
+                                pkey=pk_path,
+                                msg=msg_path,
+                                sig=sig_path,
+                                buffer_size=4096,
+                            )
+                        )
+                    text = out.getvalue()
+                    self.assertIn("Verification result: True", text)
+                    self.assertIn("MB/s", text)
+
+    def test_sign_dir_and_verify_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            keydir = os.path.join(tmpdir, "keys")
+            gen_keys(Args(seed=0, param="hawk-512", outdir=keydir))
+            tree = os.path.join(tmpdir, "tree")
+            os.makedirs(os.path.join(tree, "sub"))
+            for i in range(6):
+                with open(os.path.join(tree, "sub", f"f{i}"), "wb") as f:
+                    f.write(os.urandom(1000 * (i + 1)))
+
+            common = dict(
+                param="hawk-512",
+                manifest=None,
+                suffix=".sig",
+                buffer_size=4096,
+            )
+            archive = os.path.join(tmpdir, "sigs.tar")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                for jobs, arch in ((1, None), (2, archive)):
+                    stats = sign_dir(
+                        Args(
+                            skey=os.path.join(keydir, "sk.bin"),
+                            dir=tree,
+                            jobs=jobs,
+                            archive=arch,
+                            **common,
+                        )
+                    )
+                    self.assertEqual(stats["ok"], 6)
+                    stats = verify_dir(
+                        Args(
+                            pkey=os.path.join(keydir, "pk.bin"),
+                            dir=tree,
+                            jobs=jobs,
+                            archive=arch,
+                            **common,
+                        )
+                    )
+                    self.assertEqual(stats["ok"], 6)
+                    self.assertEqual(stats["failures"], [])
+
+                with open(os.path.join(tree, "sub", "f3"), "ab") as f:
+                    f.write(b"tampered")
+                stats = verify_dir(
+                    Args(
+                        pkey=os.path.join(keydir, "pk.bin"),
+                        dir=tree,
+                        jobs=2,
+                        archive=archive,
+                        **common,
+                    )
+                )
+            self.assertEqual(stats["ok"], 5)
+            self.assertEqual(len(stats["failures"]), 1)
+            self.assertIn("files/s", out.getvalue())
+
+    def test_sign_dir_archive_names_stay_inside(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            keydir = os.path.join(tmpdir, "keys")
+            gen_keys(Args(seed=1, param="hawk-256", outdir=keydir))
+            tree = os.path.join(tmpdir, "tree")
+            os.makedirs(os.path.join(tree, "d"))
+            with open(os.path.join(tree, "d", "a.txt"), "wb") as f:
+                f.write(b"a")
+            manifest = os.path.join(tree, "files.txt")
+            with open(manifest, "w") as f:
+                f.write("d/a.txt\n%s\n" % os.path.join(tree, "d", "a.txt"))
+            common = dict(param="hawk-256", suffix=".sig", buffer_size=4096)
+            skey = os.path.join(keydir, "sk.bin")
+            pkey = os.path.join(keydir, "pk.bin")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                # archive written inside the signed tree, run twice
+                archive = os.path.join(tree, "d", "s.tar")
+                for _ in range(2):
+                    for fn, key in ((sign_dir, skey), (verify_dir, pkey)):
+                        stats = fn(
+                            Args(
+                                skey=key,
+                                pkey=key,
+                                dir=tree,
+                                manifest=None,
+                                archive=archive,
+                                jobs=1,
+                                **common,
+                            )
+                        )
+                        self.assertEqual(stats["ok"], 2)
+                        self.assertEqual(stats["failures"], [])
+
+                archive = os.path.join(tmpdir, "m.tar")
+                cwd = os.getcwd()
+                os.chdir(tmpdir)  # manifest paths do not depend on cwd
+                try:
+                    stats = sign_dir(
+                        Args(
+                            skey=skey,
+                            dir=None,
+                            manifest=manifest,
+                            archive=archive,
+                            jobs=1,
+                            **common,
+                        )
+                    )
+                finally:
+                    os.chdir(cwd)
+                self.assertEqual(stats["ok"], 2)
+                with tarfile.open(archive) as tar:
+                    self.assertEqual(tar.getnames(), ["d/a.txt.sig"] * 2)
+
+                with open(manifest, "a") as f:
+                    f.write("../keys/pk.bin\n")
+                with self.assertRaises(ValueError):
+                    sign_dir(
+                        Args(
+                            skey=skey,
+                            dir=None,
+                            manifest=manifest,
+                            archive=archive,
+                            jobs=1,
+                            **common,
+                        )
+                    )
+
 
 if __name__ == "__main__":
     unittest.main()
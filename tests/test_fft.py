@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+try:
+    from hawk.utils.fft import NTT, InvNTT, ntt_tables
+    from hawk.utils.poly import negacyclic_mul_schoolbook
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.utils.fft import NTT, InvNTT, ntt_tables
+    from hawk.utils.poly import negacyclic_mul_schoolbook
+
+Q = 998244353
+
+
+@pytest.mark.parametrize("n", [1, 2, 8, 256, 1024])
+def test_ntt_roundtrip_in_place(n):
+    rng = np.random.default_rng(n)
+    a = rng.integers(0, Q, size=n, dtype=np.int64)
+    orig = a.copy()
+    out = NTT(a, Q)
+    assert out is a
+    InvNTT(a, Q)
+    assert np.array_equal(a, orig)
+
+
+def test_ntt_pointwise_product_is_negacyclic():
+    n = 64
+    rng = np.random.default_rng(1)
+    a = rng.integers(-50, 50, size=n)
+    b = rng.integers(-50, 50, size=n)
+    expected = negacyclic_mul_schoolbook(a.tolist(), b.tolist())
+
+    spec = NTT(np.stack([a, b]).astype(np.int64), Q)
+    prod = spec[0] * spec[1] % Q
+    res = InvNTT(prod, Q)
+    res = np.where(res > Q // 2, res - Q, res)
+    assert res.tolist() == expected
+
+
+def test_ntt_batched_matches_rows():
+    n = 512
+    rng = np.random.default_rng(2)
+    stack = rng.integers(0, Q, size=(4, n), dtype=np.int64)
+    rows = [NTT(row.copy(), Q) for row in stack]
+    NTT(stack, Q)
+    for row, ref in zip(stack, rows):
+        assert np.array_equal(row, ref)
+
+
+def test_ntt_tables_cached():
+    assert ntt_tables(256, Q) is ntt_tables(256, Q)
+
+
+def test_ntt_rejects_bad_input():
+    with pytest.raises(TypeError):
+        NTT(np.zeros(8, dtype=np.float64), Q)
+    with pytest.raises(ValueError):
+        NTT(np.zeros((8, 8), dtype=np.int64)[:, ::2], Q)
+    with pytest.raises(ValueError):
+        ntt_tables(12, Q)
@@ -0,0 +1,61 @@
+import hashlib
+import math
+
+import numpy as np
+import pytest
+
+try:
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.bitpack import BitReader
+    from hawk.utils.hashpoint import derive_s1, h1_bits, hash_to_point
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.bitpack import BitReader
+    from hawk.utils.hashpoint import derive_s1, h1_bits, hash_to_point
+
+
+def _reference_s1(M, salt, param):
+    n = param["n"]
+    low, high = param["lows1"], param["highs1"]
+    rng = high - low + 1
+    bits_per = math.ceil(math.log2(rng))
+    h = hashlib.shake_256(M + salt).digest(2 * n // 8)
+    h1 = []
+    for byte in h[n // 8 :]:
+        h1.extend((byte >> j) & 1 for j in range(8))
+    out = []
+    for i in range(n):
+        chunk = h1[i * bits_per : (i + 1) * bits_per]
+        chunk += [0] * (bits_per - len(chunk))
+        val = sum(b << j for j, b in enumerate(chunk))
+        out.append(low + val % rng)
+    return out
+
+
+@pytest.mark.parametrize("param", sorted(PARAMS))
+def test_derive_s1_matches_reference(param):
+    p = PARAMS[param]
+    for M, salt in ((b"", b""), (b"M" * 64, b"salt"), (bytes(64), b"\xff")):
+        h = hash_to_point(M, salt, p["n"])
+        s1 = derive_s1(h, p)
+        assert s1.dtype == np.int64 and s1.shape == (p["n"],)
+        assert s1.tolist() == _reference_s1(M, salt, p)
+
+
+def test_h1_bits_are_lsb_first():
+    n = 64
+    h = bytes(n // 8) + bytes([0b00000001]) + bytes(n // 8 - 1)
+    bits = h1_bits(h, n)
+    assert len(bits) == n
+    assert bits[0] == 1 and bits[1:].sum() == 0
+    # BitReader reads msb-first, which is not the order s1 uses
+    reader = BitReader(h)
+    reader.skip(n)
+    assert reader.read_bits(8) != bits[:8].tolist()
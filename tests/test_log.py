@@ -0,0 +1,124 @@
+import io
+import json
+import logging
+
+import pytest
+
+try:
+    from hawk.core import log
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.sign import SigningKey, sign_batch
+    from hawk.core.verify import HawkVerify, VerifyingKey
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core import log
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.sign import SigningKey, sign_batch
+    from hawk.core.verify import HawkVerify, VerifyingKey
+
+
+@pytest.fixture
+def events():
+    """capture hawk events as dicts, restoring the logger afterwards"""
+    saved = (
+        log.logger.level,
+        list(log.logger.handlers),
+        log.logger.propagate,
+    )
+    stream = io.StringIO()
+    log.configure("debug", stream=stream)
+
+    def read():
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield read
+    log.logger.setLevel(saved[0])
+    log.logger.handlers[:] = saved[1]
+    log.logger.propagate = saved[2]
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return HawkKeyGen(seed=11).generate()
+
+
+def test_verify_prints_nothing(keys, capsys):
+    pk, sk = keys
+    sig = SigningKey(sk).sign(b"quiet")
+    assert HawkVerify(pk, b"quiet", sig).verify()
+    assert not HawkVerify(pk, b"quiet", sig[:-1]).verify()
+    assert capsys.readouterr().out == ""
+
+
+def test_off_by_default_costs_nothing(keys, monkeypatch):
+    assert not log.enabled()
+    assert log.operation() is log.operation()
+    built = []
+    monkeypatch.setattr(log.logger, "log", lambda *a, **k: built.append(a))
+    pk, sk = keys
+    VerifyingKey(pk).verify(b"m", SigningKey(sk).sign(b"m"))
+    assert built == [] and log.get_trace_id() is None
+
+
+def test_events_share_the_operation_trace_id(keys, events):
+    pk, sk = keys
+    with log.operation() as trace_id:
+        sig = SigningKey(sk).sign(b"traced")
+        assert VerifyingKey(pk).verify(b"traced", sig)
+    assert log.get_trace_id() is None
+    got = events()
+    assert [e["event"] for e in got] == ["sign", "verify"]
+    assert {e["trace_id"] for e in got} == {trace_id}
+    assert got[0]["sig_bytes"] == len(sig) and got[1]["ok"] is True
+    assert got[0]["level"] == "debug" and got[0]["logger"] == "hawk"
+
+    # outside an operation every top-level call gets its own id
+    VerifyingKey(pk).verify(b"traced", sig)
+    VerifyingKey(pk).verify(b"traced", sig)
+    a, b = events()[2:]
+    assert a["trace_id"] and a["trace_id"] != b["trace_id"]
+
+
+def test_verify_failure_reasons(keys, events):
+    pk, sk = keys
+    key = VerifyingKey(pk)
+    sig = SigningKey(sk).sign(b"m")
+    assert not key.verify(b"other", sig)
+    assert not key.verify(b"m", sig[:-1])
+    reasons = [
+        (e["ok"], e["reason"]) for e in events() if e["event"] == "verify"
+    ]
+    assert reasons == [(False, "mismatch"), (False, "length")]
+
+
+def test_batch_items_share_the_batch_trace_id(keys, events):
+    _, sk = keys
+    sign_batch(sk, [b"a", b"b", b"c"], workers=2)
+    got = events()
+    batch = [e for e in got if e["event"] == "sign_batch"]
+    assert len(batch) == 1 and batch[0]["items"] == 3
+    assert {e["trace_id"] for e in got} == {batch[0]["trace_id"]}
+
+
+def test_level_gates_debug_events(keys, events):
+    log.logger.setLevel(logging.INFO)
+    assert log.operation() is log.operation()
+    pk, sk = keys
+    SigningKey(sk).sign(b"x")
+    log.event("custom", logging.WARNING, n=1)
+    assert [e["event"] for e in events()] == ["custom"]
+
+
+def test_trace_id_validation_and_configure():
+    assert log.valid_trace_id("req-42.a_b")
+    assert not log.valid_trace_id("bad id")
+    assert not log.valid_trace_id("x" * 65)
+    assert not log.valid_trace_id(None)
+    with pytest.raises(ValueError):
+        log.configure("loud")
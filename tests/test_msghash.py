@@ -0,0 +1,84 @@
+import hashlib
+import io
+import mmap
+import tempfile
+
+import pytest
+
+try:
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.sign import SigningKey
+    from hawk.core.verify import VerifyingKey
+    from hawk.utils.msghash import MessageHasher, hash_message, iter_chunks
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.sign import SigningKey
+    from hawk.core.verify import VerifyingKey
+    from hawk.utils.msghash import MessageHasher, hash_message, iter_chunks
+
+HPUB = b"\x5a" * 32
+MSG = bytes(range(256)) * 40
+
+
+def test_hash_message_matches_concatenation():
+    expected = hashlib.shake_256(MSG + HPUB).digest(64)
+    assert hash_message(MSG, HPUB) == expected
+    assert hash_message(bytearray(MSG), HPUB) == expected
+    assert hash_message(io.BytesIO(MSG), HPUB, chunk_size=100) == expected
+    chunks = (MSG[i : i + 333] for i in range(0, len(MSG), 333))
+    assert hash_message(chunks, HPUB) == expected
+
+
+def test_hash_message_from_file_and_mmap():
+    expected = hashlib.shake_256(MSG + HPUB).digest(64)
+    with tempfile.TemporaryFile() as f:
+        f.write(MSG)
+        f.seek(0)
+        assert hash_message(f, HPUB, chunk_size=4096) == expected
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            assert hash_message(mm, HPUB) == expected
+
+
+def test_iter_chunks_rejects_str():
+    with pytest.raises(TypeError):
+        list(iter_chunks("text"))
+
+
+def test_iter_chunks_rejects_empty_buffer():
+    # readinto() with a 0-byte buffer returns 0, which reads as end of file
+    for size in (0, -1):
+        with pytest.raises(ValueError):
+            list(iter_chunks(io.BytesIO(MSG), size))
+        with pytest.raises(ValueError):
+            hash_message(io.BytesIO(MSG), HPUB, chunk_size=size)
+
+
+def test_sign_and_verify_streamed_message():
+    pk, sk = HawkKeyGen(seed=9, param_name="hawk-512").generate()
+    sig = SigningKey(sk).sign(io.BytesIO(MSG), seed=9)
+    assert sig == SigningKey(sk).sign(MSG, seed=9)
+    key = VerifyingKey(pk)
+    assert key.verify(iter([MSG[:10], MSG[10:]]), sig)
+    assert not key.verify(io.BytesIO(MSG[1:]), sig)
+
+
+def test_message_hasher_and_digest_api():
+    pk, sk = HawkKeyGen(seed=9, param_name="hawk-512").generate()
+    signer, key = SigningKey(sk), VerifyingKey(pk)
+    hasher = MessageHasher()
+    for i in range(0, len(MSG), 1000):
+        hasher.update(MSG[i : i + 1000])
+    assert hasher.size == len(MSG)
+    M = hasher.digest(signer.hpub)
+    assert M == hash_message(MSG, signer.hpub)
+    sig = signer.sign_digest(M, seed=9)
+    assert sig == signer.sign(MSG, seed=9)
+    assert key.verify_digest(M, sig)
+    assert not key.verify_digest(M, sig[:-1])
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+try:
+    from hawk import bench
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.poly import negacyclic_mul, negacyclic_mul_schoolbook
+    from hawk.utils.samplers import regenerate_fg_bits
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk import bench
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.poly import negacyclic_mul, negacyclic_mul_schoolbook
+    from hawk.utils.samplers import regenerate_fg_bits
+
+
+def test_negacyclic_wraparound_sign():
+    # x^(n-1) * x = x^n = -1 in Z[x]/(x^n + 1)
+    n = 8
+    a = [0] * (n - 1) + [1]
+    b = [0, 1] + [0] * (n - 2)
+    assert negacyclic_mul(a, b) == [-1] + [0] * (n - 1)
+
+
+@pytest.mark.parametrize("n", [1, 3, 16, 48, 64, 128, 512])
+@pytest.mark.parametrize("mag", [1, 9, 1 << 40, 1 << 90])
+def test_negacyclic_mul_matches_schoolbook(n, mag):
+    rnd = random.Random(n * 31 + mag)
+    a = [rnd.randint(-mag, mag) for _ in range(n)]
+    b = [rnd.randint(-mag, mag) for _ in range(n)]
+    assert negacyclic_mul(a, b) == negacyclic_mul_schoolbook(a, b)
+
+
+def test_negacyclic_mul_zero():
+    assert negacyclic_mul([0] * 256, [3] * 256) == [0] * 256
+
+
+@pytest.mark.parametrize("param", sorted(PARAMS))
+def test_negacyclic_mul_keygen_sizes(param):
+    p = PARAMS[param]
+    f, g = regenerate_fg_bits(b"bench", p["n"], eta=p["eta"])
+    assert negacyclic_mul(f, g) == negacyclic_mul_schoolbook(f, g)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("param", sorted(PARAMS))
+def test_negacyclic_mul_speedup(param):
+    p = PARAMS[param]
+    f, g = regenerate_fg_bits(b"bench", p["n"], eta=p["eta"])
+    ref = bench.measure(
+        lambda: negacyclic_mul_schoolbook(f, g), warmup=1, repeat=5
+    )
+    fast = bench.measure(lambda: negacyclic_mul(f, g), warmup=1, repeat=5)
+    speedup = bench.summarize(ref)["median"] / bench.summarize(fast)["median"]
+    print(
+        "%s: negacyclic_mul x%.1f faster than schoolbook" % (param, speedup)
+    )
+    assert speedup > 1
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+try:
+    from hawk.core import profile
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.profile import Profiler, stage
+    from hawk.core.sign import SigningKey
+    from hawk.core.verify import HawkVerify, VerifyingKey
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core import profile
+    from hawk.core.keygen import HawkKeyGen
+    from hawk.core.profile import Profiler, stage
+    from hawk.core.sign import SigningKey
+    from hawk.core.verify import HawkVerify, VerifyingKey
+
+
+def test_stage_is_shared_noop_without_hooks():
+    assert not profile.enabled()
+    assert stage("a") is stage("b")
+
+
+def test_nested_spans_split_self_time():
+    with Profiler() as prof:
+        with stage("outer"):
+            with stage("inner"):
+                sum(range(20000))
+            with stage("inner"):
+                pass
+    assert not profile.enabled()
+    paths = [span.path for span in prof.spans]
+    assert paths == [("outer", "inner"), ("outer", "inner"), ("outer",)]
+    outer = prof.spans[-1]
+    children = prof.spans[0].wall + prof.spans[1].wall
+    assert outer.self_wall == pytest.approx(outer.wall - children)
+    totals = prof.totals()
+    assert totals["outer;inner"]["count"] == 2
+    assert totals["outer"]["count"] == 1
+
+
+def test_stage_paths_are_per_thread():
+    seen = []
+    with Profiler() as prof:
+        with stage("main"):
+            t = threading.Thread(target=lambda: seen.append(stage("w")))
+            t.start()
+            t.join()
+            with seen[0]:
+                pass
+    assert ("w",) in [span.path for span in prof.spans]
+
+
+def test_hooks_see_core_stages():
+    spans = []
+    profile.add_hook(spans.append)
+    try:
+        pk, sk = HawkKeyGen(seed=3).generate()
+        sig = SigningKey(sk).sign(b"profiled")
+        assert HawkVerify(pk, b"profiled", sig).verify()
+    finally:
+        profile.remove_hook(spans.append)
+    paths = {span.path for span in spans}
+    for path in [
+        ("keygen", "regenerate_fg"),
+        ("keygen", "negacyclic_products"),
+        ("keygen", "encode_public"),
+        ("sign", "hash_message"),
+        ("sign", "sign_digest", "hash_to_point"),
+        ("sign", "sign_digest", "compress_gr"),
+        ("sign", "sign_digest", "encode_signature"),
+        ("verify", "verify_digest", "decompress_gr"),
+        ("verify", "verify_digest", "derive_s1"),
+    ]:
+        assert path in paths
+    for span in spans:
+        assert span.wall >= span.self_wall >= 0
+        assert span.cpu >= 0
+
+
+def test_collapsed_stack_export(tmp_path):
+    pk, sk = HawkKeyGen(seed=4).generate()
+    with Profiler() as prof:
+        sig = SigningKey(sk).sign(b"m")
+        VerifyingKey(pk).verify(b"m", sig)
+    out = tmp_path / "stages.folded"
+    prof.write_collapsed(str(out), metric="cpu")
+    lines = out.read_text().splitlines()
+    assert lines
+    for line in lines:
+        path, value = line.rsplit(" ", 1)
+        assert path.split(";")[0] in ("sign", "verify")
+        assert int(value) > 0
+    with pytest.raises(ValueError):
+        prof.collapsed("bogus")
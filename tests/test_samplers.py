@@ -0,0 +1,113 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+try:
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.samplers import (
+        centred_binomial_from_bits,
+        centred_binomial_shake,
+        discrete_gaussian_batch,
+        regenerate_fg_bits,
+        shake256x4,
+    )
+except ModuleNotFoundError:
+    import sys
+    import os
+
+    sys.path.insert(
+        0,
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
+    )
+    from hawk.core.hawk import PARAMS
+    from hawk.utils.samplers import (
+        centred_binomial_from_bits,
+        centred_binomial_shake,
+        discrete_gaussian_batch,
+        regenerate_fg_bits,
+        shake256x4,
+    )
+
+
+def _reference_shake256x4(seed, out_bytes):
+    res = bytearray()
+    per = (out_bytes + 3) // 4
+    for j in range(4):
+        res.extend(hashlib.shake_256(seed + bytes([j])).digest(per))
+    return bytes(res[:out_bytes])
+
+
+def _reference_regenerate_fg_bits(kgseed, n):
+    b = n // 64
+    y = _reference_shake256x4(kgseed, (2 * b * n + 7) // 8)
+    bits = []
+    for byte in y:
+        for i in range(8):
+            bits.append((byte >> i) & 1)
+    f = [sum(bits[i * b : (i + 1) * b]) - b // 2 for i in range(n)]
+    g = [sum(bits[(i + n) * b : (i + n + 1) * b]) - b // 2 for i in range(n)]
+    return f, g
+
+
+@pytest.mark.parametrize("out_bytes", [0, 1, 5, 64, 1023, 4096])
+@pytest.mark.parametrize("threads", [False, True])
+def test_shake256x4_matches_reference(out_bytes, threads):
+    seed = b"lane seed"
+    expected = _reference_shake256x4(seed, out_bytes)
+    assert shake256x4(seed, out_bytes, threads=threads) == expected
+
+
+@pytest.mark.parametrize("n", [32, 64, 256, 512, 1024])
+def test_regenerate_fg_bits_matches_reference(n):
+    for seed in (b"", b"kg", bytes(range(24))):
+        assert regenerate_fg_bits(seed, n) == _reference_regenerate_fg_bits(
+            seed, n
+        )
+
+
+@pytest.mark.parametrize("param", sorted(PARAMS))
+def test_regenerate_fg_bits_threads_identical(param):
+    n = PARAMS[param]["n"]
+    f, g = regenerate_fg_bits(b"x4", n, threads=True)
+    assert (f, g) == regenerate_fg_bits(b"x4", n)
+    assert all(isinstance(x, int) for x in f + g)
+
+
+def _reference_centred_binomial(bits, n, eta):
+    out = []
+    for i in range(n):
+        pos = 2 * eta * i
+        out.append(
+            sum(bits[pos : pos + eta]) - sum(bits[pos + eta : pos + 2 * eta])
+        )
+    return out
+
+
+@pytest.mark.parametrize("eta", [1, 2, 4])
+def test_centred_binomial_from_bits_matches_reference(eta):
+    bits = np.unpackbits(np.frombuffer(b"cbd" * 400, dtype=np.uint8)).tolist()
+    n = len(bits) // (2 * eta)
+    expected = _reference_centred_binomial(bits, n, eta)
+    assert centred_binomial_from_bits(bits, n, eta) == expected
+    with pytest.raises(ValueError):
+        centred_binomial_from_bits(bits[:-1], n, eta)
+    with pytest.raises(ValueError):
+        centred_binomial_from_bits(bits, n, 0)
+
+
+def test_centred_binomial_batch_rows_are_independent_polys():
+    batch = centred_binomial_shake(b"seed", (3, 1024), eta=2)
+    assert batch.shape == (3, 1024)
+    assert np.abs(batch).max() <= 2
+    flat = centred_binomial_shake(b"seed", 3 * 1024, eta=2)
+    assert np.array_equal(batch.ravel(), flat)
+
+
+def test_discrete_gaussian_batch():
+    x = discrete_gaussian_batch((8, 1024), sigma=2.0, seed=5)
+    assert x.shape == (8, 1024) and x.dtype == np.int64
+    assert np.array_equal(x, discrete_gaussian_batch((8, 1024), 2.0, seed=5))
+    assert abs(x.std() - 2.0) < 0.1
+    rng = np.random.default_rng(5)
+    assert np.array_equal(discrete_gaussian_batch((8, 1024), 2.0, rng), x)
@@ -1,9 +1,18 @@
+import argparse
+import os
 import pytest
 from fastapi.testclient import TestClient
 from io import BytesIO
 
 try:
-    from webui.app import app
+    from webui.app import app, backend, http_metrics, index_page, traces
+    from webui.executor import CryptoExecutor, ExecutorBusy
+    from webui.frames import FrameError, decode_frames, encode_frames
+    from webui.metrics import Registry
+    from webui import loadtest
+    from webui.static import StaticPage
+    from webui.traces import Trace
+    from hawk.core import profile
 
 except ModuleNotFoundError:
     import sys
@@ -13,7 +22,14 @@ except ModuleNotFoundError:
         0,
         os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")),
     )
-    from webui.app import app
+    from webui.app import app, backend, http_metrics, index_page, traces
+    from webui.executor import CryptoExecutor, ExecutorBusy
+    from webui.frames import FrameError, decode_frames, encode_frames
+    from webui.metrics import Registry
+    from webui import loadtest
+    from webui.static import StaticPage
+    from webui.traces import Trace
+    from hawk.core import profile
 
 client = TestClient(app)
 
@@ -27,6 +43,35 @@ class TestRootEndpoint:
         assert "HAWK" in response.text
         assert "PQC" in response.text
 
+    def test_root_revalidates_with_etag(self):
+        response = client.get("/")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+        again = client.get("/", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+
+    def test_root_serves_gzip_variant(self):
+        import gzip
+
+        plain = client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] != plain.headers["etag"]
+        assert response.content == plain.content  # decoded by the client
+        raw = index_page.variants()["gzip"][0]
+        assert gzip.decompress(raw) == plain.content
+
+    def test_root_independent_of_working_directory(self, tmp_path):
+        cwd = os.getcwd()
+        os.chdir(tmp_path)
+        try:
+            page = StaticPage("index.html")
+            assert b"HAWK" in page.variants()["identity"][0]
+        finally:
+            os.chdir(cwd)
+
 
 class TestKeyGeneration:
 
@@ -177,6 +222,37 @@ class TestSigning:
             "Signature" in name or "Final" in name for name in step_names
         )
 
+    def test_sign_visualization_describes_the_returned_signature(
+        self, keypair, monkeypatch
+    ):
+        from hawk.core.sign import SigningKey
+        from hawk.utils.bitpack import BitReader
+
+        calls = []
+        sign = SigningKey.sign
+
+        def counting_sign(self, *args, **kwargs):
+            calls.append(1)
+            return sign(self, *args, **kwargs)
+
+        monkeypatch.setattr(SigningKey, "sign", counting_sign)
+        response = client.post(
+            "/api/sign",
+            data={
+                "message": "Test message",
+                "private_key": keypair["private_key"],
+                "visualize": True,
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(calls) == 1
+        sig = bytes.fromhex(data["signature"])
+        steps = {step["step"]: step["variables"] for step in data["steps"]}
+        salt = BitReader(sig).read_bytes_le(len(steps[4]["salt_bytes"]))
+        assert steps[4]["salt_hex"] == salt.hex()
+        assert steps[9]["signature_hex"] == data["signature"]
+
     def test_sign_missing_message(self, keypair):
         response = client.post(
             "/api/sign",
@@ -568,6 +644,622 @@ class TestVisualizationContent:
             or "Verification" in last_step["name"]  # noqa: W503, W504
         )
         assert "variables" in last_step
+        consistency = next(
+            step for step in data["steps"] if "s1 Consistency" in step["name"]
+        )
+        assert consistency["variables"]["mismatches"] == "All values match!"
+
+
+class TestExecutorBackend:
+
+    def test_overload_returns_503(self):
+        limit = backend.max_pending
+        backend.max_pending = 0
+        try:
+            for url, data in [
+                ("/api/generate-keys", {"seed": 987654}),
+                ("/api/sign", {"message": "m", "private_key": "00"}),
+            ]:
+                response = client.post(url, data=data)
+                assert response.status_code == 503
+                assert "busy" in response.json()["detail"]
+        finally:
+            backend.max_pending = limit
+        assert backend.pending == 0
+
+    def test_visualized_keygen_derives_on_heavy_pool(self):
+        calls = []
+        run = backend.run
+
+        async def recording_run(fn, *args, heavy=False, **kwargs):
+            calls.append((fn.__name__, heavy))
+            return await run(fn, *args, heavy=heavy, **kwargs)
+
+        backend.run = recording_run
+        try:
+            response = client.post(
+                "/api/generate-keys", data={"seed": 424242, "visualize": True}
+            )
+        finally:
+            del backend.run
+        assert response.status_code == 200
+        assert calls == [("derive_keypair", True), ("list", False)]
+
+    def test_thread_backend_runs_heavy_jobs(self):
+        import asyncio
+
+        ex = CryptoExecutor(threads=2, max_pending=1, heavy_backend="thread")
+        try:
+            assert asyncio.run(ex.run(pow, 3, 4, heavy=True)) == 81
+            assert ex._process_pool is None
+            ex.max_pending = 0
+            with pytest.raises(ExecutorBusy):
+                asyncio.run(ex.run(pow, 3, 4))
+        finally:
+            ex.shutdown()
+
+    def test_broken_process_pool_is_replaced(self):
+        import asyncio
+        from concurrent.futures.process import BrokenProcessPool
+        from webui.executor import START_METHOD
+
+        ex = CryptoExecutor(processes=1, heavy_backend="process")
+        try:
+            assert asyncio.run(ex.run(pow, 2, 10, heavy=True)) == 1024
+            pool = ex._process_pool
+            assert pool._mp_context.get_start_method() == START_METHOD
+            assert START_METHOD != "fork"
+            # the worker dies mid-job, which breaks the pool
+            with pytest.raises(BrokenProcessPool):
+                asyncio.run(ex.run(os._exit, 1, heavy=True))
+            assert ex._process_pool is None
+            assert asyncio.run(ex.run(pow, 3, 4, heavy=True)) == 81
+            assert ex._process_pool is not pool
+            assert ex.pending == 0
+        finally:
+            ex.shutdown()
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            CryptoExecutor(heavy_backend="gpu")
+
+
+class TestBinaryAPI:
+
+    def _keys(self, seed=0):
+        response = client.post("/api/v2/generate-keys", params={"seed": seed})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        (pk, sk), rest = decode_frames(response.content, 2)
+        assert rest == b""
+        return pk, sk
+
+    def test_generate_keys_matches_v1(self):
+        pk, sk = self._keys(seed=3)
+        v1 = client.post("/api/generate-keys", data={"seed": 3}).json()
+        assert pk.hex() == v1["public_key"]
+        assert sk.hex() == v1["private_key"]
+
+    def test_sign_and_verify_roundtrip(self):
+        pk, sk = self._keys()
+        msg = b"binary message " * 5000
+        chunks = (msg[i : i + 4096] for i in range(0, len(msg), 4096))
+        body = encode_frames(sk)
+        response = client.post(
+            "/api/v2/sign",
+            params={"seed": 0},
+            content=iter([body, *chunks]),
+        )
+        assert response.status_code == 200
+        assert response.headers["x-message-size"] == str(len(msg))
+        sig = response.content
+        v1 = client.post(
+            "/api/sign",
+            files={"message_file": ("m.bin", BytesIO(msg))},
+            data={"private_key": sk.hex(), "seed": 0},
+        ).json()
+        assert sig.hex() == v1["signature"]
+
+        ok = client.post(
+            "/api/v2/verify", content=encode_frames(pk, sig) + msg
+        )
+        assert ok.content == b"\x01"
+        assert ok.headers["x-hawk-valid"] == "true"
+        bad = client.post(
+            "/api/v2/verify", content=encode_frames(pk, sig) + msg + b"!"
+        )
+        assert bad.content == b"\x00"
+
+    def test_malformed_body_is_rejected(self):
+        response = client.post("/api/v2/sign", content=b"\x00\x00\x01")
+        assert response.status_code == 400
+        response = client.post("/api/v2/sign", content=encode_frames(b"k"))
+        assert response.status_code == 400
+        response = client.post("/api/v2/verify", content=b"\xff\xff\xff\xff")
+        assert response.status_code == 400
+
+    def test_unsupported_param(self):
+        response = client.post(
+            "/api/v2/generate-keys", params={"param": "hawk-1024"}
+        )
+        assert response.status_code == 400
+
+    def test_decode_frames_truncated(self):
+        with pytest.raises(FrameError):
+            decode_frames(encode_frames(b"abc")[:-1], 1)
+
+
+class TestBatchVerify:
+
+    def _jobs(self):
+        keys = client.post("/api/generate-keys", data={"seed": 4}).json()
+        jobs = []
+        for i in range(5):
+            msg = f"batch message {i}"
+            sig = client.post(
+                "/api/sign",
+                data={"message": msg, "private_key": keys["private_key"]},
+            ).json()["signature"]
+            jobs.append(
+                {
+                    "id": f"job-{i}",
+                    "public_key": keys["public_key"],
+                    "signature": sig,
+                    "message": msg if i != 3 else msg + "!",
+                }
+            )
+        return jobs
+
+    def _results(self, response):
+        import json
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(
+            "application/x-ndjson"
+        )
+        lines = [json.loads(x) for x in response.text.splitlines()]
+        return {r["index"]: r for r in lines}
+
+    def test_ndjson_batch(self):
+        import json
+
+        jobs = self._jobs()
+        body = "\n".join(json.dumps(j) for j in jobs) + "\n\n{oops\n"
+        response = client.post(
+            "/api/verify/batch",
+            params={"chunk_size": 2},
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        results = self._results(response)
+        assert len(results) == 6
+        for i in range(5):
+            assert results[i]["id"] == f"job-{i}"
+            assert results[i]["valid"] is (i != 3)
+        assert "malformed" in results[5]["error"]
+
+    def test_binary_batch(self):
+        jobs = self._jobs()
+        body = b"".join(
+            encode_frames(
+                bytes.fromhex(j["public_key"]),
+                bytes.fromhex(j["signature"]),
+                j["message"].encode(),
+            )
+            for j in jobs
+        )
+        response = client.post(
+            "/api/verify/batch",
+            content=body + b"\x00\x00",
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        results = self._results(response)
+        assert [results[i]["valid"] for i in range(5)] == [
+            True,
+            True,
+            True,
+            False,
+            True,
+        ]
+        assert (
+            "truncated" in results[5]["error"] or "end" in results[5]["error"]
+        )
+
+    def test_streamed_batch_against_uvicorn(self):
+        import json
+        import socket
+        import threading
+        import time
+        import httpx
+        import uvicorn
+        from hawk.core.keygen import get_keypair
+        from hawk.core.sign import SigningKey
+
+        kp = get_keypair(8, "hawk-512")
+        signer = SigningKey(kp.sk)
+        jobs = []
+        for i in range(40):
+            msg = b"served message %d" % i
+            jobs.append(
+                {
+                    "id": i,
+                    "public_key": kp.pk.hex(),
+                    "signature": signer.sign(msg).hex(),
+                    "message_hex": (msg if i % 7 else msg + b"?").hex(),
+                }
+            )
+
+        def body():
+            for job in jobs:
+                yield (json.dumps(job) + "\n").encode()
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        server = uvicorn.Server(
+            uvicorn.Config(app, log_level="warning", lifespan="off")
+        )
+        thread = threading.Thread(
+            target=server.run, kwargs={"sockets": [sock]}, daemon=True
+        )
+        thread.start()
+        try:
+            deadline = time.monotonic() + 10
+            while not server.started and time.monotonic() < deadline:
+                time.sleep(0.01)
+            response = httpx.post(
+                f"http://127.0.0.1:{port}/api/verify/batch",
+                params={"chunk_size": 8},
+                content=body(),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=60,
+            )
+        finally:
+            server.should_exit = True
+            thread.join(10)
+            sock.close()
+        results = self._results(response)
+        assert sorted(results) == list(range(40))
+        for i, r in results.items():
+            assert r["id"] == i
+            assert r["valid"] is bool(i % 7)
+
+    def test_batch_limits(self, monkeypatch):
+        import json
+        import webui.app as webapp
+
+        body = "".join(json.dumps(j) + "\n" for j in self._jobs()).encode()
+        monkeypatch.setattr(webapp, "BATCH_MAX_JOBS", 4)
+        response = client.post("/api/verify/batch", content=body)
+        assert response.status_code == 413
+        assert "4 jobs" in response.json()["detail"]
+
+        monkeypatch.setattr(webapp, "BATCH_MAX_JOBS", 100)
+        monkeypatch.setattr(webapp, "BATCH_MAX_BODY", len(body) - 1)
+        response = client.post("/api/verify/batch", content=body)
+        assert response.status_code == 413
+
+        def chunks():
+            # no content-length, so the cap is hit while reading
+            yield body[:100]
+            yield body[100:]
+
+        response = client.post("/api/verify/batch", content=chunks())
+        assert response.status_code == 413
+        assert backend.pending == 0
+
+        monkeypatch.setattr(webapp, "BATCH_MAX_BODY", len(body))
+        response = client.post(
+            "/api/verify/batch", params={"chunk_size": 1}, content=body
+        )
+        assert len(self._results(response)) == 5
+
+    def test_batch_worker_decodes_lines(self):
+        import json
+        from webui.batch import verify_items, verify_lines
+
+        jobs = self._jobs()
+        lines = [json.dumps(j).encode() for j in jobs] + [b"{oops"]
+        out = verify_lines(lines, "hawk-512")
+        assert [ok for _, ok, _ in out] == [
+            True,
+            True,
+            True,
+            False,
+            True,
+            None,
+        ]
+        assert [job_id for job_id, _, _ in out[:5]] == [j["id"] for j in jobs]
+        assert "malformed" in out[5][2]
+        j = jobs[0]
+        item = (
+            bytes.fromhex(j["public_key"]),
+            j["message"].encode(),
+            bytes.fromhex(j["signature"]),
+        )
+        assert verify_items([item], "hawk-512") == [(None, True, None)]
+
+    def test_batch_rejected_when_busy(self):
+        limit = backend.max_pending
+        backend.max_pending = 0
+        try:
+            response = client.post("/api/verify/batch", content=b"")
+            assert response.status_code == 503
+        finally:
+            backend.max_pending = limit
+
+
+class TestLazyTraces:
+
+    def _sign_trace_id(self):
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        response = client.post(
+            "/api/sign",
+            data={
+                "message": "lazy",
+                "private_key": keys["private_key"],
+                "trace": True,
+            },
+        )
+        data = response.json()
+        assert data["steps"] == []
+        return data["trace_id"], data
+
+    def test_trace_is_not_built_until_requested(self):
+        trace_id, _ = self._sign_trace_id()
+        assert len(traces.get(trace_id)) == 0
+        step = client.get(f"/api/traces/{trace_id}/steps/1").json()
+        assert step["step"] == 2
+        assert len(traces.get(trace_id)) == 2
+
+    def test_pages_match_eager_steps(self):
+        trace_id, data = self._sign_trace_id()
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        eager = client.post(
+            "/api/sign",
+            data={
+                "message": "lazy",
+                "private_key": keys["private_key"],
+                "visualize": True,
+            },
+        ).json()
+        assert eager["signature"] == data["signature"]
+        steps, offset = [], 0
+        while offset is not None:
+            page = client.get(
+                f"/api/traces/{trace_id}",
+                params={"offset": offset, "limit": 4},
+            ).json()
+            steps += page["steps"]
+            offset = page["next_offset"]
+        # step 4 shows a fresh random salt each time
+        assert [s["name"] for s in steps] == [
+            s["name"] for s in eager["steps"]
+        ]
+        assert steps[-1] == eager["steps"][-1]
+
+    def test_event_stream(self):
+        import json
+
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        trace_id = client.post(
+            "/api/generate-keys", data={"seed": 0, "trace": True}
+        ).json()["trace_id"]
+        response = client.get(
+            f"/api/traces/{trace_id}/events", headers={"Last-Event-ID": "6"}
+        )
+        assert response.headers["content-type"].startswith(
+            "text/event-stream"
+        )
+        events = [e for e in response.text.split("\n\n") if e]
+        assert events[-1].startswith("event: end")
+        first = events[0].split("\n")
+        assert first[:2] == ["id: 7", "event: step"]
+        step = json.loads(first[2][len("data: ") :])
+        assert step["variables"]["total_sk_size"] * 2 == len(
+            keys["private_key"]
+        )
+
+    def test_unknown_trace(self):
+        assert client.get("/api/traces/nope").status_code == 404
+        trace_id, _ = self._sign_trace_id()
+        missing = client.get(f"/api/traces/{trace_id}/steps/99")
+        assert missing.status_code == 404
+
+    def test_trace_pulls_lazily(self):
+        pulled = []
+
+        def steps():
+            for i in range(3):
+                pulled.append(i)
+                yield {"step": i}
+
+        trace = Trace(steps())
+        assert pulled == [] and trace.step(0) == {"step": 0}
+        assert pulled == [0]
+        assert trace.page(1, 5) == [{"step": 1}, {"step": 2}]
+        assert trace.done and trace.step(3) is None
+
+
+class TestMetrics:
+
+    def _scrape(self):
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        return response.text
+
+    @staticmethod
+    def _value(text, sample):
+        for line in text.splitlines():
+            if line.startswith(sample + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    def test_requests_latency_and_bytes(self):
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        sk = bytes.fromhex(keys["private_key"])
+        before = self._scrape()
+        body = encode_frames(sk) + b"m" * 1000
+        sig = client.post("/api/v2/sign", content=body)
+        client.get("/api/traces/not-a-trace")
+        after = self._scrape()
+
+        def delta(sample):
+            return self._value(after, sample) - self._value(before, sample)
+
+        route = 'route="/api/v2/sign"'
+        count = 'hawk_http_requests_total{method="POST",%s,status="200"}'
+        assert delta(count % route) == 1
+        assert delta("hawk_http_request_bytes_total{%s}" % route) == len(body)
+        sent = delta("hawk_http_response_bytes_total{%s}" % route)
+        assert sent == len(sig.content)
+        latency = 'hawk_http_request_duration_seconds_count{method="POST",%s}'
+        assert delta(latency % route) == 1
+        # path parameters are folded into the route template
+        assert 'route="/api/traces/{trace_id}",status="404"' in after
+        assert "not-a-trace" not in after
+
+    def test_executor_and_cache_metrics(self):
+        client.post("/api/generate-keys", data={"seed": 0})
+        client.post("/api/generate-keys", data={"seed": 0})
+        text = self._scrape()
+        assert "hawk_executor_pending 0" in text
+        assert "hawk_executor_max_pending %d" % backend.max_pending in text
+        assert self._value(text, 'hawk_cache_hits_total{cache="keypair"}') > 0
+        ratio = self._value(text, 'hawk_cache_hit_ratio{cache="keypair"}')
+        assert 0 < ratio <= 1
+        for cache in ("signing_key", "verifying_key", "trace"):
+            assert f'hawk_cache_entries{{cache="{cache}"}}' in text
+        assert 'hawk_executor_job_duration_seconds_count{job="' in text
+
+    def test_stage_histograms_when_enabled(self):
+        from webui import app as app_module
+
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        profile.add_hook(app_module._observe_stage)
+        try:
+            client.post(
+                "/api/sign",
+                data={
+                    "message": "staged",
+                    "private_key": keys["private_key"],
+                },
+            )
+        finally:
+            profile.remove_hook(app_module._observe_stage)
+        text = self._scrape()
+        sample = (
+            "hawk_stage_duration_seconds_count"
+            '{stage="sign;sign_digest;compress_gr"}'
+        )
+        assert self._value(text, sample) >= 1
+        assert http_metrics.in_flight == 0
+
+    def test_registry_rendering(self):
+        registry = Registry()
+        hist = registry.histogram("t_seconds", "h", ("k",), buckets=(0.1, 1))
+        hist.observe(0.05, k='a"b')
+        hist.observe(5, k='a"b')
+        registry.counter("t_total", "c").inc(3)
+        registry.gauge("t_gauge", "g", lambda: 1.5)
+        text = registry.render()
+        assert "# TYPE t_seconds histogram" in text
+        assert 't_seconds_bucket{k="a\\"b",le="0.1"} 1' in text
+        assert 't_seconds_bucket{k="a\\"b",le="1"} 1' in text
+        assert 't_seconds_bucket{k="a\\"b",le="+Inf"} 2' in text
+        assert 't_seconds_count{k="a\\"b"} 2' in text
+        assert "t_total 3" in text and "t_gauge 1.5" in text
+        with pytest.raises(ValueError):
+            hist.observe(1, wrong="x")
+        with pytest.raises(ValueError):
+            registry.counter("t_total", "again")
+
+
+class TestLoadTest:
+
+    def test_parse_mix(self):
+        assert loadtest.parse_mix("sign=2, verify=1") == {
+            "sign": 2.0,
+            "verify": 1.0,
+        }
+        for bad in ("sign", "sign=x", "hash=1", "sign=-1", "sign=0"):
+            with pytest.raises(argparse.ArgumentTypeError):
+                loadtest.parse_mix(bad)
+        assert loadtest.parse_sizes("64,4k") == (64, 4096)
+
+    def test_summary_skips_warmup(self):
+        Record = loadtest.Record
+        config = loadtest.LoadConfig(warmup=1.0)
+        records = [
+            Record("sign", 64, 0.5, 9.0, 200),  # warmup, ignored
+            Record("sign", 64, 1.5, 0.010, 200),
+            Record("sign", 64, 1.6, 0.030, 200),
+            Record("verify", 64, 1.7, 0.020, 503),
+        ]
+        report = loadtest.summarize(records, config, elapsed=3.0)
+        total = report["total"]
+        assert total["requests"] == 3 and total["errors"] == 1
+        assert total["busy"] == 1
+        assert total["throughput_rps"] == pytest.approx(1.0)
+        assert report["operations"]["sign"]["max_ms"] == pytest.approx(30)
+        assert report["operations"]["sign[64]"]["requests"] == 2
+        assert "p99_ms" not in report["operations"]["verify"]
+
+    @pytest.mark.parametrize("api", ["v1", "v2"])
+    def test_in_process_run(self, api):
+        config = loadtest.LoadConfig(
+            concurrency=4,
+            duration=0.5,
+            warmup=0.0,
+            mix={"keygen": 1, "sign": 2, "verify": 2},
+            sizes=(16, 2048),
+            api=api,
+        )
+        report = loadtest.run(config)
+        assert report["total"]["requests"] > 0
+        assert report["total"]["errors"] == 0
+        for op in ("keygen", "sign", "verify"):
+            stats = report["operations"][op]
+            assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+        assert "verify[2048]" in report["operations"]
+        assert "p99 ms" in loadtest.format_report(report)
+
+
+class TestTraceIds:
+
+    def test_trace_id_header_round_trip(self):
+        response = client.get("/metrics", headers={"X-Trace-Id": "req-1"})
+        assert response.headers["x-trace-id"] == "req-1"
+        generated = client.get("/metrics").headers["x-trace-id"]
+        assert len(generated) == 16
+        replaced = client.get("/metrics", headers={"X-Trace-Id": "a b"})
+        assert replaced.headers["x-trace-id"] != "a b"
+
+    def test_core_events_carry_the_request_trace_id(self):
+        import io
+        import json
+        from hawk.core import log
+
+        keys = client.post("/api/generate-keys", data={"seed": 0}).json()
+        sk = bytes.fromhex(keys["private_key"])
+        saved = (log.logger.level, list(log.logger.handlers))
+        stream = io.StringIO()
+        log.configure("debug", stream=stream)
+        try:
+            client.post(
+                "/api/v2/sign",
+                content=encode_frames(sk) + b"correlated",
+                headers={"X-Trace-Id": "corr-7"},
+            )
+        finally:
+            log.logger.setLevel(saved[0])
+            log.logger.handlers[:] = saved[1]
+        got = [json.loads(line) for line in stream.getvalue().splitlines()]
+        by_event = {e["event"]: e for e in got}
+        for name in ("sign", "executor.job", "request"):
+            assert by_event[name]["trace_id"] == "corr-7"
+        assert by_event["request"]["status"] == 200
 
 
 if __name__ == "__main__":